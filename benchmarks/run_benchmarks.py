@@ -0,0 +1,248 @@
+"""
+Benchmark the orchestration overhead of simdriver with stand-in executables.
+
+OpenFAST and TurbSim are replaced by the scripts in `stand_ins`, which sleep for a
+configurable time and write synthetic output of realistic size. Every configuration
+runs in a fresh process, so peak memory of the driver is measured per configuration.
+The phases of `run_fast` and `run_turbsim` are timed separately, 'simulation' is the
+wall time of the process pool and includes staging and cleanup, 'conversion' is
+summed over the conversion threads. The overhead per case includes the start-up time
+of the stand-ins, which are plain Python scripts.
+
+Usage (Linux):
+    python benchmarks/run_benchmarks.py --cases 10 100 1000 10000 --channels 13 200
+    python benchmarks/run_benchmarks.py --tool turbsim --cases 10 100 --output results.json
+"""
+
+import argparse
+import json
+import os
+import resource
+import subprocess
+import sys
+import tempfile
+import threading
+import time
+from collections import defaultdict
+from pathlib import Path
+
+import numpy as np
+
+REPO = Path(__file__).resolve().parent.parent
+STAND_INS = Path(__file__).resolve().parent / "stand_ins"
+MODEL = REPO / "extern" / "NREL_5MW" / "NREL_5MW.fst"
+
+sys.path.insert(0, str(REPO / "src"))
+
+from simdriver.run_fast import FastCampaign  # noqa: E402
+from simdriver.run_turbsim import TurbSimCampaign  # noqa: E402
+from simdriver.scheduler import run_jobs  # noqa: E402
+
+
+class Timings:
+    """Thread-safe accumulator of wall time per phase."""
+
+    def __init__(self):
+        self.lock = threading.Lock()
+        self.phases = defaultdict(float)
+
+    def add(self, phase: str, seconds: float):
+        with self.lock:
+            self.phases[phase] += seconds
+
+    def wrap(self, phase: str, function):
+        def timed(*args, **kwargs):
+            start = time.perf_counter()
+            try:
+                return function(*args, **kwargs)
+            finally:
+                self.add(phase, time.perf_counter() - start)
+
+        return timed
+
+
+def bench_fast(args, work_dir: Path) -> dict:
+    """Run one OpenFAST benchmark configuration, return phase timings in seconds."""
+    timings = Timings()
+    os.chdir(work_dir)
+
+    start = time.perf_counter()
+    campaign = FastCampaign(
+        output_dir="output",
+        input_file=os.path.relpath(args.model),
+        time_span=args.time_span,
+        time_step=args.time_step,
+        custom_fast=os.path.relpath(STAND_INS / "openfast.py"),
+        initialize_turbine_state=False,
+        staging=args.staging,
+        conversion_workers=args.conversion_workers,
+    )
+    timings.add("setup", time.perf_counter() - start)
+
+    # Time the phases of each case where they happen.
+    campaign.stage = timings.wrap("staging", campaign.stage)
+    campaign.convert = timings.wrap("conversion", campaign.convert)
+    campaign.remove_temp_dir = timings.wrap("cleanup", campaign.remove_temp_dir)
+
+    start = time.perf_counter()
+    wind_speeds = np.linspace(3, 25, args.case_count)
+    inflow_files = [campaign.steady_case(u) for u in wind_speeds]
+    timings.add("inflow", time.perf_counter() - start)
+
+    start = time.perf_counter()
+    jobs = (campaign.job(inflow_file, v0) for inflow_file, v0 in inflow_files)
+    run_jobs(jobs, args.max_processes, keep_finished=False)
+    timings.add("simulation", time.perf_counter() - start)
+
+    start = time.perf_counter()
+    failures = campaign.process_output()
+    campaign.close()
+    timings.add("conversion_wait", time.perf_counter() - start)
+
+    if failures or campaign.n_failed:
+        raise RuntimeError("benchmark cases failed.")
+
+    return dict(timings.phases)
+
+
+def bench_turbsim(args, work_dir: Path) -> dict:
+    """Run one TurbSim benchmark configuration, return phase timings in seconds."""
+    timings = Timings()
+    os.chdir(work_dir)
+
+    start = time.perf_counter()
+    campaign = TurbSimCampaign(
+        output_dir="wind",
+        grid_points_horizontal=args.grid_points,
+        grid_points_vertical=args.grid_points,
+        grid_size_horizontal=150,
+        grid_size_vertical=150,
+        hub_height=90,
+        wind_speed=list(np.linspace(3, 25, args.case_count)),
+        turbulence_intensity=10,
+        time_span=args.time_span,
+        time_step=args.turbsim_time_step,
+        rand_seed=1,
+        custom_turbsim=os.path.relpath(STAND_INS / "turbsim.py"),
+    )
+    timings.add("setup", time.perf_counter() - start)
+
+    start = time.perf_counter()
+    inp_files = [campaign.write_input(case) for case in campaign.cases()]
+    campaign.write_metadata()
+    timings.add("inputs", time.perf_counter() - start)
+
+    start = time.perf_counter()
+    jobs = (campaign.job(inp_file) for inp_file in inp_files)
+    run_jobs(jobs, args.max_processes, keep_finished=False)
+    timings.add("simulation", time.perf_counter() - start)
+
+    if campaign.failed:
+        raise RuntimeError("benchmark cases failed.")
+
+    return dict(timings.phases)
+
+
+def run_single(args):
+    """Run one configuration in this process and print the result as JSON."""
+    os.environ["SIMDRIVER_STAND_IN_SLEEP"] = str(args.sleep)
+    os.environ["SIMDRIVER_STAND_IN_CHANNELS"] = str(args.channel_count)
+
+    # Progress messages of simdriver go to stderr, stdout carries the result.
+    stdout = sys.stdout
+    sys.stdout = sys.stderr
+
+    with tempfile.TemporaryDirectory(dir=args.work_dir) as work_dir:
+        start = time.perf_counter()
+        if args.tool == "fast":
+            phases = bench_fast(args, Path(work_dir))
+        else:
+            phases = bench_turbsim(args, Path(work_dir))
+        total = time.perf_counter() - start
+        os.chdir(REPO)
+
+    # Peak resident set size in kB on Linux.
+    own = resource.getrusage(resource.RUSAGE_SELF)
+    children = resource.getrusage(resource.RUSAGE_CHILDREN)
+    result = {
+        "tool": args.tool,
+        "cases": args.case_count,
+        "channels": args.channel_count,
+        "total": total,
+        # Time not spent sleeping in the stand-ins, spread over the process slots.
+        "overhead_per_case": (
+            total - args.sleep * np.ceil(args.case_count / args.max_processes)
+        )
+        / args.case_count,
+        "phases": phases,
+        "peak_rss_mb": own.ru_maxrss / 1024,
+        "cpu_time": own.ru_utime + own.ru_stime,
+        "child_cpu_time": children.ru_utime + children.ru_stime,
+    }
+    print(json.dumps(result), file=stdout)
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument("--tool", choices=["fast", "turbsim"], default="fast")
+    parser.add_argument("--cases", type=int, nargs="+", default=[10, 100, 1000])
+    parser.add_argument("--channels", type=int, nargs="+", default=[13, 200])
+    parser.add_argument("--time-span", type=float, default=60)
+    parser.add_argument("--time-step", type=float, default=0.01)
+    parser.add_argument("--turbsim-time-step", type=float, default=0.05)
+    parser.add_argument("--grid-points", type=int, default=15)
+    parser.add_argument("--sleep", type=float, default=0)
+    parser.add_argument("--max-processes", type=int, default=os.cpu_count())
+    parser.add_argument("--staging", choices=["copy", "link"], default="copy")
+    parser.add_argument("--conversion-workers", type=int, default=4)
+    parser.add_argument("--model", default=str(MODEL))
+    parser.add_argument("--work-dir", default=None)
+    parser.add_argument("--output", help="Path to write all results as JSON.")
+    parser.add_argument("--single", action="store_true", help=argparse.SUPPRESS)
+    parser.add_argument("--case-count", type=int, help=argparse.SUPPRESS)
+    parser.add_argument("--channel-count", type=int, help=argparse.SUPPRESS)
+    args = parser.parse_args()
+
+    args.model = str(Path(args.model).resolve())
+
+    if args.single:
+        run_single(args)
+        return
+
+    # The channel count only matters for OpenFAST output.
+    channels = args.channels if args.tool == "fast" else [0]
+
+    results = []
+    for cases in args.cases:
+        for channel_count in channels:
+            command = [sys.executable, __file__, "--single"] + sys.argv[1:]
+            command += [
+                "--case-count",
+                str(cases),
+                "--channel-count",
+                str(channel_count),
+            ]
+            output = subprocess.run(command, capture_output=True, text=True)
+            if output.returncode != 0:
+                print(output.stderr[-5000:], file=sys.stderr)
+                raise RuntimeError(f"benchmark with {cases} cases failed.")
+            result = json.loads(output.stdout)
+            results.append(result)
+
+            phases = ", ".join(
+                f"{phase} {seconds:.2f} s"
+                for phase, seconds in result["phases"].items()
+            )
+            print(
+                f"{args.tool} {cases} cases, {channel_count} channels: "
+                f"total {result['total']:.2f} s, "
+                f"overhead {result['overhead_per_case'] * 1000:.1f} ms/case, "
+                f"peak RSS {result['peak_rss_mb']:.0f} MB\n  {phases}"
+            )
+
+    if args.output is not None:
+        Path(args.output).write_text(json.dumps(results, indent=2))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,123 @@
+#!/usr/bin/env python3
+"""
+Stand-in for the OpenFAST executable, used by the benchmark suite.
+
+Reads TMax, DT, DT_Out and the output lists of ElastoDyn and ServoDyn from the input
+files, sleeps and writes a synthetic binary output file (.outb) with the requested
+channels. Progress lines are printed like OpenFAST does.
+
+Environment variables:
+    SIMDRIVER_STAND_IN_SLEEP: Wall time of one simulation in seconds, default 0.
+    SIMDRIVER_STAND_IN_CHANNELS: Number of output channels besides time, default is
+                                 Wind1VelX plus the channels requested in the OutLists.
+                                 A larger number is padded with extra channels, a
+                                 smaller one truncates the list.
+"""
+
+import os
+import re
+import struct
+import sys
+import time
+from pathlib import Path
+
+# Units of the written channels by name prefix, other channels are unitless.
+UNITS = {
+    "Time": "(s)",
+    "Wind1Vel": "(m/s)",
+    "RotSpeed": "(rpm)",
+    "BldPitch": "(deg)",
+    "GenPwr": "(kW)",
+    "RotTorq": "(kN-m)",
+    "RootM": "(kN-m)",
+    "TwrBsM": "(kN-m)",
+    "OoPDefl": "(m)",
+    "IPDefl": "(m)",
+    "TTDsp": "(m)",
+}
+
+
+def read_fields(path: str) -> tuple[dict, list[str]]:
+    """Scalar fields and OutList of an OpenFAST input file."""
+    fields = {}
+    out_list = []
+    in_out_list = False
+    for line in Path(path).read_text(errors="replace").splitlines():
+        parts = line.split()
+        if in_out_list:
+            if not parts or parts[0].upper() == "END":
+                in_out_list = False
+                continue
+            # Quoted names, possibly several per line, or one unquoted name.
+            entry = line.split(" - ")[0]
+            out_list += re.findall(r'"([^"]+)"', entry) or parts[:1]
+            continue
+        if "OutList" in parts[:2]:
+            in_out_list = True
+            continue
+        if len(parts) >= 2:
+            fields.setdefault(parts[1], parts[0].strip('"'))
+
+    return fields, [name for channels in out_list for name in channels.split(",")]
+
+
+def write_outb(path: str, channels: list[str], dt: float, n_t: int):
+    """Write a compressed binary output file without packed time (file ID 2)."""
+    # Random 16 bit integers, scaled to +-32.
+    data = os.urandom(2 * n_t * len(channels))
+    scale = [1000.0] * len(channels)
+    offset = [0.0] * len(channels)
+    description = b"Stand-in for OpenFAST"
+
+    with open(path, "wb") as file:
+        file.write(struct.pack("<hii", 2, len(channels), n_t))
+        file.write(struct.pack("<dd", 0.0, dt))
+        file.write(struct.pack(f"<{len(channels)}f", *scale))
+        file.write(struct.pack(f"<{len(channels)}f", *offset))
+        file.write(struct.pack("<i", len(description)))
+        file.write(description)
+        file.write("".join(f"{name:<10.10}" for name in ["Time"] + channels).encode())
+        file.write(
+            "".join(f"{unit(name):<10}" for name in ["Time"] + channels).encode()
+        )
+        file.write(data)
+
+
+def unit(channel: str) -> str:
+    """Unit of a channel, like OpenFAST writes it."""
+    for prefix, unit in UNITS.items():
+        if channel.startswith(prefix):
+            return unit
+
+    return "(-)"
+
+
+def main():
+    fst_path = sys.argv[1]
+    fst, _ = read_fields(fst_path)
+    t_max = float(fst["TMax"])
+    dt = float(fst["DT"])
+    dt_out = dt if fst.get("DT_Out", "default") == "default" else float(fst["DT_Out"])
+
+    channels = ["Wind1VelX"]
+    for label in ["EDFile", "ServoFile"]:
+        _, out_list = read_fields(fst[label])
+        channels += out_list
+
+    n_channels = int(os.environ.get("SIMDRIVER_STAND_IN_CHANNELS", len(channels)))
+    channels = channels[:n_channels]
+    channels += [f"Extra{i}" for i in range(n_channels - len(channels))]
+
+    sleep = float(os.environ.get("SIMDRIVER_STAND_IN_SLEEP", 0))
+    steps = 10
+    for i in range(1, steps + 1):
+        time.sleep(sleep / steps)
+        print(f" Timestep: {t_max * i / steps:10.2f} of {t_max} seconds.", flush=True)
+
+    n_t = round(t_max / dt_out) + 1
+    write_outb(str(Path(fst_path).with_suffix(".outb")), channels, dt_out, n_t)
+    print("OpenFAST terminated normally.")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,79 @@
+#!/usr/bin/env python3
+"""
+Stand-in for the TurbSim executable, used by the benchmark suite.
+
+Reads grid, time and wind speed parameters from the TurbSim input file, sleeps and
+writes a synthetic full-field wind file (.bts) of the same size and a summary file
+(.sum) with the reference wind speed where OpenFAST cases look for it.
+
+Environment variables:
+    SIMDRIVER_STAND_IN_SLEEP: Wall time of one simulation in seconds, default 0.
+"""
+
+import os
+import struct
+import sys
+import time
+from pathlib import Path
+
+
+def read_fields(path: str) -> dict:
+    """Scalar fields of a TurbSim input file."""
+    fields = {}
+    for line in Path(path).read_text(errors="replace").splitlines():
+        parts = line.split()
+        if len(parts) >= 2:
+            fields.setdefault(parts[1], parts[0].strip('"'))
+
+    return fields
+
+
+def write_bts(path: str, inp: dict):
+    """Write a full-field wind file with random turbulence around the mean wind speed."""
+    n_y = int(inp["NumGrid_Y"])
+    n_z = int(inp["NumGrid_Z"])
+    dt = float(inp["TimeStep"])
+    n_t = round(float(inp["AnalysisTime"]) / dt)
+    u_hub = float(inp["URef"])
+    z_hub = float(inp["HubHt"])
+    dy = float(inp["GridWidth"]) / (n_y - 1)
+    dz = float(inp["GridHeight"]) / (n_z - 1)
+
+    # Random 16 bit integers for all components and grid points of each time step.
+    data = os.urandom(2 * 3 * n_y * n_z * n_t)
+    slope = [10000.0, 10000.0, 10000.0]
+    offset = [-10000.0 * u_hub, 0.0, 0.0]
+    description = b"Stand-in for TurbSim"
+
+    with open(path, "wb") as file:
+        file.write(struct.pack("<h4i", 7, n_z, n_y, 0, n_t))
+        z_bottom = z_hub - float(inp["GridHeight"]) / 2
+        file.write(struct.pack("<6f", dz, dy, dt, u_hub, z_hub, z_bottom))
+        file.write(
+            struct.pack(
+                "<6f", slope[0], offset[0], slope[1], offset[1], slope[2], offset[2]
+            )
+        )
+        file.write(struct.pack("<i", len(description)))
+        file.write(description)
+        file.write(data)
+
+
+def main():
+    inp_path = sys.argv[1]
+    inp = read_fields(inp_path)
+
+    time.sleep(float(os.environ.get("SIMDRIVER_STAND_IN_SLEEP", 0)))
+
+    write_bts(str(Path(inp_path).with_suffix(".bts")), inp)
+
+    # Reference wind speed on line 44, like the TurbSim summary file.
+    summary = ["Stand-in for TurbSim"] * 43
+    summary.append(f"{float(inp['URef']):.3f} Reference wind speed [m/s]")
+    Path(inp_path).with_suffix(".sum").write_text("\n".join(summary) + "\n")
+
+    print("TurbSim terminated normally.")
+
+
+if __name__ == "__main__":
+    main()
@@ -1,3 +1,8 @@
 from simdriver.run_turbsim import run_turbsim
 from simdriver.run_fast import run_fast
 from simdriver.initial_state import initial_state
+from simdriver.pipeline import run_pipeline
+from simdriver.results import load_results
+from simdriver.session import Session
+from simdriver.case_matrix import CaseMatrix
+from simdriver.analysis import lifetime_del
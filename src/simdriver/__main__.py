@@ -0,0 +1,3 @@
+from simdriver.cli import main
+
+main()
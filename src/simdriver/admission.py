@@ -0,0 +1,158 @@
+import ctypes
+import os
+import sys
+from pathlib import Path
+
+# Memory model of the solvers, in MB and bytes per value. The footprint of the
+# solvers is dominated by a few large arrays, the factors include work arrays and
+# padding of these arrays and are conservative.
+# TurbSim: three velocity components for all grid points and time steps.
+TURBSIM_BASE_MEMORY = 30
+TURBSIM_BYTES_PER_VALUE = 16
+# Built-in generator: Python with NumPy, one batch of coherence matrices and the
+# complex Fourier coefficients, phases and velocities of all grid points.
+BUILTIN_BASE_MEMORY = 400
+BUILTIN_BYTES_PER_VALUE = 80
+# OpenFAST: model, binary output buffered for the whole simulation and full-field
+# wind files, which are held in single precision (twice their size on disk).
+FAST_BASE_MEMORY = 200
+FAST_BYTES_PER_OUTPUT_VALUE = 8
+FAST_WIND_FILE_FACTOR = 2
+
+# Fraction of available memory used by the automatic memory budget.
+AUTO_BUDGET_FRACTION = 0.9
+
+
+def turbsim_memory(
+    grid_points_horizontal: int,
+    grid_points_vertical: int,
+    time_span: float,
+    time_step: float,
+    generator: str = "turbsim",
+) -> float:
+    """Estimated peak memory of a TurbSim or built-in generator process in MB."""
+    values = 3 * grid_points_horizontal * grid_points_vertical * time_span / time_step
+    if generator == "builtin":
+        return BUILTIN_BASE_MEMORY + values * BUILTIN_BYTES_PER_VALUE / 1024**2
+    return TURBSIM_BASE_MEMORY + values * TURBSIM_BYTES_PER_VALUE / 1024**2
+
+
+def fast_memory(
+    channels: int, time_span: float, output_time_step: float, wind_files: list[str] = []
+) -> float:
+    """Estimated peak memory of an OpenFAST process in MB."""
+    output = channels * (time_span / output_time_step + 1)
+    wind = sum(Path(file).stat().st_size for file in wind_files if Path(file).exists())
+    return (
+        FAST_BASE_MEMORY
+        + output * FAST_BYTES_PER_OUTPUT_VALUE / 1024**2
+        + wind * FAST_WIND_FILE_FACTOR / 1024**2
+    )
+
+
+def available_memory() -> float | None:
+    """Physical memory available to new processes in MB, None if unknown."""
+    # Linux, includes reclaimable page cache.
+    try:
+        for line in Path("/proc/meminfo").read_text().splitlines():
+            if line.startswith("MemAvailable:"):
+                return int(line.split()[1]) / 1024
+    except OSError:
+        pass
+
+    # Windows.
+    if sys.platform == "win32":
+
+        class MemoryStatus(ctypes.Structure):
+            _fields_ = [
+                ("dwLength", ctypes.c_ulong),
+                ("dwMemoryLoad", ctypes.c_ulong),
+                ("ullTotalPhys", ctypes.c_ulonglong),
+                ("ullAvailPhys", ctypes.c_ulonglong),
+                ("ullTotalPageFile", ctypes.c_ulonglong),
+                ("ullAvailPageFile", ctypes.c_ulonglong),
+                ("ullTotalVirtual", ctypes.c_ulonglong),
+                ("ullAvailVirtual", ctypes.c_ulonglong),
+                ("sullAvailExtendedVirtual", ctypes.c_ulonglong),
+            ]
+
+        status = MemoryStatus()
+        status.dwLength = ctypes.sizeof(MemoryStatus)
+        if ctypes.windll.kernel32.GlobalMemoryStatusEx(ctypes.byref(status)):
+            return status.ullAvailPhys / 1024**2
+        return None
+
+    # Other POSIX systems, free memory only.
+    try:
+        return os.sysconf("SC_AVPHYS_PAGES") * os.sysconf("SC_PAGE_SIZE") / 1024**2
+    except (AttributeError, ValueError, OSError):
+        return None
+
+
+def memory_budget(budget: float | str | None) -> float | None:
+    """
+    Memory budget in MB from the `memory_budget` argument of the run functions.
+
+    Args:
+        budget: Budget in GB, 'auto' for 90 % of the currently available memory or
+                None for no budget.
+    """
+    if budget is None:
+        return None
+    if budget == "auto":
+        available = available_memory()
+        if available is None:
+            print("warning: available memory unknown, no memory budget applied.\n")
+            return None
+        return AUTO_BUDGET_FRACTION * available
+    if isinstance(budget, str):
+        raise ValueError("Unknown memory_budget. Use a number in GB, 'auto' or None.")
+
+    return budget * 1024
+
+
+def cpu_sets() -> list[set[int]] | None:
+    """
+    CPUs of each physical core available to this process, None if unknown.
+
+    Hyperthreads of a core form one set. Cores are ordered round robin over the NUMA
+    nodes, so processes pinned to the first cores are spread over all memory
+    controllers. Only supported on Linux.
+    """
+    if not hasattr(os, "sched_getaffinity"):
+        return None
+
+    cores = {}
+    for cpu in sorted(os.sched_getaffinity(0)):
+        cpu_dir = Path(f"/sys/devices/system/cpu/cpu{cpu}")
+        try:
+            package = (cpu_dir / "topology/physical_package_id").read_text().strip()
+            core = (cpu_dir / "topology/core_id").read_text().strip()
+        except OSError:
+            package, core = "", str(cpu)
+        nodes = [entry.name for entry in cpu_dir.glob("node*")]
+        node = nodes[0] if nodes else ""
+        cores.setdefault((node, package, core), set()).add(cpu)
+
+    # Interleave the cores of all NUMA nodes.
+    by_node = {}
+    for (node, _, _), cpus in cores.items():
+        by_node.setdefault(node, []).append(cpus)
+    ordered = []
+    for i in range(max(len(node_cores) for node_cores in by_node.values())):
+        for node_cores in by_node.values():
+            if i < len(node_cores):
+                ordered.append(node_cores[i])
+
+    return ordered
+
+
+def scheduler_options(budget: float | str | None, cpu_affinity: bool) -> dict:
+    """Admission options of `run_jobs` from the arguments of the run functions."""
+    sets = None
+    if cpu_affinity:
+        sets = cpu_sets()
+        if sets is None:
+            print("warning: CPU affinity not supported on this platform.\n")
+
+    return {"memory_budget": memory_budget(budget), "cpu_sets": sets}
@@ -0,0 +1,295 @@
+import math
+import re
+from pathlib import Path
+
+import numpy as np
+import polars as pl
+
+# Campaign summary table and directory of the spectra in the output directory.
+SUMMARY = "simdriver_summary.parquet"
+PSD_DIR = "psd"
+
+# Default analysis options of `run_fast`.
+#   channels: Regular expression of the analyzed channels, after renaming.
+#   statistics: Statistics of each channel, see `STATISTICS`.
+#   wohler_exponents: Wöhler exponent of the damage-equivalent loads by channel name
+#                     prefix, the longest matching prefix applies.
+#   del_frequency: Frequency of the damage-equivalent load cycles in Hz.
+#   start_time: Output before this time in seconds is discarded as transient.
+#   psd_segment: Segment length of the power spectral densities in seconds, default
+#                is no spectra. Spectra are written to 'psd/<case>.parquet'.
+DEFAULT_ANALYSIS = {
+    "channels": r"M_b\d_[ef]|M_tower_.*",
+    "statistics": ["mean", "std", "min", "max"],
+    "wohler_exponents": {"M_b": 10, "M_tower": 4},
+    "del_frequency": 1.0,
+    "start_time": 0.0,
+    "psd_segment": None,
+}
+
+# Statistics of channel arrays of shape (channels, time steps).
+STATISTICS = {
+    "mean": lambda x: x.mean(axis=1),
+    "std": lambda x: x.std(axis=1),
+    "min": lambda x: x.min(axis=1),
+    "max": lambda x: x.max(axis=1),
+    "abs_max": lambda x: np.abs(x).max(axis=1),
+    "skewness": lambda x: _moment(x, 3),
+    "kurtosis": lambda x: _moment(x, 4),
+}
+
+
+def analysis_options(analysis: bool | dict) -> dict | None:
+    """
+    Resolve analysis options.
+
+    Args:
+        analysis: True for `DEFAULT_ANALYSIS`, a dictionary of options that override
+                  the defaults, or False for no analysis.
+
+    Returns:
+        Dictionary with all analysis options, None if disabled.
+    """
+    if analysis is False:
+        return None
+    if analysis is True:
+        analysis = {}
+
+    unknown = set(analysis) - set(DEFAULT_ANALYSIS)
+    if unknown:
+        raise ValueError(f"Unknown analysis options: {sorted(unknown)}.")
+
+    unknown = set(analysis.get("statistics", [])) - set(STATISTICS)
+    if unknown:
+        raise ValueError(f"Unknown statistics: {sorted(unknown)}.")
+
+    return DEFAULT_ANALYSIS | analysis
+
+
+def turning_points(x: np.ndarray) -> np.ndarray:
+    """Local extrema of a time series, including its first and last value."""
+    x = x[np.r_[True, np.diff(x) != 0]]
+    if len(x) < 3:
+        return x
+
+    slope = np.sign(np.diff(x))
+    reversals = np.nonzero(slope[1:] != slope[:-1])[0] + 1
+    return x[np.r_[0, reversals, len(x) - 1]]
+
+
+def rainflow(x: np.ndarray) -> tuple[np.ndarray, np.ndarray, np.ndarray]:
+    """
+    Rainflow counting of a time series with the four-point method.
+
+    Each pass extracts all closed cycles of the turning point sequence at once, a
+    cycle is closed where the range of two neighbouring points is not larger than
+    the ranges to the points before and after them. Neighbouring closed cycles
+    overlap, every second one of a run is extracted. The residue is counted as half
+    cycles, like in ASTM E1049.
+
+    Args:
+        x: Time series.
+
+    Returns:
+        Ranges, means and counts (1 or 0.5) of all cycles.
+    """
+    points = turning_points(np.asarray(x, dtype=np.float64))
+    ranges, means = [], []
+    while len(points) >= 4:
+        r = np.abs(np.diff(points))
+        closed = np.nonzero((r[1:-1] <= r[:-2]) & (r[1:-1] <= r[2:]))[0]
+        if len(closed) == 0:
+            break
+
+        # Position of each closed cycle within its run of neighbouring closed cycles.
+        run_start = np.r_[True, np.diff(closed) > 1]
+        position = np.arange(len(closed))
+        position -= np.maximum.accumulate(np.where(run_start, position, 0))
+        closed = closed[position % 2 == 0]
+
+        ranges.append(r[closed + 1])
+        means.append((points[closed + 1] + points[closed + 2]) / 2)
+        keep = np.ones(len(points), dtype=bool)
+        keep[closed + 1] = False
+        keep[closed + 2] = False
+        points = points[keep]
+
+    n_full = sum(len(r) for r in ranges)
+    ranges.append(np.abs(np.diff(points)))
+    means.append((points[:-1] + points[1:]) / 2)
+    ranges = np.concatenate(ranges)
+    counts = np.ones(len(ranges))
+    counts[n_full:] = 0.5
+
+    return ranges, np.concatenate(means), counts
+
+
+def damage_equivalent_load(
+    x: np.ndarray, wohler_exponent: float, equivalent_cycles: float
+) -> float:
+    """Damage-equivalent load range of a time series for `equivalent_cycles` cycles."""
+    ranges, _, counts = rainflow(x)
+    damage = np.sum(counts * ranges**wohler_exponent)
+    return float((damage / equivalent_cycles) ** (1 / wohler_exponent))
+
+
+def power_spectral_density(
+    x: np.ndarray, time_step: float, segment: int
+) -> tuple[np.ndarray, np.ndarray]:
+    """
+    One-sided power spectral densities with Welch's method, Hann window, 50 % overlap.
+
+    Args:
+        x: Time series of shape (channels, time steps).
+        time_step: Time step in seconds.
+        segment: Segment length in time steps.
+
+    Returns:
+        Frequencies and spectra of shape (channels, frequencies).
+    """
+    segment = min(segment, x.shape[1])
+    segments = np.lib.stride_tricks.sliding_window_view(x, segment, axis=1)
+    segments = segments[:, :: max(segment // 2, 1)]
+    segments = segments - segments.mean(axis=2, keepdims=True)
+
+    window = np.hanning(segment)
+    spectra = np.abs(np.fft.rfft(segments * window, axis=2)) ** 2
+    spectra = spectra.mean(axis=1) * time_step / np.sum(window**2)
+    spectra[:, 1 : (segment + 1) // 2] *= 2
+
+    return np.fft.rfftfreq(segment, time_step), spectra
+
+
+def wohler_exponent(channel: str, wohler_exponents: dict[str, float]) -> float:
+    """Wöhler exponent of a channel, by the longest matching prefix."""
+    prefixes = [prefix for prefix in wohler_exponents if channel.startswith(prefix)]
+    if not prefixes:
+        raise ValueError(f"No Wöhler exponent for channel {channel}.")
+
+    return wohler_exponents[max(prefixes, key=len)]
+
+
+def analyze(
+    data: dict[str, np.ndarray], options: dict, psd_path: str | Path | None = None
+) -> dict:
+    """
+    Statistics and damage-equivalent loads of the output channels of one case.
+
+    Args:
+        data: Output channels by name, including 'time', as returned by `read_outb`.
+        options: Analysis options, see `analysis_options`.
+        psd_path: Path to write the power spectral densities to, if enabled.
+
+    Returns:
+        Summary row with '<channel>_<statistic>' and '<channel>_del' columns.
+    """
+    time = np.asarray(data["time"], dtype=np.float64)
+    analyzed = time >= options["start_time"]
+    channels = [
+        channel for channel in data if re.fullmatch(options["channels"], channel)
+    ]
+    if not channels or analyzed.sum() < 2:
+        return {}
+
+    x = np.stack([np.asarray(data[channel])[analyzed] for channel in channels])
+    x = x.astype(np.float64)
+    time_step = float(time[1] - time[0])
+    duration = time_step * x.shape[1]
+
+    row = {"analyzed_time": duration}
+    statistics = {name: STATISTICS[name](x) for name in options["statistics"]}
+    for i, channel in enumerate(channels):
+        for name, values in statistics.items():
+            row[f"{channel}_{name}"] = float(values[i])
+        row[f"{channel}_del"] = damage_equivalent_load(
+            x[i],
+            wohler_exponent(channel, options["wohler_exponents"]),
+            options["del_frequency"] * duration,
+        )
+
+    if options["psd_segment"] is not None and psd_path is not None:
+        segment = round(options["psd_segment"] / time_step)
+        frequency, spectra = power_spectral_density(x, time_step, segment)
+        Path(psd_path).parent.mkdir(parents=True, exist_ok=True)
+        pl.DataFrame(
+            {"frequency": frequency} | dict(zip(channels, spectra))
+        ).write_parquet(psd_path)
+
+    return row
+
+
+def lifetime_del(
+    summary: str | pl.DataFrame,
+    mean_wind_speed: float = 10,
+    weibull_shape: float = 2,
+    bin_width: float = 2,
+    wohler_exponents: dict[str, float] = DEFAULT_ANALYSIS["wohler_exponents"],
+) -> pl.DataFrame:
+    """
+    Lifetime damage-equivalent loads from the summary table of a campaign.
+
+    Cases are binned by wind speed, the damage of each bin is the mean damage of its
+    cases weighted with the probability of the bin under a Weibull distribution. The
+    probability of wind speeds outside the simulated bins is not counted. The loads
+    refer to the same cycle frequency as the loads of the summary.
+
+    Args:
+        summary: Relative path to the output directory of `run_fast`, or the summary
+                 table.
+        mean_wind_speed: Annual mean wind speed at hub height in m/s.
+        weibull_shape: Shape parameter of the Weibull distribution, 2 is the Rayleigh
+                       distribution of IEC 61400-1.
+        bin_width: Width of the wind speed bins in m/s, bins are centered on multiples
+                   of the width.
+        wohler_exponents: Wöhler exponents by channel name prefix, must match the ones
+                          of the analysis.
+
+    Returns:
+        Table with the channel, its Wöhler exponent and lifetime damage-equivalent load.
+    """
+    if isinstance(summary, str):
+        summary = pl.read_parquet(Path(summary) / SUMMARY)
+
+    scale = mean_wind_speed / math.gamma(1 + 1 / weibull_shape)
+    summary = summary.filter(pl.col("wind_speed").is_not_null()).with_columns(
+        (pl.col("wind_speed") / bin_width).round() * bin_width
+    )
+    low = (pl.col("wind_speed") - bin_width / 2).clip(0, None)
+    high = pl.col("wind_speed") + bin_width / 2
+    probability = (-((low / scale) ** weibull_shape)).exp() - (
+        -((high / scale) ** weibull_shape)
+    ).exp()
+
+    rows = []
+    for column in summary.columns:
+        if not column.endswith("_del"):
+            continue
+        channel = column.removesuffix("_del")
+        m = wohler_exponent(channel, wohler_exponents)
+        damage = (
+            summary.group_by("wind_speed")
+            .agg((pl.col(column) ** m).mean().alias("damage"))
+            .select((pl.col("damage") * probability).sum())
+            .item()
+        )
+        rows.append(
+            {
+                "channel": channel,
+                "wohler_exponent": m,
+                "lifetime_del": damage ** (1 / m),
+            }
+        )
+
+    return pl.DataFrame(rows)
+
+
+def _moment(x: np.ndarray, order: int) -> np.ndarray:
+    """Standardized central moment along the time axis."""
+    deviation = x - x.mean(axis=1, keepdims=True)
+    std = x.std(axis=1)
+    return np.divide(
+        (deviation**order).mean(axis=1),
+        std**order,
+        out=np.zeros(len(x)),
+        where=std > 0,
+    )
@@ -0,0 +1,143 @@
+import hashlib
+import os
+import uuid
+from pathlib import Path
+from shutil import copy2, rmtree
+
+# Digests of files already hashed in this process, keyed by path, size and mtime.
+_digests = {}
+
+
+def file_digest(path: str | Path) -> str:
+    """SHA-256 digest of a file's content, memoized while the file is unchanged."""
+    path = Path(path).resolve()
+    stat = path.stat()
+    memo_key = (str(path), stat.st_size, stat.st_mtime_ns)
+    if memo_key not in _digests:
+        digest = hashlib.sha256()
+        with open(path, "rb") as file:
+            for chunk in iter(lambda: file.read(1 << 20), b""):
+                digest.update(chunk)
+        _digests[memo_key] = digest.hexdigest()
+
+    return _digests[memo_key]
+
+
+def dir_digest(path: str | Path, exclude: tuple[str, ...] = ()) -> str:
+    """
+    Digest of all file names and contents in a directory tree, following links.
+
+    Files whose path relative to the directory is in `exclude` are left out.
+    """
+    files = []
+    for root, _, names in os.walk(path, followlinks=True):
+        for name in names:
+            file = Path(root) / name
+            rel = file.relative_to(path).as_posix()
+            if rel not in exclude:
+                files.append((rel, file))
+
+    digest = hashlib.sha256()
+    for rel, file in sorted(files):
+        digest.update(f"{rel}\0{file_digest(file)}\0".encode())
+
+    return digest.hexdigest()
+
+
+def hash_parts(*parts: str | bytes) -> str:
+    """Digest of an ordered sequence of strings or bytes."""
+    digest = hashlib.sha256()
+    for part in parts:
+        if isinstance(part, str):
+            part = part.encode()
+        digest.update(len(part).to_bytes(8, "little"))
+        digest.update(part)
+
+    return digest.hexdigest()
+
+
+def link_or_copy(src: str | Path, dst: str | Path):
+    """Hard link `src` to `dst`, copy if linking is not possible."""
+    try:
+        os.remove(dst)
+    except FileNotFoundError:
+        pass
+
+    try:
+        os.link(src, dst)
+    except OSError:
+        copy2(src, dst)
+
+
+class FileCache:
+    """
+    Content-addressed file store with least recently used eviction.
+
+    Every entry is a directory named after its key, holding files named by their
+    role (e.g. '.parquet'). Entries are served and stored through hard links where
+    possible, the modification time of an entry records its last use.
+
+    Args:
+        cache_dir: Path to cache directory.
+        size_limit: Maximum size of the cache in GB, default is unlimited.
+    """
+
+    def __init__(self, cache_dir: str | Path, size_limit: float | None = None):
+        self.cache_dir = Path(cache_dir)
+        self.size_limit = size_limit
+        self.cache_dir.mkdir(parents=True, exist_ok=True)
+
+    def fetch(self, key: str, files: dict[str, str | Path]) -> bool:
+        """Link cached files to the paths in `files`, return False on a cache miss."""
+        entry = self.cache_dir / key
+        if not all((entry / role).is_file() for role in files):
+            return False
+
+        for role, path in files.items():
+            link_or_copy(entry / role, path)
+
+        # Mark entry as recently used.
+        os.utime(entry)
+
+        return True
+
+    def store(self, key: str, files: dict[str, str | Path]):
+        """Add files to the cache, then evict old entries if the cache is too large."""
+        entry = self.cache_dir / key
+        if entry.exists():
+            os.utime(entry)
+            return
+
+        # Assemble entry in a temporary directory so readers never see partial entries.
+        temp = self.cache_dir / f"tmp-{uuid.uuid4().hex}"
+        temp.mkdir()
+        for role, path in files.items():
+            link_or_copy(path, temp / role)
+
+        try:
+            temp.rename(entry)
+        except OSError:
+            # Another process stored the same entry in the meantime.
+            rmtree(temp, ignore_errors=True)
+
+        self.evict()
+
+    def evict(self):
+        """Remove least recently used entries until the cache fits the size limit."""
+        if self.size_limit is None:
+            return
+
+        entries = []
+        total = 0
+        for entry in self.cache_dir.iterdir():
+            if not entry.is_dir() or entry.name.startswith("tmp-"):
+                continue
+            size = sum(f.stat().st_size for f in entry.iterdir() if f.is_file())
+            entries.append((entry.stat().st_mtime, size, entry))
+            total += size
+
+        for _, size, entry in sorted(entries):
+            if total <= self.size_limit * 1e9:
+                break
+            rmtree(entry, ignore_errors=True)
+            total -= size
@@ -0,0 +1,96 @@
+import math
+from collections.abc import Iterator
+from itertools import product
+
+# Input files whose fields can be swept, as prefix of the field label.
+MODULES = ["fst", "elastodyn", "servodyn", "inflow"]
+
+# Wind parameters of a case, one of them is required.
+WIND_FIELDS = ["wind_speed", "wind_file"]
+
+
+class CaseMatrix:
+    """
+    Load case matrix of Cartesian and zipped sweeps, enumerated lazily.
+
+    Fields are wind parameters ('wind_speed' for steady wind or 'wind_file' for a
+    .bts, .wnd or .hh file) or input file fields labeled '<file>.<label>', where
+    <file> is 'fst', 'elastodyn', 'servodyn' or 'inflow', e.g. 'elastodyn.NacYaw' or
+    'servodyn.DLL_InFile'. Each `product` sweep is combined with all other sweeps,
+    the fields of a `zip` sweep vary together. Only the value lists are stored,
+    cases are generated one by one while the campaign runs, so even very large
+    matrices start immediately and use constant memory.
+
+    Example:
+        matrix = (
+            CaseMatrix("yaw")
+            .product(wind_speed=[6, 10, 14])
+            .product({"elastodyn.NacYaw": [-8, 0, 8]})
+            .zip({"fst.DT": [0.01, 0.005], "fst.DT_Out": [0.05, 0.025]})
+        )
+        run_fast("output", "model/NREL_5MW.fst", case_matrix=matrix)
+
+    Args:
+        name: Prefix of the case names, cases are numbered in order, e.g. 'yaw_07'.
+    """
+
+    def __init__(self, name: str = "case"):
+        self.name = name
+        self.sweeps = []
+
+    def product(
+        self, fields: dict[str, list] | None = None, **kwargs: list
+    ) -> "CaseMatrix":
+        """Add fields that are swept independently, return the matrix."""
+        for label, values in ((fields or {}) | kwargs).items():
+            self.add_sweep([label], [(value,) for value in values])
+
+        return self
+
+    def zip(
+        self, fields: dict[str, list] | None = None, **kwargs: list
+    ) -> "CaseMatrix":
+        """Add fields that are swept together, the n-th values form one case."""
+        fields = (fields or {}) | kwargs
+        if len({len(values) for values in fields.values()}) > 1:
+            raise ValueError("Zipped fields need the same number of values.")
+        self.add_sweep(list(fields), list(zip(*fields.values())))
+
+        return self
+
+    def add_sweep(self, labels: list[str], values: list[tuple]):
+        for label in labels:
+            if label in self.fields():
+                raise ValueError(f"Field {label} is swept twice.")
+            if label not in WIND_FIELDS and label.split(".")[0] not in MODULES:
+                raise ValueError(
+                    f"Unknown field {label}. Use {' or '.join(WIND_FIELDS)} or "
+                    f"'<file>.<label>' with <file> one of {', '.join(MODULES)}."
+                )
+        self.sweeps.append((labels, values))
+
+    def fields(self) -> list[str]:
+        """Labels of all swept fields."""
+        return [label for labels, _ in self.sweeps for label in labels]
+
+    def __len__(self) -> int:
+        return math.prod(len(values) for _, values in self.sweeps)
+
+    def __iter__(self) -> Iterator[tuple[str, dict]]:
+        """Yield name and field values of each case."""
+        digits = len(str(max(len(self) - 1, 0)))
+        labels = self.fields()
+        for i, combination in enumerate(product(*(v for _, v in self.sweeps))):
+            values = [value for group in combination for value in group]
+            yield f"{self.name}_{i:0{digits}d}", dict(zip(labels, values))
+
+
+def input_fields(case: dict) -> dict[str, dict]:
+    """Split the field values of a case by input file, e.g. {'elastodyn': {...}}."""
+    fields = {module: {} for module in MODULES}
+    for label, value in case.items():
+        if label not in WIND_FIELDS:
+            module, field = label.split(".", 1)
+            fields[module][field] = value
+
+    return fields
@@ -0,0 +1,52 @@
+import argparse
+
+from .work_queue import run_worker
+
+
+def main(argv: list[str] | None = None):
+    """Command line interface of simdriver."""
+    parser = argparse.ArgumentParser(prog="simdriver")
+    commands = parser.add_subparsers(dest="command", required=True)
+
+    worker = commands.add_parser(
+        "worker", help="Run queued OpenFAST and TurbSim cases from a work queue."
+    )
+    worker.add_argument("queue_dir", help="Path to the queue directory.")
+    worker.add_argument(
+        "--max-processes",
+        type=int,
+        default=None,
+        help="Maximum number of parallel processes, default is the number of CPUs.",
+    )
+    worker.add_argument(
+        "--lease-timeout",
+        type=float,
+        default=120,
+        help="Seconds after which tasks of unresponsive workers are requeued.",
+    )
+    worker.add_argument(
+        "--poll-interval",
+        type=float,
+        default=1,
+        help="Seconds between checks for new and finished tasks.",
+    )
+    worker.add_argument(
+        "--idle-timeout",
+        type=float,
+        default=None,
+        help="Exit after the queue was empty for this many seconds.",
+    )
+    worker.add_argument(
+        "--verbose", action="store_true", help="Print stdout and stderr of processes."
+    )
+
+    args = parser.parse_args(argv)
+    if args.command == "worker":
+        run_worker(
+            args.queue_dir,
+            max_processes=args.max_processes,
+            lease_timeout=args.lease_timeout,
+            poll_interval=args.poll_interval,
+            idle_timeout=args.idle_timeout,
+            verbose=args.verbose,
+        )
@@ -0,0 +1,202 @@
+import re
+import time
+from pathlib import Path
+
+import numpy as np
+
+# Default health guards of `run_fast`.
+#   nan: Abort cases with NaN or infinite channel values, including values OpenFAST
+#        cannot print.
+#   limits: Lower and upper limit by channel name, after renaming, e.g.
+#           {"rot_speed": [None, 15], "M_tower_fa": [-1e5, 1e5]}, None is unlimited.
+#   messages: Regular expressions of OpenFAST messages that abort a case, e.g.
+#             "Small angle assumption violated".
+#   checks: Callables receiving the new rows of the channel output as dictionary of
+#           arrays by channel name, returning the reason to abort the case or None.
+#   start_time: Channel guards ignore output before this time in seconds.
+#   interval: Time in seconds between reads of the output of a running case.
+DEFAULT_HEALTH = {
+    "nan": True,
+    "limits": {},
+    "messages": [],
+    "checks": [],
+    "start_time": 0.0,
+    "interval": 1.0,
+}
+
+
+def health_options(health: bool | dict) -> dict | None:
+    """
+    Resolve health guard options.
+
+    Args:
+        health: True for `DEFAULT_HEALTH`, a dictionary of options that override the
+                defaults, or False for no guards.
+
+    Returns:
+        Dictionary with all health options, None if disabled.
+    """
+    if health is False:
+        return None
+    if health is True:
+        health = {}
+
+    unknown = set(health) - set(DEFAULT_HEALTH)
+    if unknown:
+        raise ValueError(f"Unknown health options: {sorted(unknown)}.")
+
+    for channel, limits in health.get("limits", {}).items():
+        if len(limits) != 2:
+            raise ValueError(f"Limits of {channel} need a lower and an upper value.")
+
+    return DEFAULT_HEALTH | health
+
+
+def channel_guards(options: dict) -> bool:
+    """Check if any guard needs the channel output of the cases."""
+    return bool(options["nan"] or options["limits"] or options["checks"])
+
+
+class HealthGuard:
+    """
+    Health checks of one running OpenFAST case.
+
+    OpenFAST writes its binary output only at the end of a simulation, so channels are
+    read from the text output (.out), which is written as the simulation advances.
+    The stdout of the case is searched for the abort messages. Both files are read
+    incrementally, only complete new lines are parsed. The guard is called by the
+    scheduler while the case runs and returns the reason to abort it.
+
+    Args:
+        options: Health options, see `health_options`.
+        channel_output: Path to the text output of the case, None to check messages
+                        only.
+        rename: Mapping from channel names with units ('RotSpeed_[rpm]') to new names.
+    """
+
+    def __init__(
+        self,
+        options: dict,
+        channel_output: str | Path | None = None,
+        rename: dict = {},
+    ):
+        self.options = options
+        self.channel_output = channel_output
+        self.rename = rename
+        self.messages = [
+            re.compile(pattern.encode()) for pattern in options["messages"]
+        ]
+        self.last_check = 0.0
+        self.offsets = {}
+        self.buffers = {}
+        self.names = None
+        self.header = None
+
+    def __call__(self, job) -> str | None:
+        """Read new output of a running job, return the reason to abort it or None."""
+        now = time.time()
+        if now - self.last_check < self.options["interval"]:
+            return None
+        self.last_check = now
+
+        if self.messages:
+            reason = self.check_messages(self.new_lines(job.stdout))
+            if reason is not None:
+                return reason
+
+        if self.channel_output is not None:
+            return self.check_channels(self.new_lines(self.channel_output))
+
+        return None
+
+    def new_lines(self, path: str | Path) -> list[bytes]:
+        """Complete lines appended to a file since the last read."""
+        offset = self.offsets.get(path, 0)
+        try:
+            with open(path, "rb") as file:
+                file.seek(offset)
+                chunk = file.read()
+        except OSError:
+            return []
+
+        self.offsets[path] = offset + len(chunk)
+
+        # Keep the incomplete last line for the next read.
+        lines = (self.buffers.get(path, b"") + chunk).split(b"\n")
+        self.buffers[path] = lines.pop()
+        return lines
+
+    def check_messages(self, lines: list[bytes]) -> str | None:
+        """Search stdout lines for abort messages."""
+        for line in lines:
+            for pattern in self.messages:
+                if pattern.search(line):
+                    return f"OpenFAST message '{line.strip().decode(errors='replace')}'"
+
+        return None
+
+    def check_channels(self, lines: list[bytes]) -> str | None:
+        """Parse new rows of the text output and check them against the guards."""
+        rows = []
+        for line in lines:
+            parts = line.split()
+            if self.header is not None:
+                if len(parts) == len(self.header):
+                    rows.append([_number(part) for part in parts])
+            elif self.names is not None:
+                # Units follow the channel names, like '(rpm)'.
+                units = [part.decode()[1:-1].replace("sec", "s") for part in parts]
+                self.header = [
+                    self.rename.get(f"{name}_[{unit}]", f"{name}_[{unit}]")
+                    for name, unit in zip(self.names, units)
+                ]
+            elif parts and parts[0] == b"Time":
+                self.names = [part.decode() for part in parts]
+
+        if not rows:
+            return None
+
+        values = np.array(rows)
+        values = values[values[:, 0] >= self.options["start_time"]]
+        if len(values) == 0:
+            return None
+        data = dict(zip(self.header, values.T))
+        t = values[:, 0]
+
+        if self.options["nan"]:
+            invalid = ~np.isfinite(values)
+            if invalid.any():
+                row, column = np.argwhere(invalid)[0]
+                return f"{self.header[column]} is not finite at {t[row]:.3f} s"
+
+        for channel, (low, high) in self.options["limits"].items():
+            if channel not in data:
+                return f"no channel {channel} in output for limits"
+            x = data[channel]
+            violated = np.zeros(len(x), dtype=bool)
+            if low is not None:
+                violated |= x < low
+            if high is not None:
+                violated |= x > high
+            if violated.any():
+                row = np.argmax(violated)
+                return (
+                    f"{channel} = {x[row]:.6g} outside limits [{low}, {high}] at "
+                    f"{t[row]:.3f} s"
+                )
+
+        for check in self.options["checks"]:
+            reason = check(data)
+            if reason is not None:
+                return reason
+
+        return None
+
+
+def _number(token: bytes) -> float:
+    """Value of a text output field, NaN for fields OpenFAST could not format."""
+    try:
+        return float(token)
+    except ValueError:
+        # Fortran prints asterisks for values that do not fit the field.
+        return np.nan
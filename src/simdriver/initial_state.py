@@ -1,14 +1,16 @@
 from pathlib import Path
 import os
-import contextlib
-import pandas as pd
+from collections.abc import Callable
 import numpy as np
-from shutil import rmtree
+from shutil import copytree, rmtree
 import polars as pl
 from polars import col
-from weio.fast_wind_file import FASTWndFile
+from weio import FASTInputFile
 
-from . import run_fast
+from . import run_fast, wind_events
+
+# Initial turbine states written to the model directory by default.
+INITIAL_STATE_FILE = "simdriver_initial_state.csv"
 
 
 def initial_state(
@@ -27,6 +29,12 @@ def initial_state(
     analyzed_fraction: float = 0.25,
     wind_time_step: float = 0.1,
     retain_temp_files: bool = False,
+    mode: str = "step",
+    max_processes: int = 20,
+    trim: bool = False,
+    rated_wind_speed: float | None = None,
+    rated_rot_speed: float | None = None,
+    hooks: list[Callable[[dict], None]] = [],
 ):
     """
     Run OpenFAST to find initial turbine state for different wind speeds.
@@ -45,87 +53,134 @@ def initial_state(
         time_at_speed: Time to stay at the wind speed step in seconds.
         analyzed_fraction: Fraction of the time at speed to analyze for the initial state.
         wind_time_step: Wind speed time step in seconds.
+        retain_temp_files: Keep simulation files in 'simdriver_temp'.
+        mode: 'step' simulates all wind speeds in one run with a step wind, 'parallel'
+              simulates each wind speed as an independent steady run in parallel, each
+              with a startup time and a time at speed.
+        max_processes: Maximum number of parallel processes in parallel mode.
+        trim: Use the steady-state calculation of OpenFAST (CalcSteady) in parallel mode
+              to trim the pitch angle at rated rotor speed for wind speeds above rated.
+              Requires a model that supports linearization.
+        rated_wind_speed: Rated wind speed in m/s, required for trimming.
+        rated_rot_speed: Rated rotor speed in rpm, required for trimming.
+        hooks: Callables receiving the timing and resource records of the simulations,
+               see `simdriver.run_fast.run_fast`.
     """
     # Path to model directory.
     model_dir = Path(input_file).parent
 
+    # Clean up in case previous runs were aborted.
+    try:
+        rmtree("simdriver_temp")
+    except Exception:
+        pass
+
+    os.mkdir("simdriver_temp")
+
     wind_steps = np.arange(min_speed, max_speed + step_size, step_size)
-    time = [0]
-    speed = [0]
-    windows = []
-    startup = True
-    for wind_step in wind_steps:
-        v_0 = speed[-1]
-        v = speed[-1]
-        t = time[-1]
-
-        # Startup.
-        if startup:
-            windows.append(
-                {
-                    "v0": wind_step,
-                    "start": startup_time + time_at_speed * (1 - analyzed_fraction),
-                    "end": startup_time + time_at_speed,
-                }
-            )
+    if mode == "step":
+        initial_states = _step_wind_states(
+            input_file,
+            openfast_time_step,
+            fast_version,
+            custom_fast,
+            verbose,
+            wind_steps,
+            startup_time,
+            rise_time,
+            time_at_speed,
+            analyzed_fraction,
+            wind_time_step,
+            hooks,
+        )
+    elif mode == "parallel":
+        initial_states = _steady_states(
+            input_file,
+            openfast_time_step,
+            fast_version,
+            custom_fast,
+            verbose,
+            wind_steps,
+            startup_time + time_at_speed,
+            time_at_speed * analyzed_fraction,
+            max_processes,
+            trim,
+            rated_wind_speed,
+            rated_rot_speed,
+            hooks,
+        )
+    else:
+        raise ValueError("Unknown mode. Use 'step' or 'parallel'.")
 
-            for _ in range(round(startup_time / wind_time_step)):
-                t += wind_time_step
-                time.append(t)
-                speed.append(wind_step)
-
-            startup = False
-
-        # Linear rise.
-        else:
-            windows.append(
-                {
-                    "v0": wind_step,
-                    "start": t + rise_time + time_at_speed * (1 - analyzed_fraction),
-                    "end": t + rise_time + time_at_speed,
-                }
-            )
+    initial_states = pl.DataFrame(initial_states)
 
-            for _ in range(round(rise_time / wind_time_step)):
-                t += wind_time_step
-                v += ((wind_step - v_0) / rise_time) * wind_time_step
-                time.append(t)
-                speed.append(v)
+    # Write initial states to file.
+    if initial_state_output is None:
+        initial_state_output = model_dir / INITIAL_STATE_FILE
 
-        # Constant speed.
-        for _ in range(round(time_at_speed / wind_time_step)):
-            t += wind_time_step
-            time.append(t)
-            speed.append(wind_step)
+    initial_states.write_csv(initial_state_output)
 
-    # Write wind file.
-    wnd_file = FASTWndFile()
-    wnd_file.data = pd.DataFrame(
+    # Clean up.
+    if not retain_temp_files:
+        # Ugly hack, I don't know why this is necessary.
+        for _ in range(10):
+            try:
+                rmtree("simdriver_temp", ignore_errors=True)
+                Path("simdriver_temp").rmdir()
+            except Exception:
+                pass
+
+    return initial_states
+
+
+def _step_wind_states(
+    input_file: str,
+    openfast_time_step: float,
+    fast_version: str,
+    custom_fast: str | None,
+    verbose: bool,
+    wind_steps: np.ndarray,
+    startup_time: float,
+    rise_time: float,
+    time_at_speed: float,
+    analyzed_fraction: float,
+    wind_time_step: float,
+    hooks: list[Callable[[dict], None]],
+) -> list[dict]:
+    """Simulate all wind speeds in one run with a step wind, return turbine states."""
+    # Step wind: startup at the first wind speed, then linear rises between the wind
+    # speeds, each followed by the time at speed.
+    end = startup_time + time_at_speed
+    knot_time = [0, wind_time_step, end]
+    knot_speed = [0, wind_steps[0], wind_steps[0]]
+    windows = [
         {
-            "Time_[s]": time,
-            "WindSpeed_[m/s]": speed,
-            "WindDir_[deg]": 0,
-            "VertSpeed_[m/s]": 0,
-            "HorizShear_[-]": 0,
-            "VertShear_[-]": 0.17,
-            "LinVShear_[-]": 0,
-            "GustSpeed_[m/s]": 0,
+            "v0": wind_steps[0],
+            "start": end - time_at_speed * analyzed_fraction,
+            "end": end,
         }
-    )
-
-    # Clean up in case previous runs were aborted.
-    try:
-        rmtree("simdriver_temp")
-    except Exception:
-        pass
+    ]
+    for wind_step in wind_steps[1:]:
+        end += rise_time + time_at_speed
+        knot_time += [end - time_at_speed, end]
+        knot_speed += [wind_step, wind_step]
+        windows.append(
+            {
+                "v0": wind_step,
+                "start": end - time_at_speed * analyzed_fraction,
+                "end": end,
+            }
+        )
 
-    os.mkdir("simdriver_temp")
+    time = wind_events.time_series(end, wind_time_step)
+    wind = np.zeros((len(time), len(wind_events.HH_COLUMNS)))
+    wind[:, 0] = time
+    wind[:, 1] = np.interp(time, knot_time, knot_speed)
+    wind[:, 5] = 0.17
 
+    # Write wind file.
     wnd_file_path = "simdriver_temp/step_wind.hh"
-
-    # Suppress unnecessary error messages.
-    with open(os.devnull, "w") as devnull, contextlib.redirect_stdout(devnull):
-        wnd_file.write(wnd_file_path)
+    wind_events.write_hh(wnd_file_path, wind)
 
     # Run OpenFAST.
     run_fast.run_fast(
@@ -144,6 +199,7 @@ def initial_state(
             "TTDspFA",
             "TTDspSS",
         ],
+        hooks=hooks,
     )
 
     # Analyze results.
@@ -155,34 +211,104 @@ def initial_state(
             col("time") >= window["start"], col("time") < window["end"]
         )
 
-        initial_states.append(
-            {
-                "v0": window["v0"],
-                "pitch": window_res["pitch"].mean(),
-                "rot_speed": window_res["rot_speed"].mean(),
-                "OoPDefl": window_res["OoPDefl1_[m]"].mean(),
-                "IPDefl": window_res["IPDefl1_[m]"].mean(),
-                "TTDspFA": window_res["TTDspFA_[m]"].mean(),
-                "TTDspSS": window_res["TTDspSS_[m]"].mean(),
-            }
-        )
+        initial_states.append(_mean_state(window["v0"], window_res))
 
-    initial_states = pl.DataFrame(initial_states)
+    return initial_states
 
-    # Write initial states to file.
-    if initial_state_output is None:
-        initial_state_output = model_dir / "simdriver_initial_state.csv"
 
-    initial_states.write_csv(initial_state_output)
+def _steady_states(
+    input_file: str,
+    openfast_time_step: float,
+    fast_version: str,
+    custom_fast: str | None,
+    verbose: bool,
+    wind_steps: np.ndarray,
+    time_span: float,
+    analyzed_time: float,
+    max_processes: int,
+    trim: bool,
+    rated_wind_speed: float | None,
+    rated_rot_speed: float | None,
+    hooks: list[Callable[[dict], None]],
+) -> list[dict]:
+    """Simulate each wind speed in an independent steady run, return turbine states."""
+    options = {
+        "output_dir": "simdriver_temp",
+        "input_file": input_file,
+        "steady_power_law_exponent": 0.17,
+        "time_span": time_span,
+        "time_step": openfast_time_step,
+        "custom_fast": custom_fast,
+        "fast_version": fast_version,
+        "max_processes": max_processes,
+        "verbose": verbose,
+        "initialize_turbine_state": False,
+        "elastodyn_out": ["OoPDefl1", "IPDefl1", "TTDspFA", "TTDspSS"],
+        "hooks": hooks,
+    }
 
-    # Clean up.
-    if not retain_temp_files:
-        # Ugly hack, I don't know why this is necessary.
-        for _ in range(10):
-            try:
-                rmtree("simdriver_temp", ignore_errors=True)
-                Path("simdriver_temp").rmdir()
-            except Exception:
-                pass
+    free_steps = wind_steps
+    if trim:
+        if rated_wind_speed is None or rated_rot_speed is None:
+            raise ValueError("rated_wind_speed and rated_rot_speed required for trim.")
+
+        free_steps = wind_steps[wind_steps < rated_wind_speed]
+        trim_steps = wind_steps[wind_steps >= rated_wind_speed]
+
+        if len(trim_steps):
+            # Copy of the model with the steady-state calculation enabled.
+            model_dir = Path("simdriver_temp/trim_model")
+            copytree(Path(input_file).parent, model_dir)
+            trim_input_file = model_dir / Path(input_file).name
+            fst_file = FASTInputFile(str(trim_input_file))
+            fst_file["Linearize"] = True
+            fst_file["CalcSteady"] = True
+            fst_file["TrimCase"] = 3
+            fst_file["NLinTimes"] = 1
+            fst_file.write(str(trim_input_file))
+
+            # Start at rated rotor speed, the pitch angle is trimmed to hold it.
+            Path("simdriver_temp/trim_state.csv").write_text(
+                "v0,pitch,rot_speed,OoPDefl,IPDefl,TTDspFA,TTDspSS\n"
+                f"0,0,{rated_rot_speed},0,0,0,0\n"
+            )
+
+            run_fast.run_fast(
+                steady_wind_speed=list(trim_steps),
+                **(
+                    options
+                    | {
+                        "input_file": str(trim_input_file),
+                        "initialize_turbine_state": True,
+                        "custom_initial_state": "simdriver_temp/trim_state.csv",
+                    }
+                ),
+            )
+
+    if len(free_steps):
+        run_fast.run_fast(steady_wind_speed=list(free_steps), **options)
+
+    # Analyze the end of each run, runs with steady-state calculation stop once the
+    # operating point has converged.
+    initial_states = []
+    for wind_step in wind_steps:
+        id = f"U_{float(wind_step):05.2f}".replace(".", "d")
+        res = pl.read_parquet(f"simdriver_temp/{id}.parquet")
+        end = res["time"].max()
+        window_res = res.filter(col("time") >= end - analyzed_time)
+        initial_states.append(_mean_state(wind_step, window_res))
 
     return initial_states
+
+
+def _mean_state(v0: float, res: pl.DataFrame) -> dict:
+    """Mean turbine state of a simulation result window."""
+    return {
+        "v0": v0,
+        "pitch": res["pitch"].mean(),
+        "rot_speed": res["rot_speed"].mean(),
+        "OoPDefl": res["OoPDefl1_[m]"].mean(),
+        "IPDefl": res["IPDefl1_[m]"].mean(),
+        "TTDspFA": res["TTDspFA_[m]"].mean(),
+        "TTDspSS": res["TTDspSS_[m]"].mean(),
+    }
@@ -0,0 +1,113 @@
+import json
+import threading
+import time
+from collections.abc import Callable
+from contextlib import contextmanager
+from pathlib import Path
+
+# Run report written to the output directory.
+REPORT = "simdriver_report.json"
+
+
+class Instrumentation:
+    """
+    Timing and resource records of all cases and phases of one run.
+
+    Every record is a dictionary with the 'run' (output directory), 'case', 'phase',
+    wall clock 'start' and 'duration' in seconds. Phases in simdriver also record the
+    'cpu_time' of the thread they ran in, the 'runtime' phase records CPU time and peak
+    resident set size ('max_rss_mb') of the child process where the platform reports it,
+    and the 'error' of processes that failed or were aborted.
+    Records are passed to all hooks as they are created and collected for the report.
+
+    Args:
+        run: Name of the run, usually its output directory.
+        hooks: Callables receiving every record.
+    """
+
+    def __init__(self, run: str, hooks: list[Callable[[dict], None]] = []):
+        self.run = run
+        self.hooks = list(hooks)
+        self.records = []
+        self.start = time.time()
+        self.lock = threading.Lock()
+
+    def record(self, record: dict):
+        """Add a record and pass it to the hooks."""
+        record = {"run": self.run} | record
+        with self.lock:
+            self.records.append(record)
+        for hook in self.hooks:
+            hook(record)
+
+    @contextmanager
+    def phase(self, case: str, phase: str):
+        """Record wall and CPU time of the enclosed code as a phase of a case."""
+        start = time.time()
+        wall = time.perf_counter()
+        cpu = time.thread_time()
+        try:
+            yield
+        finally:
+            self.record(
+                {
+                    "case": case,
+                    "phase": phase,
+                    "start": start,
+                    "duration": time.perf_counter() - wall,
+                    "cpu_time": time.thread_time() - cpu,
+                }
+            )
+
+    def job(self, job):
+        """Record queue wait and process runtime of a finished scheduler job."""
+        if job.queued is not None and job.started is not None:
+            self.record(
+                {
+                    "case": job.name,
+                    "phase": "queue",
+                    "start": job.queued,
+                    "duration": job.started - job.queued,
+                }
+            )
+
+        if job.launched is not None and job.ended is not None:
+            self.record(
+                {
+                    "case": job.name,
+                    "phase": "runtime",
+                    "start": job.launched,
+                    "duration": job.ended - job.launched,
+                    "return_code": job.return_code,
+                }
+                | (job.resources or {})
+                | ({} if job.error is None else {"error": job.error})
+            )
+
+    def summary(self) -> dict:
+        """Number, total, mean and maximum duration and total CPU time per phase."""
+        phases = {}
+        for record in self.records:
+            phase = phases.setdefault(
+                record["phase"], {"count": 0, "total": 0.0, "max": 0.0, "cpu_time": 0.0}
+            )
+            phase["count"] += 1
+            phase["total"] += record["duration"]
+            phase["max"] = max(phase["max"], record["duration"])
+            phase["cpu_time"] += record.get("cpu_time", 0.0)
+
+        for phase in phases.values():
+            phase["mean"] = phase["total"] / phase["count"]
+
+        return phases
+
+    def write_report(self, output_dir: str):
+        """Write all records and the phase summary as JSON to the output directory."""
+        report = {
+            "run": self.run,
+            "start": self.start,
+            "end": time.time(),
+            "summary": self.summary(),
+            "records": self.records,
+        }
+        Path(output_dir, REPORT).write_text(json.dumps(report, indent=1))
@@ -0,0 +1,106 @@
+import json
+import os
+import threading
+import time
+from pathlib import Path
+
+# Case journal in the output directory.
+JOURNAL = "simdriver_journal.jsonl"
+
+# Case states.
+PENDING = "pending"
+RUNNING = "running"
+DONE = "done"
+FAILED = "failed"
+
+
+class CaseJournal:
+    """
+    Append-only journal of the case states of an output directory.
+
+    Every state change is appended as one JSON line and flushed to disk right away,
+    so the journal survives interrupted runs and node reboots. A line holds the case
+    name, state, input key, return code and time. Failures also record their reason
+    if it is known.
+
+    The latest entry of a case is its state. A case is 'pending' when it was
+    registered, 'running' once staged and launched, and 'done' once its output was
+    converted and analyzed. It is 'failed' if the process, the conversion or the
+    analysis failed. Entries of earlier runs are kept, so failed attempts are
+    counted across restarts.
+
+    Args:
+        output_dir: Path to the output directory.
+    """
+
+    def __init__(self, output_dir: str | Path):
+        self.path = Path(output_dir) / JOURNAL
+        self.lock = threading.Lock()
+        self.states = {}
+        self.failures = {}
+
+        if self.path.exists():
+            for line in self.path.read_text().splitlines():
+                try:
+                    self.apply(json.loads(line))
+                except json.JSONDecodeError:
+                    # Last line of an interrupted write.
+                    continue
+
+        self.file = open(self.path, "a")
+
+    def apply(self, entry: dict):
+        """Update the in-memory state with a journal entry."""
+        self.states[entry["case"]] = entry
+        if entry["state"] == FAILED:
+            key = (entry["case"], entry["key"])
+            self.failures[key] = self.failures.get(key, 0) + 1
+
+    def record(
+        self,
+        case: str,
+        state: str,
+        key: str | None = None,
+        return_code: int | None = None,
+        reason: str | None = None,
+    ):
+        """Append a state change of a case."""
+        entry = {
+            "case": case,
+            "state": state,
+            "key": key,
+            "return_code": return_code,
+            "time": time.time(),
+        }
+        if reason is not None:
+            entry["reason"] = reason
+        with self.lock:
+            self.apply(entry)
+            self.file.write(json.dumps(entry) + "\n")
+            self.file.flush()
+            os.fsync(self.file.fileno())
+
+    def state(self, case: str) -> str | None:
+        """Latest state of a case, None if it was never registered."""
+        entry = self.states.get(case)
+        return None if entry is None else entry["state"]
+
+    def is_done(self, case: str, key: str) -> bool:
+        """Check if a case was completed with the same inputs."""
+        entry = self.states.get(case)
+        return entry is not None and entry["state"] == DONE and entry["key"] == key
+
+    def failed_attempts(self, case: str, key: str) -> int:
+        """Number of failed attempts of a case with the same inputs."""
+        return self.failures.get((case, key), 0)
+
+    def summary(self) -> dict[str, int]:
+        """Number of cases per state."""
+        counts = {}
+        for entry in self.states.values():
+            counts[entry["state"]] = counts.get(entry["state"], 0) + 1
+
+        return counts
+
+    def close(self):
+        self.file.close()
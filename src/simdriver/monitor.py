@@ -0,0 +1,219 @@
+import json
+import re
+import time
+from collections.abc import Callable
+from pathlib import Path
+
+# Progress line of OpenFAST, e.g. "Timestep: 12.5 of 660 seconds."
+PROGRESS_PATTERN = re.compile(
+    rb"Time(?:step)?:\s*([-+.\deE]+)\s+of\s+([-+.\deE]+)\s+seconds"
+)
+
+
+class ProgressMonitor:
+    """
+    Live progress of running jobs, parsed from their stdout.
+
+    The stdout file of every running job is tailed for OpenFAST progress lines, the
+    simulated time gives the per-case speed (simulated seconds per wall second) and the
+    campaign ETA. Jobs without progress lines, like TurbSim, only count when finished.
+
+    Events are dictionaries with an 'event' key ('start', 'progress', 'finish' or
+    'campaign') and the wall clock 'time', they are appended to a JSON lines file
+    and/or passed to a callback.
+
+    Args:
+        total: Total number of jobs of the campaign, used for the ETA.
+        events: Path to a JSON lines file or callback receiving all events.
+        interval: Time in seconds between reads of the stdout files.
+        print_interval: Time in seconds between printed campaign summaries.
+    """
+
+    def __init__(
+        self,
+        total: int | None = None,
+        events: str | Path | Callable[[dict], None] | None = None,
+        interval: float = 1,
+        print_interval: float = 30,
+    ):
+        self.total = total
+        self.interval = interval
+        self.print_interval = print_interval
+        self.start_time = time.time()
+        self.last_poll = 0
+        self.last_print = self.start_time
+
+        self.callback = None
+        self.file = None
+        if callable(events):
+            self.callback = events
+        elif events is not None:
+            self.file = open(events, "a")
+
+        self.n_finished = 0
+        self.cases = {}
+
+    def emit(self, event: dict):
+        """Send an event to the JSON lines file and the callback."""
+        event = {"event": event.pop("event"), "time": time.time()} | event
+        if self.file is not None:
+            self.file.write(json.dumps(event) + "\n")
+            self.file.flush()
+        if self.callback is not None:
+            self.callback(event)
+
+    def started(self, job):
+        """Register a launched job."""
+        self.cases[job] = {
+            "start": time.time(),
+            "offset": 0,
+            "buffer": b"",
+            "sim_time": 0.0,
+            "total_time": None,
+        }
+        self.emit({"event": "start", "case": job.name})
+
+    def finished(self, job):
+        """Register a finished or skipped job."""
+        self.n_finished += 1
+        case = self.cases.pop(job, None)
+        event = {
+            "event": "finish",
+            "case": job.name,
+            "return_code": job.return_code,
+            "skipped": job.skipped,
+            "error": job.error,
+        }
+        if case is not None:
+            self.read(job, case)
+            wall_time = time.time() - case["start"]
+            event["wall_time"] = wall_time
+            event["sim_time"] = case["sim_time"]
+            if wall_time > 0:
+                event["speed"] = case["sim_time"] / wall_time
+        self.emit(event)
+
+    def poll(self, running: list):
+        """Read new stdout of running jobs, print a summary from time to time."""
+        now = time.time()
+        if now - self.last_poll < self.interval:
+            return
+        self.last_poll = now
+
+        for job in running:
+            case = self.cases[job]
+            if self.read(job, case):
+                self.emit(
+                    {
+                        "event": "progress",
+                        "case": job.name,
+                        "sim_time": case["sim_time"],
+                        "total_time": case["total_time"],
+                        "speed": self.speed(case, now),
+                    }
+                )
+
+        if now - self.last_print >= self.print_interval:
+            self.last_print = now
+            summary = self.summary(now)
+            self.emit({"event": "campaign"} | summary)
+            print(self.format(summary))
+
+    def read(self, job, case: dict) -> bool:
+        """Parse new stdout of a job, return True if the simulated time advanced."""
+        try:
+            with open(job.stdout, "rb") as file:
+                file.seek(case["offset"])
+                chunk = file.read()
+        except OSError:
+            return False
+
+        case["offset"] += len(chunk)
+
+        # Keep the end of the previous chunk, a progress line may be split.
+        text = case["buffer"] + chunk
+        case["buffer"] = text[-200:]
+        matches = PROGRESS_PATTERN.findall(text)
+        if not matches:
+            return False
+
+        sim_time, total_time = (float(value) for value in matches[-1])
+        advanced = sim_time != case["sim_time"]
+        case["sim_time"] = sim_time
+        case["total_time"] = total_time
+        return advanced
+
+    def speed(self, case: dict, now: float) -> float | None:
+        """Simulated seconds per wall second of a case."""
+        wall_time = now - case["start"]
+        if wall_time <= 0:
+            return None
+        return case["sim_time"] / wall_time
+
+    def summary(self, now: float) -> dict:
+        """Campaign progress, throughput and ETA."""
+        # Running cases count with their simulated fraction.
+        done = self.n_finished
+        speeds = {}
+        for job, case in self.cases.items():
+            if case["total_time"]:
+                done += min(case["sim_time"] / case["total_time"], 1)
+            speed = self.speed(case, now)
+            if speed is not None:
+                speeds[job.name] = speed
+
+        elapsed = now - self.start_time
+        eta = None
+        if self.total is not None and done > 0:
+            eta = elapsed / done * max(self.total - done, 0)
+
+        summary = {
+            "finished": self.n_finished,
+            "running": len(self.cases),
+            "total": self.total,
+            "elapsed": elapsed,
+            "eta": eta,
+            "cases_per_hour": self.n_finished / elapsed * 3600 if elapsed > 0 else None,
+        }
+
+        if speeds:
+            slowest = min(speeds, key=speeds.get)
+            summary["mean_speed"] = sum(speeds.values()) / len(speeds)
+            summary["slowest_case"] = slowest
+            summary["slowest_speed"] = speeds[slowest]
+
+        return summary
+
+    @staticmethod
+    def format(summary: dict) -> str:
+        """Single line progress message of a campaign summary."""
+        total = "?" if summary["total"] is None else summary["total"]
+        message = (
+            f"progress: {summary['finished']}/{total} finished, "
+            f"{summary['running']} running"
+        )
+        if "mean_speed" in summary:
+            message += (
+                f", {summary['mean_speed']:.2f} sim s/s per case, slowest "
+                f"{summary['slowest_case']} ({summary['slowest_speed']:.2f} sim s/s)"
+            )
+        if summary["eta"] is not None:
+            hours, rest = divmod(round(summary["eta"]), 3600)
+            message += f", ETA {hours}:{rest // 60:02d}:{rest % 60:02d}"
+
+        return message + "."
+
+    def close(self):
+        """Emit a final campaign summary and close the event file."""
+        self.emit({"event": "campaign"} | self.summary(time.time()))
+        if self.file is not None:
+            self.file.close()
+
+
+def progress_monitor(progress, total: int | None) -> ProgressMonitor | None:
+    """Create a monitor from the `progress` argument of the run functions."""
+    if progress is None or progress is False:
+        return None
+    if progress is True:
+        return ProgressMonitor(total)
+    return ProgressMonitor(total, progress)
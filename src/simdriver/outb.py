@@ -0,0 +1,219 @@
+import struct
+from pathlib import Path
+
+import numpy as np
+import polars as pl
+
+# File format identifiers used by OpenFAST.
+FILE_ID_WITH_TIME = 1
+FILE_ID_WITHOUT_TIME = 2
+FILE_ID_NO_COMPRESS_WITHOUT_TIME = 3
+FILE_ID_CHAN_LEN_IN = 4
+
+
+def read_outb_header(path: str | Path) -> dict:
+    """
+    Read the header of an OpenFAST binary output file.
+
+    Args:
+        path: Path to the binary output file (.outb).
+
+    Returns:
+        Dictionary with file format, channel names with units (time first, named like
+        weio does, e.g. 'RotSpeed_[rpm]'), number of time steps, scaling factors and the
+        byte offsets of the time and channel data.
+    """
+    with open(path, "rb") as file:
+
+        def read(fmt: str):
+            return struct.unpack(fmt, file.read(struct.calcsize(fmt)))
+
+        (file_id,) = read("<h")
+        if file_id not in [
+            FILE_ID_WITH_TIME,
+            FILE_ID_WITHOUT_TIME,
+            FILE_ID_NO_COMPRESS_WITHOUT_TIME,
+            FILE_ID_CHAN_LEN_IN,
+        ]:
+            raise ValueError(f"{path} is not an OpenFAST binary output file.")
+
+        # Number of characters in channel names and units.
+        if file_id == FILE_ID_CHAN_LEN_IN:
+            (name_length,) = read("<h")
+        else:
+            name_length = 10
+
+        n_channels, n_t = read("<ii")
+        time_1, time_2 = read("<dd")
+
+        if file_id == FILE_ID_NO_COMPRESS_WITHOUT_TIME:
+            scale = np.ones(n_channels)
+            offset = np.zeros(n_channels)
+        else:
+            scale = np.array(read(f"<{n_channels}f"), dtype=np.float64)
+            offset = np.array(read(f"<{n_channels}f"), dtype=np.float64)
+
+        (description_length,) = read("<i")
+        description = file.read(description_length).decode("ascii", "replace")
+
+        # Names and units include the time channel.
+        names_raw = file.read(name_length * (n_channels + 1)).decode("ascii", "replace")
+        units_raw = file.read(name_length * (n_channels + 1)).decode("ascii", "replace")
+        names = [
+            names_raw[i : i + name_length].strip()
+            for i in range(0, len(names_raw), name_length)
+        ]
+        units = [
+            units_raw[i : i + name_length].strip()[1:-1].replace("sec", "s")
+            for i in range(0, len(units_raw), name_length)
+        ]
+
+        time_offset = file.tell()
+
+    # Packed time is only stored in files with time.
+    data_offset = time_offset
+    if file_id == FILE_ID_WITH_TIME:
+        data_offset += 4 * n_t
+
+    return {
+        "file_id": file_id,
+        "description": description.strip(),
+        "channels": [f"{name}_[{unit}]" for name, unit in zip(names, units)],
+        "n_t": n_t,
+        "time": (time_1, time_2),
+        "scale": scale,
+        "offset": offset,
+        "time_offset": time_offset,
+        "data_offset": data_offset,
+    }
+
+
+def read_outb(
+    path: str | Path,
+    columns: list[str] | None = None,
+    rename: dict = {},
+    dtype: type = np.float64,
+) -> dict[str, np.ndarray]:
+    """
+    Read channels of an OpenFAST binary output file without loading the whole file.
+
+    The packed channel block is memory-mapped, only the selected channels are scaled
+    and copied into arrays.
+
+    Args:
+        path: Path to the binary output file (.outb).
+        columns: Channels to read, after renaming. Default is all channels.
+        rename: Mapping from channel names in the file to new names.
+        dtype: Data type of the returned arrays.
+
+    Returns:
+        Dictionary of channel name to array, in file order.
+    """
+    header = read_outb_header(path)
+    n_t = header["n_t"]
+    names = [rename.get(channel, channel) for channel in header["channels"]]
+
+    if columns is None:
+        selected = list(range(len(names)))
+    else:
+        missing = set(columns) - set(names)
+        if missing:
+            raise KeyError(f"channels not found in {path}: {sorted(missing)}")
+        selected = [i for i, name in enumerate(names) if name in columns]
+
+    if header["file_id"] == FILE_ID_NO_COMPRESS_WITHOUT_TIME:
+        packed_type = "<f8"
+    else:
+        packed_type = "<i2"
+
+    n_channels = len(names) - 1
+    packed = np.memmap(
+        path,
+        dtype=packed_type,
+        mode="r",
+        offset=header["data_offset"],
+        shape=(n_t, n_channels),
+    )
+
+    data = {}
+    for i in selected:
+        # Time channel.
+        if i == 0:
+            if header["file_id"] == FILE_ID_WITH_TIME:
+                packed_time = np.memmap(
+                    path,
+                    dtype="<i4",
+                    mode="r",
+                    offset=header["time_offset"],
+                    shape=(n_t,),
+                )
+                time_scale, time_offset = header["time"]
+                time = (packed_time - time_offset) / time_scale
+            else:
+                time_1, time_increment = header["time"]
+                time = time_1 + time_increment * np.arange(n_t)
+            data[names[0]] = time.astype(dtype)
+            continue
+
+        scale = header["scale"][i - 1]
+        offset = header["offset"][i - 1]
+        if np.isnan(scale) and np.isnan(offset):
+            # Probably due to a division by zero in OpenFAST.
+            data[names[i]] = np.zeros(n_t, dtype=dtype)
+        else:
+            column = packed[:, i - 1].astype(np.float64)
+            column -= offset
+            column /= scale
+            data[names[i]] = column.astype(dtype, copy=False)
+
+    del packed
+
+    return data
+
+
+def outb_to_parquet(
+    path: str | Path,
+    parquet_path: str | Path,
+    columns: list[str] | None = None,
+    rename: dict = {},
+    dtype: type = np.float64,
+    compression: str = "zstd",
+    compression_level: int | None = None,
+    row_group_size: int | None = None,
+    verify: bool = False,
+) -> dict[str, np.ndarray]:
+    """
+    Convert an OpenFAST binary output file to parquet without intermediate pandas frames.
+
+    Args:
+        path: Path to the binary output file (.outb).
+        parquet_path: Path to the parquet file to write.
+        columns: Channels to write, after renaming. Default is all channels.
+        rename: Mapping from channel names in the file to new names.
+        dtype: Data type of the written columns.
+        compression: Parquet compression codec.
+        compression_level: Level of the compression codec, default is the codec default.
+        row_group_size: Number of rows per row group, default is one row group.
+        verify: Read back the parquet metadata and raise a ValueError if columns or
+                number of rows differ from the binary output file.
+
+    Returns:
+        The written channels, for analysis without reading the parquet file.
+    """
+    data = read_outb(path, columns, rename, dtype)
+    pl.DataFrame(data).write_parquet(
+        parquet_path,
+        compression=compression,
+        compression_level=compression_level,
+        row_group_size=row_group_size,
+    )
+
+    if verify:
+        written = pl.scan_parquet(parquet_path)
+        n_t = read_outb_header(path)["n_t"]
+        if written.collect_schema().names() != list(data):
+            raise ValueError(f"columns of {parquet_path} do not match {path}.")
+        if written.select(pl.len()).collect().item() != n_t:
+            raise ValueError(f"number of rows of {parquet_path} does not match {path}.")
+
+    return data
@@ -0,0 +1,130 @@
+from collections.abc import Callable
+
+from . import admission
+from .run_fast import FastCampaign
+from .run_turbsim import TurbSimCampaign
+from .monitor import progress_monitor
+from .scheduler import Job, run_jobs
+from .work_queue import run_queued
+
+
+def run_pipeline(
+    wind_dir: str,
+    output_dir: str,
+    input_file: str,
+    turbsim_options: dict,
+    fast_options: dict = {},
+    max_processes: int = 20,
+    verbose: bool = False,
+    progress: bool | str | Callable[[dict], None] = False,
+    hooks: list[Callable[[dict], None]] = [],
+    queue_dir: str | None = None,
+    memory_budget: float | str | None = "auto",
+    cpu_affinity: bool = False,
+):
+    """
+    Generate wind fields with TurbSim and simulate them with OpenFAST in one pipeline.
+
+    Each wind field is queued for OpenFAST as soon as its TurbSim process exits. Both
+    stages share the same pool of processes, OpenFAST cases are started before any
+    remaining TurbSim cases.
+
+    Args:
+        wind_dir: Relative path to output directory of TurbSim.
+        output_dir: Relative path to output directory of OpenFAST.
+        input_file: Relative path to OpenFAST input file (.fst).
+        turbsim_options: Input parameters of `run_turbsim`, except `output_dir`,
+                         `max_processes` and `verbose`.
+        fast_options: Input parameters of `run_fast`, except `output_dir`, `input_file`,
+                      `wind_files`, `steady_wind_speed`, `max_processes` and `verbose`.
+        max_processes: Maximum number of parallel processes for both stages.
+        verbose: Print stdout and stderr of TurbSim and OpenFAST processes.
+        progress: Report live progress. True prints campaign progress, throughput and
+                  ETA periodically, a path additionally appends all progress events to a
+                  JSON lines file, a callable receives all progress events.
+        hooks: Callables receiving a timing and resource record for each phase of each
+               case of both stages. All records are written to 'simdriver_report.json'
+               in the OpenFAST output directory.
+        queue_dir: Relative path to a work queue directory on a shared filesystem. Cases
+                   of both stages are run by `simdriver worker` processes serving the
+                   queue on any host, `max_processes` then limits the number of queued
+                   cases. Default is to run all cases locally.
+        memory_budget: Memory budget in GB for all parallel processes. Cases only start
+                       when their estimated peak memory fits into the budget, 'auto'
+                       uses 90 % of the available memory, None disables the budget.
+        cpu_affinity: Pin each process to one physical core, spread over the NUMA
+                      nodes, and run at most one process per core. Linux only.
+    """
+    fast_options = dict(fast_options)
+    custom_initial_state = fast_options.pop("custom_initial_state", None)
+    initialization_options = fast_options.pop("initialization_options", {})
+
+    fast = FastCampaign(
+        output_dir=output_dir,
+        input_file=input_file,
+        verbose=verbose,
+        hooks=hooks,
+        **fast_options,
+    )
+    # TurbSim records go to the report of the OpenFAST run.
+    turbsim = TurbSimCampaign(
+        output_dir=wind_dir, hooks=[fast.instrumentation.record], **turbsim_options
+    )
+
+    # Find initial turbine state before any wind field is generated.
+    fast.load_initial_state(custom_initial_state, initialization_options)
+    fast.load_warm_start(max_processes)
+
+    def turbsim_job(case: dict) -> Job:
+        inp_file = turbsim.write_input(case)
+
+        def queue_fast(job: Job) -> list[Job]:
+            # Skip OpenFAST if TurbSim failed.
+            if job.return_code != 0:
+                return []
+
+            # The metadata table of the wind fields is only complete at the end.
+            inflow_file, v0_init = fast.wind_case(turbsim.wind_file(inp_file), case)
+            return [fast.job(inflow_file, v0_init)]
+
+        job = turbsim.job(inp_file, finish=queue_fast)
+        job.name = f"TurbSim {job.name}"
+        return job
+
+    print(f"running TurbSim and OpenFAST for {len(turbsim)} cases ...\n")
+    # Every wind field is one TurbSim and one OpenFAST job.
+    monitor = progress_monitor(progress, 2 * len(turbsim))
+    jobs = (turbsim_job(case) for case in turbsim.cases())
+    if queue_dir is None:
+        run_jobs(
+            jobs,
+            max_processes,
+            verbose,
+            monitor=monitor,
+            keep_finished=False,
+            **admission.scheduler_options(memory_budget, cpu_affinity),
+        )
+    else:
+        run_queued(
+            jobs,
+            queue_dir,
+            max_processes,
+            verbose,
+            monitor=monitor,
+            keep_finished=False,
+        )
+    if monitor is not None:
+        monitor.close()
+
+    print("")
+
+    turbsim.write_metadata()
+    if len(turbsim.failed):
+        print(f"TurbSim failed for {len(turbsim.failed)} cases:")
+        for name in turbsim.failed:
+            print(name)
+        print("")
+
+    fast.process_output()
+    fast.report()
+    fast.close()
@@ -0,0 +1,83 @@
+from pathlib import Path
+
+import polars as pl
+
+# Case metadata written next to the wind files and the simulation results.
+WIND_METADATA = "simdriver_wind.parquet"
+CASE_METADATA = "simdriver_cases.parquet"
+
+# Directory of the consolidated dataset inside the output directory.
+DATASET_DIR = "dataset"
+
+# Hive partition keys of the dataset, the case name is always the last level.
+PARTITIONS = ["wind_speed", "turbulence_intensity", "seed"]
+
+# Hive notation for missing partition values.
+NULL_PARTITION = "__HIVE_DEFAULT_PARTITION__"
+
+# Number of cases whose metadata rows are held in memory before they are added to
+# their table.
+METADATA_BATCH = 1000
+
+
+def load_results(output_dir: str) -> pl.LazyFrame:
+    """
+    Lazily load all simulation results of an output directory as one table.
+
+    Results are partitioned by wind speed, turbulence intensity, seed and case, so
+    filters on these columns only read the matching files. Case metadata (wind file,
+    time step, model hash, ...) is joined by case name.
+
+    Args:
+        output_dir: Relative path to output directory of `run_fast`.
+
+    Returns:
+        Polars LazyFrame with one row per output time step and case.
+    """
+    results = pl.scan_parquet(
+        f"{output_dir}/{DATASET_DIR}/**/*.parquet", hive_partitioning=True
+    )
+
+    cases_path = Path(output_dir) / CASE_METADATA
+    if not cases_path.exists():
+        return results
+
+    cases = pl.scan_parquet(cases_path).drop(PARTITIONS + ["path"], strict=False)
+    return results.join(cases, on="case", how="left")
+
+
+def update_metadata(path: str | Path, rows: list[dict], key: str = "case"):
+    """Add rows to a metadata table, replacing existing rows with the same key."""
+    if not rows:
+        return
+
+    new = pl.DataFrame(rows, infer_schema_length=None)
+    if Path(path).exists():
+        old = pl.read_parquet(path)
+        old = old.filter(~pl.col(key).is_in(new[key].to_list()))
+        new = pl.concat([old, new], how="diagonal_relaxed")
+
+    new.write_parquet(path)
+
+
+def read_metadata(path: str | Path, key: str = "case") -> dict[str, dict]:
+    """Read a metadata table into a dictionary of rows by key, empty if missing."""
+    if not Path(path).exists():
+        return {}
+
+    return {row[key]: row for row in pl.read_parquet(path).iter_rows(named=True)}
+
+
+def partition_dir(metadata: dict) -> str:
+    """Relative dataset directory of a case, e.g. 'wind_speed=15.0/.../case=...'."""
+    parts = []
+    for key in PARTITIONS:
+        value = metadata.get(key)
+        if value is None:
+            value = NULL_PARTITION
+        elif isinstance(value, int | float):
+            value = float(value) if key != "seed" else int(value)
+        parts.append(f"{key}={value}")
+
+    parts.append(f"case={metadata['case']}")
+    return "/".join(parts)
@@ -1,17 +1,39 @@
-import subprocess
+import json
 import os
+import threading
+from collections.abc import Callable, Iterator
+from concurrent.futures import ThreadPoolExecutor
 from pathlib import Path
 from glob import glob
-from itertools import batched
-import math
-from shutil import copytree, rmtree
+from shutil import copy2, copytree, rmtree
 import polars as pl
 import numpy as np
-from weio import FASTInputFile, FASTOutputFile
-from weio.turbsim_file import TurbSimFile
-from weio.fast_wind_file import FASTWndFile
+from weio import FASTInputFile
 
-from . import initial_state
+from . import admission, initial_state, warm_start
+from .analysis import PSD_DIR, SUMMARY, analysis_options, analyze
+from .case_matrix import WIND_FIELDS, CaseMatrix, input_fields
+from .cache import FileCache, dir_digest, file_digest, hash_parts, link_or_copy
+from .health import HealthGuard, channel_guards, health_options
+from .instrumentation import Instrumentation
+from .journal import DONE, FAILED, PENDING, RUNNING, CaseJournal
+from .outb import outb_to_parquet
+from .results import (
+    CASE_METADATA,
+    DATASET_DIR,
+    METADATA_BATCH,
+    PARTITIONS,
+    WIND_METADATA,
+    partition_dir,
+    read_metadata,
+    update_metadata,
+)
+from .monitor import progress_monitor
+from .scheduler import Job, run_jobs
+from .work_queue import run_queued
+from .storage import storage_options
+from .template import InputTemplate
+from .wind_index import WindIndex
 
 DEFAULT_ELASTODYN_OUT = [
     "RotSpeed",
@@ -43,6 +65,44 @@ RENAME = {
     "TwrBsMyt_[kN-m]": "M_tower_fa",
     "TwrBsMxt_[kN-m]": "M_tower_ss",
 }
+FST_FIELDS = ["InflowFile", "TMax", "DT", "DT_Out", "OutFileFmt", "SumPrint"]
+ELASTODYN_FIELDS = [
+    "OoPDefl",
+    "IPDefl",
+    "BlPitch(1)",
+    "BlPitch(2)",
+    "BlPitch(3)",
+    "Azimuth",
+    "RotSpeed",
+    "TTDspFA",
+    "TTDspSS",
+    "OutList",
+]
+INFLOW_FIELDS = [
+    "WindType",
+    "HWindSpeed",
+    "RefHt",
+    "PLexp",
+    "FileName_Uni",
+    "RefHt_Uni",
+    "RefLength",
+    "Filename",
+    "Filename_BTS",
+    "FilenameRoot",
+]
+DAT_FILES = [
+    "EDFile",
+    "BDBldFile(1)",
+    "BDBldFile(2)",
+    "BDBldFile(3)",
+    "AeroFile",
+    "ServoFile",
+    "HydroFile",
+    "SubFile",
+    "MooringFile",
+    "IceFile",
+    "SWELidarFile",
+]
 
 
 def run_fast(
@@ -63,6 +123,24 @@ def run_fast(
     initialize_turbine_state: bool = True,
     initialization_options: dict = {},
     custom_initial_state: str | None = None,
+    cache_dir: str | None = None,
+    cache_size_limit: float | None = None,
+    staging: str = "copy",
+    conversion_workers: int = 4,
+    storage: str | dict = "full",
+    analysis: bool | dict = False,
+    health: bool | dict = False,
+    warm_start_dir: str | None = None,
+    warm_start_bin_width: float = 0.5,
+    spin_up_time: float = 120,
+    progress: bool | str | Callable[[dict], None] = False,
+    hooks: list[Callable[[dict], None]] = [],
+    queue_dir: str | None = None,
+    memory_budget: float | str | None = "auto",
+    cpu_affinity: bool = False,
+    resume: bool = True,
+    max_attempts: int = 3,
+    case_matrix: CaseMatrix | None = None,
 ):
     """
     Run OpenFAST in parallel for multiple wind conditions.
@@ -87,72 +165,114 @@ def run_fast(
         initialize_turbine_state: Initialize turbine state before simulating, default is True.
         initialization_options: Custom input parameters for finding the initial turbine state.
         custom_initial_state: Relative path to custom initial state file.
+        cache_dir: Relative path to result cache, cases with identical inputs are only
+                   simulated once. Default is no caching.
+        cache_size_limit: Maximum size of the result cache in GB, default is unlimited.
+        staging: How the model is staged for each case. 'copy' copies the model directory,
+                 'link' writes only the modified input files and links everything else
+                 to one shared copy of the model. Default is 'copy'.
+        conversion_workers: Number of parallel output conversions, each case is converted
+                            to parquet as soon as its simulation finishes.
+        storage: Output storage profile, 'full' keeps the binary output and writes
+                 float64 parquet, 'compact' writes float32 parquet with tuned row groups
+                 and deletes binary output and logs once the parquet file is verified.
+                 A dictionary overrides single options of a profile, e.g.
+                 {"profile": "compact", "output_time_step": 0.05}. See
+                 `simdriver.storage.STORAGE_PROFILES` for all options.
+        analysis: Compute statistics and damage-equivalent loads of the load channels
+                  during output conversion, while the output is in memory. Results
+                  are collected in 'simdriver_summary.parquet' in the output directory,
+                  see `simdriver.lifetime_del` for lifetime loads. True uses the
+                  defaults, a dictionary overrides single options, see
+                  `simdriver.analysis.DEFAULT_ANALYSIS`. Default is no analysis.
+        health: Guard running cases and kill them as soon as their output diverges
+                (NaN values, channel limits, custom checks) or OpenFAST prints an abort
+                message, so their process slot goes to the next case. The reason is
+                printed and recorded in the journal and the run report. Channel
+                guards read the text output of OpenFAST, which is written in
+                addition to the binary output, stdout then goes to '<case>.log'.
+                True uses the defaults, a dictionary overrides single options, see
+                `simdriver.health.DEFAULT_HEALTH`. Not applied to cases run through
+                `queue_dir`. Default is no guards.
+        warm_start_dir: Relative path to a store of spin-up states. If set, each case
+                        starts from the end state of a steady spin-up at its initial
+                        wind speed instead of the interpolated initial turbine state.
+                        Spin-ups run once per wind speed bin and model and are reused
+                        by later campaigns. Default is no warm start.
+        warm_start_bin_width: Width of the spin-up wind speed bins in m/s.
+        spin_up_time: Simulation time span of a spin-up.
+        progress: Report live progress. True prints campaign progress, throughput and
+                  ETA periodically, a path additionally appends all progress events to a
+                  JSON lines file, a callable receives all progress events.
+        hooks: Callables receiving a timing and resource record for each phase of each
+               case, see `simdriver.instrumentation.Instrumentation`. All records are
+               also written to 'simdriver_report.json' in the output directory.
+        queue_dir: Relative path to a work queue directory on a shared filesystem. Cases
+                   are run by `simdriver worker` processes serving the queue on any
+                   host, `max_processes` then limits the number of queued cases.
+                   Default is to run all cases locally.
+        memory_budget: Memory budget in GB for all parallel processes. Cases only start
+                       when their estimated peak memory fits into the budget, 'auto'
+                       uses 90 % of the available memory, None disables the budget.
+        cpu_affinity: Pin each process to one physical core, spread over the NUMA
+                      nodes, and run at most one process per core. Linux only.
+        resume: Keep a journal of case states in the output directory and skip cases
+                completed by a previous run with the same inputs. Failed, interrupted
+                and new cases are run.
+        max_attempts: Maximum number of failed attempts of a case with the same inputs
+                      across resumed runs, further attempts are refused.
+        case_matrix: Sweeps over wind parameters and input file fields, see
+                     `simdriver.CaseMatrix`, instead of `wind_files` or
+                     `steady_wind_speed`. Cases are generated and their inflow files
+                     written lazily when a process slot becomes free.
     """
-    # Path to resource directory.
-    resources = Path(__file__).parent / "resources"
-
-    # Path to model directory.
-    model_dir = Path(input_file).parent
-
-    # Path to FAST executable.
-    if custom_fast is not None:
-        fast_exe = f"{os.getcwd()}/{custom_fast}"
-    else:
-        fast_exe = resources / "OpenFAST.exe"
-
-    # Create output directory if it does not exist.
-    if not Path(output_dir).exists():
-        Path(output_dir).mkdir(parents=True)
-
-    # Load input file template.
-    version_id = fast_version.replace(".", "_")
-    try:
-        inflow_file = FASTInputFile(f"{resources}/inflow_template_{version_id}.dat")
-    except Exception:
-        raise ValueError("Error: OpenFAST version not supported.")
+    campaign = FastCampaign(
+        output_dir=output_dir,
+        input_file=input_file,
+        steady_power_law_exponent=steady_power_law_exponent,
+        reference_height=reference_height,
+        time_span=time_span,
+        time_step=time_step,
+        elastodyn_out=elastodyn_out,
+        servodyn_out=servodyn_out,
+        custom_fast=custom_fast,
+        fast_version=fast_version,
+        verbose=verbose,
+        initialize_turbine_state=initialize_turbine_state,
+        cache_dir=cache_dir,
+        cache_size_limit=cache_size_limit,
+        staging=staging,
+        conversion_workers=conversion_workers,
+        storage=storage,
+        analysis=analysis,
+        health=health,
+        warm_start_dir=warm_start_dir,
+        warm_start_bin_width=warm_start_bin_width,
+        spin_up_time=spin_up_time,
+        hooks=hooks,
+        resume=resume,
+        max_attempts=max_attempts,
+        case_fields=[] if case_matrix is None else case_matrix.fields(),
+    )
 
     ################################################################################################
     # Prepare inflow.
-    # Set wind speed output at hub height.
-    fst_file_template = FASTInputFile(f"{os.getcwd()}/{input_file}")
-    elastodyn_file = FASTInputFile(
-        f"{os.getcwd()}/{model_dir}/{fst_file_template["EDFile"].strip('"')}"
-    )
-    hub_height = elastodyn_file["TowerHt"] + elastodyn_file["Twr2Shft"]
-    inflow_file["WindVziList"] = hub_height
-
-    # Get reference height for steady or uniform wind input.
-    if reference_height is None:
-        reference_height = hub_height
-
-    # Get rotor diameter for uniform wind input.
-    rotor_diameter = elastodyn_file["TipRad"] * 2
-
     # Collect inflow files.
     inflow_files = []
 
+    # Case matrix, inflow files are written when the cases are staged.
+    if case_matrix is not None:
+        pass
+
     # Steady wind speed.
-    if steady_wind_speed is not None:
+    elif steady_wind_speed is not None:
         # Make sure steady_wind_speed is a list.
         if isinstance(steady_wind_speed, int) or isinstance(steady_wind_speed, float):
             steady_wind_speed = [steady_wind_speed]
 
-        # Set wind input to steady wind.
-        inflow_file["WindType"] = 1
-
-        # Configure steady wind inflow parameters.
-        inflow_file["RefHt"] = reference_height
-        inflow_file["PLexp"] = steady_power_law_exponent
-
         # Loop over wind speeds.
         for u in steady_wind_speed:
-            inflow_file["HWindSpeed"] = u
-
-            # Write inflow file.
-            id = f"U_{float(u):05.2f}".replace(".", "d")
-            path = f"{os.getcwd()}/{output_dir}/{id}.dat"
-            inflow_file.write(path)
-            inflow_files.append((path, u))
+            inflow_files.append(campaign.steady_case(u))
 
     # Non-steady wind input.
     else:
@@ -173,251 +293,1014 @@ def run_fast(
 
         # Loop over wind input files.
         for wind_file_path in wind_files_list:
-            if wind_file_path.endswith("hh"):
-                # Set wind input to uniform wind.
-                inflow_file["WindType"] = 2
+            inflow_files.append(campaign.wind_case(wind_file_path))
+        campaign.wind_index.save()
+
+    ################################################################################################
+    # Find initial turbine state.
+    campaign.load_initial_state(custom_initial_state, initialization_options)
+    campaign.load_warm_start(max_processes)
 
-                inflow_file["FileName_Uni"] = f'"{os.getcwd()}/{wind_file_path}"'
-                inflow_file["RefHt_Uni"] = reference_height
-                inflow_file["RefLength"] = rotor_diameter
+    ################################################################################################
+    # Run FAST in parallel.
+    # Start a new case as soon as a process slot becomes free.
+    if case_matrix is None:
+        n_cases = len(inflow_files)
+        jobs = (
+            campaign.job(inflow_file, v0_init) for inflow_file, v0_init in inflow_files
+        )
+    else:
+        n_cases = len(case_matrix)
+        jobs = campaign.matrix_jobs(case_matrix)
+    print(f"running OpenFAST for {n_cases} cases ...\n")
+    monitor = progress_monitor(progress, n_cases)
+    if queue_dir is None:
+        run_jobs(
+            jobs,
+            max_processes,
+            verbose,
+            monitor=monitor,
+            keep_finished=False,
+            **admission.scheduler_options(memory_budget, cpu_affinity),
+        )
+    else:
+        run_queued(
+            jobs,
+            queue_dir,
+            max_processes,
+            verbose,
+            monitor=monitor,
+            keep_finished=False,
+        )
+    if monitor is not None:
+        monitor.close()
 
-                # Get initial wind speed.
-                if initialize_turbine_state:
-                    wind_file = FASTWndFile(wind_file_path).toDataFrame()
-                    v0_init = wind_file["WindSpeed_[m/s]"][0]
+    print("")
 
-            elif wind_file_path.endswith("bts"):
-                # Set wind input to TurbSim.
-                inflow_file["WindType"] = 3
+    ################################################################################################
+    # Process output.
+    campaign.process_output()
+    campaign.report()
+    campaign.close()
 
-                # Try both for compatibility with older versions.
-                inflow_file["Filename"] = f'"{os.getcwd()}/{wind_file_path}"'
-                inflow_file["Filename_BTS"] = f'"{os.getcwd()}/{wind_file_path}"'
 
-                # Get initial wind speed.
-                if initialize_turbine_state:
-                    _, v0_init, _ = TurbSimFile(wind_file_path).hubValues()
+class FastCampaign:
+    """
+    Model, templates and options shared by all OpenFAST cases of one run.
 
-            elif wind_file_path.endswith("wnd"):
-                # Set wind input to TurbSim.
-                inflow_file["WindType"] = 4
+    Args:
+        output_dir: Relative path to output directory.
+        input_file: Relative path to OpenFAST input file (.fst).
+        steady_power_law_exponent: Power law exponent for steady wind input.
+        reference_height: Reference height for steady or uniform wind input, default is hub height.
+        time_span: Simulation time span.
+        time_step: Simulation time step.
+        elastodyn_out: Additional ElastoDyn output parameters.
+        servodyn_out: Additional ServoDyn output parameters.
+        custom_fast: Relative path to custom OpenFAST executable.
+        fast_version: Version of custom OpenFAST executable.
+        verbose: Print stdout and stderr of OpenFAST processes.
+        initialize_turbine_state: Initialize turbine state before simulating.
+        cache_dir: Relative path to result cache, default is no caching.
+        cache_size_limit: Maximum size of the result cache in GB, default is unlimited.
+        staging: How the model is staged for each case, 'copy' or 'link'.
+        conversion_workers: Number of parallel output conversions.
+        storage: Output storage profile or dictionary of storage options.
+        analysis: Analysis during output conversion, True, False or a dictionary of
+                  analysis options.
+        health: Health guards of running cases, True, False or a dictionary of health
+                options.
+        warm_start_dir: Relative path to a store of spin-up states, default is no warm
+                        start.
+        warm_start_bin_width: Width of the spin-up wind speed bins in m/s.
+        spin_up_time: Simulation time span of a spin-up.
+        hooks: Callables receiving a timing and resource record for each phase of each
+               case.
+        resume: Skip cases completed by a previous run, see `run_fast`.
+        max_attempts: Maximum number of failed attempts of a case across resumed runs.
+        case_fields: Labels of input file fields swept by a case matrix, e.g.
+                     'elastodyn.NacYaw'.
+        release_cases: Write the metadata of each case and drop its state as soon as
+                       its output is processed. False keeps it until `release` is
+                       called, for callers that read the results of each case.
+    """
 
-                inflow_file["FilenameRoot"] = (
-                    f'"{os.getcwd()}/{wind_file_path.removesuffix(".wnd")}"'
-                )
+    def __init__(
+        self,
+        output_dir: str,
+        input_file: str,
+        steady_power_law_exponent: float = 0.2,
+        reference_height: float | None = None,
+        time_span: float = 660,
+        time_step: float = 0.01,
+        elastodyn_out: list[str] = [],
+        servodyn_out: list[str] = [],
+        custom_fast: str | None = None,
+        fast_version: str = "3.5",
+        verbose: bool = False,
+        initialize_turbine_state: bool = True,
+        cache_dir: str | None = None,
+        cache_size_limit: float | None = None,
+        staging: str = "copy",
+        conversion_workers: int = 4,
+        storage: str | dict = "full",
+        analysis: bool | dict = False,
+        health: bool | dict = False,
+        warm_start_dir: str | None = None,
+        warm_start_bin_width: float = 0.5,
+        spin_up_time: float = 120,
+        hooks: list[Callable[[dict], None]] = [],
+        resume: bool = True,
+        max_attempts: int = 3,
+        case_fields: list[str] = [],
+        release_cases: bool = True,
+    ):
+        self.output_dir = output_dir
+        self.input_file = input_file
+        self.steady_power_law_exponent = steady_power_law_exponent
+        self.time_span = time_span
+        self.time_step = time_step
+        self.elastodyn_out = elastodyn_out
+        self.servodyn_out = servodyn_out
+        self.custom_fast = custom_fast
+        self.fast_version = fast_version
+        self.verbose = verbose
+        self.initialize_turbine_state = initialize_turbine_state
+        self.init_state = None
+        self.storage = storage_options(storage)
+        self.analysis = analysis_options(analysis)
+        self.summary_rows = {}
+        self.summarized = set()
+        if self.analysis is not None:
+            self.summarized = set(read_metadata(Path(output_dir) / SUMMARY))
+        self.health = health_options(health)
+        self.channel_output = self.health is not None and channel_guards(self.health)
+        self.warm_start_dir = warm_start_dir
+        self.warm_start_bin_width = warm_start_bin_width
+        self.spin_up_time = spin_up_time
+        self.warm_states = None
+        self.instrumentation = Instrumentation(output_dir, hooks)
 
-                # Get initial wind speed.
-                if initialize_turbine_state:
-                    ref_speed_line = (
-                        open(wind_file_path.removesuffix(".wnd") + ".sum")
-                        .readlines()[43]
-                        .split()
-                    )
-                    assert ref_speed_line[1:] == [
-                        "Reference",
-                        "wind",
-                        "speed",
-                        "[m/s]",
-                    ]
-                    v0_init = float(ref_speed_line[0])
+        # Result cache.
+        self.cache = None
+        if cache_dir is not None:
+            self.cache = FileCache(cache_dir, cache_size_limit)
+        self.case_keys = {}
+        self.cached = set()
+        self.wind_inputs = {}
 
-            else:
-                raise ValueError("Unknown wind file. Use '.bts', '.wnd' or '.hh'.")
+        # Case metadata of the consolidated dataset, held while a case is in flight.
+        # Rows of completed cases are written to the metadata and summary tables in
+        # batches.
+        self.metadata = {}
+        self.release_cases = release_cases
+        self.metadata_rows = []
+        self.summary_batch = []
+        self.lock = threading.Lock()
+        self.n_failed = 0
+        self.wind_metadata_tables = {}
+        self.wind_index = WindIndex()
+        self.dataset_cases = read_metadata(Path(output_dir) / CASE_METADATA)
+        # The initial state written next to the model is not part of it, the model
+        # keeps its hash once the state was found.
+        self.model_digest = dir_digest(
+            Path(input_file).parent, exclude=(initial_state.INITIAL_STATE_FILE,)
+        )
+        self.model_hash = self.model_digest[:16]
 
-            # Write inflow file.
-            path = f"{os.getcwd()}/{output_dir}/{Path(wind_file_path).stem}.dat"
-            inflow_file.write(path)
+        # Output conversion runs in threads, the heavy lifting in NumPy and polars
+        # releases the GIL.
+        self.converter = ThreadPoolExecutor(conversion_workers)
+        self.conversions = {}
+        self.conversion_errors = {}
 
-            if not initialize_turbine_state:
-                v0_init = None
+        # Path to resource directory.
+        resources = Path(__file__).parent / "resources"
 
-            inflow_files.append((path, v0_init))
+        # Path to model directory.
+        self.model_dir = Path(input_file).parent
 
-    ################################################################################################
-    # Find initial turbine state.
-    if initialize_turbine_state:
-        if custom_initial_state is not None:
-            init_state = pl.read_csv(custom_initial_state)
+        # Path to FAST executable.
+        if custom_fast is not None:
+            self.fast_exe = f"{os.getcwd()}/{custom_fast}"
         else:
-            if os.path.isfile(model_dir / "simdriver_initial_state.csv"):
-                init_state = pl.read_csv(model_dir / "simdriver_initial_state.csv")
-            else:
-                print("running simulation to find initial turbine state ...\n")
-                init_state = initial_state.initial_state(
-                    input_file,
-                    time_step,
-                    fast_version,
-                    custom_fast,
-                    verbose,
-                    **initialization_options,
-                )
-                print("finished simulation to find initial turbine state.\n")
+            self.fast_exe = resources / "OpenFAST.exe"
 
-    ################################################################################################
-    # Run FAST in parallel.
-    # Iterate over inflow files in batches.
-    counter = 1
-    for batch in batched(inflow_files, max_processes):
-        print(
-            f"starting batch {counter}/{math.ceil(len(inflow_files) / float(max_processes))} ...\n"
+        # Create output directory if it does not exist.
+        if not Path(output_dir).exists():
+            Path(output_dir).mkdir(parents=True)
+
+        # Case states of this and previous runs.
+        self.journal = None
+        if resume:
+            self.journal = CaseJournal(output_dir)
+            done = self.journal.summary().get(DONE, 0)
+            if done:
+                print(f"resuming campaign, {done} cases completed before.\n")
+        self.max_attempts = max_attempts
+        self.journal_keys = {}
+
+        # Load input file templates, they are parsed once and rendered for every case.
+        # Fields swept by a case matrix are variable fields of the templates.
+        swept = input_fields({label: None for label in case_fields})
+        if "EDFile" in swept["fst"] or "ServoFile" in swept["fst"]:
+            raise ValueError(
+                "ElastoDyn and ServoDyn files cannot be swept, sweep their fields."
+            )
+        version_id = fast_version.replace(".", "_")
+        try:
+            inflow_file = FASTInputFile(f"{resources}/inflow_template_{version_id}.dat")
+        except Exception:
+            raise ValueError("Error: OpenFAST version not supported.")
+
+        fst_file = FASTInputFile(f"{os.getcwd()}/{input_file}")
+        self.elastodyn_path = fst_file["EDFile"].strip('"')
+        self.servodyn_path = fst_file["ServoFile"].strip('"')
+        self.fst_template = InputTemplate(
+            fst_file, _merge(FST_FIELDS + DAT_FILES, swept["fst"])
+        )
+
+        elastodyn_file = FASTInputFile(
+            f"{os.getcwd()}/{self.model_dir}/{self.elastodyn_path}"
+        )
+        hub_height = elastodyn_file["TowerHt"] + elastodyn_file["Twr2Shft"]
+
+        # Get reference height for steady or uniform wind input.
+        if reference_height is None:
+            reference_height = hub_height
+        self.reference_height = reference_height
+
+        # Get rotor diameter for uniform wind input.
+        self.rotor_diameter = elastodyn_file["TipRad"] * 2
+
+        self.elastodyn_template = InputTemplate(
+            elastodyn_file, _merge(ELASTODYN_FIELDS, swept["elastodyn"])
+        )
+
+        # Output parameters of ServoDyn are the same for all cases.
+        servodyn_file = FASTInputFile(
+            f"{os.getcwd()}/{self.model_dir}/{self.servodyn_path}"
         )
-        counter += 1
-
-        # Iterate over batch and process it in parallel.
-        temp_dirs = []
-        fst_files = []
-        for inflow_file, v0_init in batch:
-            print(f"preparing {Path(inflow_file).stem} ...")
-            # Prepare temporary working directory.
-            temp_dir = f"{os.getcwd()}/{output_dir}/temp_{Path(inflow_file).stem}"
-            temp_dirs.append(temp_dir)
-
-            # Clean up in case previous runs were aborted.
+        servodyn_file["OutList"] = [""] + DEFAULT_SERVODYN_OUT + servodyn_out
+        self.servodyn_template = InputTemplate(servodyn_file, list(swept["servodyn"]))
+
+        # Set wind speed output at hub height.
+        inflow_file["WindVziList"] = hub_height
+        self.inflow_template = InputTemplate(
+            inflow_file, _merge(INFLOW_FIELDS, swept["inflow"])
+        )
+
+        for module, template in [
+            ("fst", self.fst_template),
+            ("elastodyn", self.elastodyn_template),
+            ("servodyn", self.servodyn_template),
+            ("inflow", self.inflow_template),
+        ]:
+            missing = [
+                label for label in swept[module] if label not in template.defaults
+            ]
+            if missing:
+                raise ValueError(
+                    f"Fields not found in {module} input file: {', '.join(missing)}."
+                )
+
+        # Stage one shared copy of the model, cases only contain modified files.
+        if staging == "copy":
+            self.shared_model = None
+        elif staging == "link":
+            self.shared_model = self.temp_dir("model")
             try:
-                rmtree(temp_dir)
+                rmtree(self.shared_model)
             except Exception:
                 pass
+            copytree(self.model_dir, self.shared_model)
+        else:
+            raise ValueError("Unknown staging. Use 'copy' or 'link'.")
 
-            copytree(model_dir, temp_dir)
-
-            # Prepare FAST input file.
-            fst_file = FASTInputFile(f"{os.getcwd()}/{input_file}")
-
-            fst_file["InflowFile"] = f'"{inflow_file}"'
-
-            fst_file["TMax"] = time_span
-            fst_file["DT"] = time_step
-            fst_file["OutFileFmt"] = 2
-            fst_file["SumPrint"] = True
-
-            dat_files = [
-                "EDFile",
-                "BDBldFile(1)",
-                "BDBldFile(2)",
-                "BDBldFile(3)",
-                "AeroFile",
-                "ServoFile",
-                "HydroFile",
-                "SubFile",
-                "MooringFile",
-                "IceFile",
-                "SWELidarFile",
-            ]
-            for dat_file in dat_files:
-                try:
-                    fst_file[dat_file] = f'"{temp_dir}/{fst_file[dat_file].strip('"')}"'
-                except Exception:
-                    pass
-
-            # Set initial turbine state.
-            elastodyn_file = FASTInputFile(fst_file["EDFile"].strip('"'))
-            if initialize_turbine_state:
-                elastodyn_file["OoPDefl"] = np.interp(
-                    v0_init, init_state["v0"], init_state["OoPDefl"]
-                )
-                elastodyn_file["IPDefl"] = np.interp(
-                    v0_init, init_state["v0"], init_state["IPDefl"]
-                )
-                pitch = np.interp(v0_init, init_state["v0"], init_state["pitch"])
-                elastodyn_file["BlPitch(1)"] = pitch
-                elastodyn_file["BlPitch(2)"] = pitch
-                elastodyn_file["BlPitch(3)"] = pitch
-                elastodyn_file["RotSpeed"] = np.interp(
-                    v0_init, init_state["v0"], init_state["rot_speed"]
-                )
-                elastodyn_file["TTDspFA"] = np.interp(
-                    v0_init, init_state["v0"], init_state["TTDspFA"]
+    def steady_case(self, u: float) -> tuple[str, float]:
+        """Write inflow file for steady wind speed `u`, return path and initial wind speed."""
+        id = f"U_{float(u):05.2f}".replace(".", "d")
+        with self.instrumentation.phase(id, "inflow"):
+            return self.steady_inflow(id, u)
+
+    def steady_inflow(
+        self, id: str, u: float, inflow_fields: dict = {}
+    ) -> tuple[str, float]:
+        """Write inflow file of a steady wind case."""
+        # Set wind input to steady wind.
+        inflow = {"WindType": 1}
+
+        # Configure steady wind inflow parameters.
+        inflow["RefHt"] = self.reference_height
+        inflow["PLexp"] = self.steady_power_law_exponent
+        inflow["HWindSpeed"] = u
+        inflow |= inflow_fields
+
+        # Write inflow file.
+        path = f"{os.getcwd()}/{self.output_dir}/{id}.dat"
+        self.inflow_template.write(path, inflow)
+        self.record_case(id, wind_speed=u)
+
+        return path, u
+
+    def wind_case(
+        self, wind_file_path: str, wind_metadata: dict | None = None
+    ) -> tuple[str, float | None]:
+        """Write inflow file for a wind input file, return path and initial wind speed."""
+        with self.instrumentation.phase(Path(wind_file_path).stem, "inflow"):
+            return self.wind_inflow(wind_file_path, wind_metadata=wind_metadata)
+
+    def wind_inflow(
+        self,
+        wind_file_path: str,
+        id: str | None = None,
+        inflow_fields: dict = {},
+        wind_metadata: dict | None = None,
+    ) -> tuple[str, float | None]:
+        """
+        Write inflow file of a wind file case, named after the wind file by default.
+
+        The parameters of the wind file are looked up in the metadata table next to
+        it, unless they are given as `wind_metadata`.
+        """
+        v0_init = None
+        if id is None:
+            id = Path(wind_file_path).stem
+
+        if wind_file_path.endswith("hh"):
+            # Set wind input to uniform wind.
+            inflow = {"WindType": 2}
+
+            inflow["FileName_Uni"] = f'"{os.getcwd()}/{wind_file_path}"'
+            wind_inputs = (f"{os.getcwd()}/{wind_file_path}", [wind_file_path])
+            inflow["RefHt_Uni"] = self.reference_height
+            inflow["RefLength"] = self.rotor_diameter
+
+        elif wind_file_path.endswith("bts"):
+            # Set wind input to TurbSim.
+            inflow = {"WindType": 3}
+
+            # Try both for compatibility with older versions.
+            inflow["Filename"] = f'"{os.getcwd()}/{wind_file_path}"'
+            inflow["Filename_BTS"] = f'"{os.getcwd()}/{wind_file_path}"'
+            wind_inputs = (f"{os.getcwd()}/{wind_file_path}", [wind_file_path])
+
+        elif wind_file_path.endswith("wnd"):
+            # Set wind input to TurbSim.
+            inflow = {"WindType": 4}
+
+            inflow["FilenameRoot"] = (
+                f'"{os.getcwd()}/{wind_file_path.removesuffix(".wnd")}"'
+            )
+            wind_inputs = (
+                f"{os.getcwd()}/{wind_file_path.removesuffix(".wnd")}",
+                [wind_file_path, wind_file_path.removesuffix(".wnd") + ".sum"],
+            )
+
+        else:
+            raise ValueError("Unknown wind file. Use '.bts', '.wnd' or '.hh'.")
+
+        # Get initial wind speed from the wind file index, which reads only headers.
+        if self.initialize_turbine_state:
+            v0_init = self.wind_index.info(wind_file_path)["initial_wind_speed"]
+
+        # Write inflow file.
+        inflow |= inflow_fields
+        path = f"{os.getcwd()}/{self.output_dir}/{id}.dat"
+        self.inflow_template.write(path, inflow)
+        self.wind_inputs[path] = wind_inputs
+
+        # Case parameters are recorded by run_turbsim next to the wind files.
+        if wind_metadata is None:
+            wind_metadata = self.wind_metadata(wind_file_path)
+        self.record_case(
+            id,
+            wind_speed=wind_metadata.get("wind_speed", v0_init),
+            turbulence_intensity=wind_metadata.get("turbulence_intensity"),
+            seed=wind_metadata.get("seed"),
+            wind_file=f"{os.getcwd()}/{wind_file_path}",
+        )
+
+        return path, v0_init
+
+    def wind_metadata(self, wind_file_path: str) -> dict:
+        """Parameters of a wind file recorded by run_turbsim, empty if unknown."""
+        wind_dir = Path(wind_file_path).parent
+        if wind_dir not in self.wind_metadata_tables:
+            self.wind_metadata_tables[wind_dir] = read_metadata(
+                wind_dir / WIND_METADATA
+            )
+
+        return self.wind_metadata_tables[wind_dir].get(Path(wind_file_path).stem, {})
+
+    def matrix_case(self, name: str, case: dict) -> tuple[str, float | None, dict]:
+        """
+        Write inflow file of a case matrix case.
+
+        Returns:
+            Path to the inflow file, initial wind speed and the field values of the
+            case by input file.
+        """
+        fields = input_fields(case)
+        with self.instrumentation.phase(name, "inflow"):
+            if "wind_file" in case:
+                inflow_file, v0_init = self.wind_inflow(
+                    case["wind_file"], name, fields["inflow"]
                 )
-                elastodyn_file["TTDspSS"] = np.interp(
-                    v0_init, init_state["v0"], init_state["TTDspSS"]
+            elif "wind_speed" in case:
+                inflow_file, v0_init = self.steady_inflow(
+                    name, case["wind_speed"], fields["inflow"]
                 )
             else:
-                # Set initial rotor speed to 5 rpm as a default assumption.
-                elastodyn_file["RotSpeed"] = 5
-
-            # Set output parameters.
-            # ElastoDyn.
-            elastodyn_file["OutList"] = [""] + DEFAULT_ELASTODYN_OUT + elastodyn_out
-            elastodyn_file.write(fst_file["EDFile"].strip('"'))
-
-            # ServoDyn.
-            servodyn_file = FASTInputFile(fst_file["ServoFile"].strip('"'))
-            servodyn_file["OutList"] = [""] + DEFAULT_SERVODYN_OUT + servodyn_out
-            servodyn_file.write(fst_file["ServoFile"].strip('"'))
-
-            # Write input file.
-            fst_file_path = f"{output_dir}/{Path(inflow_file).stem}.fst"
-            fst_file.write(fst_file_path)
-            fst_files.append(fst_file_path)
-
-        # Run FAST.
-        print("\nrunning OpenFAST ...\n")
-        tasks = []
-        outfiles = []
-        for fst_file_path in fst_files:
-            stdout = Path(fst_file_path).with_suffix(".out")
-            outfiles.append(stdout)
-            tasks.append(
-                (
-                    subprocess.Popen(
-                        [fast_exe, fst_file_path],
-                        stdout=open(stdout, "w"),
-                        stderr=subprocess.STDOUT,
-                    ),
-                    Path(fst_file_path).stem,
+                raise ValueError(
+                    "Case matrix needs a 'wind_speed' or 'wind_file' sweep."
                 )
+
+        # Swept fields are recorded as additional case metadata.
+        self.metadata[name] |= {
+            label: value for label, value in case.items() if label not in WIND_FIELDS
+        }
+
+        return inflow_file, v0_init, fields
+
+    def matrix_jobs(self, case_matrix: CaseMatrix) -> Iterator[Job]:
+        """Yield the jobs of all cases of a case matrix, generated on demand."""
+        for name, case in case_matrix:
+            inflow_file, v0_init, fields = self.matrix_case(name, case)
+            yield self.job(inflow_file, v0_init, fields)
+
+    def record_case(
+        self,
+        case: str,
+        wind_speed: float | None = None,
+        turbulence_intensity: str | float | None = None,
+        seed: int | None = None,
+        wind_file: str | None = None,
+    ):
+        """Record case metadata for the consolidated dataset."""
+        self.metadata[case] = {
+            "case": case,
+            "wind_speed": None if wind_speed is None else float(wind_speed),
+            "turbulence_intensity": turbulence_intensity,
+            "seed": seed,
+            "wind_file": wind_file,
+            "time_span": self.time_span,
+            "time_step": self.time_step,
+            "output_time_step": self.storage["output_time_step"],
+            "model_hash": self.model_hash,
+        }
+
+    def load_initial_state(
+        self,
+        custom_initial_state: str | None = None,
+        initialization_options: dict = {},
+    ):
+        """Load initial turbine state, run simulation to find it if necessary."""
+        if not self.initialize_turbine_state:
+            return
+
+        if custom_initial_state is not None:
+            init_state = pl.read_csv(custom_initial_state)
+        elif os.path.isfile(self.model_dir / initial_state.INITIAL_STATE_FILE):
+            init_state = pl.read_csv(self.model_dir / initial_state.INITIAL_STATE_FILE)
+        else:
+            print("running simulation to find initial turbine state ...\n")
+            init_state = initial_state.initial_state(
+                self.input_file,
+                self.time_step,
+                self.fast_version,
+                self.custom_fast,
+                self.verbose,
+                **({"hooks": [self.instrumentation.record]} | initialization_options),
             )
+            print("finished simulation to find initial turbine state.\n")
 
-        # Wait for all tasks to finish.
-        error = False
-        for task, case in tasks:
-            return_code = task.wait()
-            print(f"task {case} finished with return code {return_code}.")
-            if return_code != 0:
-                error = True
-
-        print("")
-
-        # Print stdout and stderr.
-        if verbose:
-            for file in outfiles:
-                print(f"########## {Path(file).stem} ##########\n")
-                print(open(file, "r").read())
-
-        # Exit due to error or clean up temporary directories.
-        if not error:
-            for temp_dir in temp_dirs:
-                # Ugly hack, I don't know why this is necessary.
-                for _ in range(10):
-                    try:
-                        rmtree(temp_dir, ignore_errors=True)
-                        Path(temp_dir).rmdir()
-                    except Exception:
-                        pass
+        # Keep columns as arrays for fast interpolation during staging.
+        self.init_state = {
+            column: init_state[column].to_numpy() for column in init_state.columns
+        }
 
-    ################################################################################################
-    # Process output.
-    print("processing output ...")
-    failures = []
-    for inflow_file, _ in inflow_files:
+    def load_warm_start(self, max_processes: int):
+        """Load spin-up end states of all wind speed bins, run missing spin-ups."""
+        if self.warm_start_dir is None or not self.initialize_turbine_state:
+            return
+
+        self.warm_states = warm_start.spin_up_states(
+            self.warm_start_dir,
+            self.output_dir,
+            self.input_file,
+            warm_start.wind_bins(self.init_state["v0"], self.warm_start_bin_width),
+            hash_parts(
+                file_digest(self.fast_exe),
+                self.model_digest,
+                self.fast_version,
+                f"{self.time_step}",
+                f"{self.spin_up_time}",
+                f"{self.steady_power_law_exponent}",
+                f"{self.reference_height}",
+            ),
+            self.spin_up_time,
+            self.time_step,
+            self.steady_power_law_exponent,
+            pl.DataFrame(self.init_state),
+            self.custom_fast,
+            self.fast_version,
+            max_processes,
+            self.verbose,
+            [self.instrumentation.record],
+        )
+
+    def job(self, inflow_file: str, v0_init: float | None, fields: dict = {}) -> Job:
+        """
+        Create scheduler job for one case, staging is deferred until launch.
+
+        Args:
+            inflow_file: Path to the inflow file of the case.
+            v0_init: Initial wind speed in m/s.
+            fields: Values of swept input file fields by input file, see
+                    `simdriver.case_matrix.input_fields`.
+        """
+        name = Path(inflow_file).stem
+        if self.journal is not None and self.journal.state(name) is None:
+            self.journal.record(name, PENDING)
+
+        # The text output of OpenFAST takes the place of the log for channel guards.
+        watch = None
+        stdout = Path(f"{self.output_dir}/{name}.out")
+        if self.health is not None:
+            if self.channel_output:
+                watch = HealthGuard(self.health, stdout, RENAME)
+                stdout = stdout.with_suffix(".log")
+            else:
+                watch = HealthGuard(self.health)
+
+        return Job(
+            name=name,
+            stdout=stdout,
+            prepare=lambda: self.stage(inflow_file, v0_init, fields),
+            finish=self.finish,
+            memory=self.case_memory(inflow_file),
+            watch=watch,
+        )
+
+    def case_memory(self, inflow_file: str) -> float:
+        """Estimated peak memory of the OpenFAST process of a case in MB."""
+        channels = (
+            1
+            + len(DEFAULT_ELASTODYN_OUT)
+            + len(self.elastodyn_out)
+            + len(DEFAULT_SERVODYN_OUT)
+            + len(self.servodyn_out)
+        )
+        output_time_step = self.storage["output_time_step"] or self.time_step
+        _, wind_files = self.wind_inputs.get(inflow_file, (None, []))
+        return admission.fast_memory(
+            channels, self.time_span, output_time_step, wind_files
+        )
+
+    def stage(
+        self, inflow_file: str, v0_init: float | None, fields: dict = {}
+    ) -> list | None:
+        """Stage one case, return command line or None if a cached result was used."""
+        name = Path(inflow_file).stem
+        print(f"preparing {name} ...")
+        with self.instrumentation.phase(name, "initial_state"):
+            elastodyn = self.initial_conditions(v0_init)
+
+        # Swept fields override the initial conditions.
+        elastodyn |= fields.get("elastodyn", {})
+
+        if self.journal is None:
+            with self.instrumentation.phase(name, "staging"):
+                return self.stage_model(inflow_file, elastodyn, fields)
+
+        # Skip cases completed by a previous run.
+        key = self.journal_key(inflow_file, elastodyn, fields)
+        self.journal_keys[name] = key
+        if (
+            self.journal.is_done(name, key)
+            and Path(f"{self.output_dir}/{name}.parquet").exists()
+        ):
+            print(f"found completed result for {name}.")
+            self.cached.add(name)
+            self.add_to_dataset(name)
+            return None
+
+        attempts = self.journal.failed_attempts(name, key)
+        if attempts >= self.max_attempts:
+            raise RuntimeError(f"case failed {attempts} times, not retried.")
+
+        with self.instrumentation.phase(name, "staging"):
+            command = self.stage_model(inflow_file, elastodyn, fields)
+
+        self.journal.record(name, DONE if command is None else RUNNING, key)
+        return command
+
+    def initial_conditions(self, v0_init: float | None) -> dict:
+        """ElastoDyn initial conditions for initial wind speed `v0_init`."""
+        # Set initial turbine state.
+        elastodyn = {}
+        if self.warm_states is not None:
+            # Start from the end of the spin-up in the closest wind speed bin.
+            wind_bin = min(self.warm_states, key=lambda v: abs(v - v0_init))
+            elastodyn.update(self.warm_states[wind_bin])
+        elif self.initialize_turbine_state:
+            state = self.init_state
+            v0 = state["v0"]
+            elastodyn["OoPDefl"] = np.interp(v0_init, v0, state["OoPDefl"])
+            elastodyn["IPDefl"] = np.interp(v0_init, v0, state["IPDefl"])
+            pitch = np.interp(v0_init, v0, state["pitch"])
+            elastodyn["BlPitch(1)"] = pitch
+            elastodyn["BlPitch(2)"] = pitch
+            elastodyn["BlPitch(3)"] = pitch
+            elastodyn["RotSpeed"] = np.interp(v0_init, v0, state["rot_speed"])
+            elastodyn["TTDspFA"] = np.interp(v0_init, v0, state["TTDspFA"])
+            elastodyn["TTDspSS"] = np.interp(v0_init, v0, state["TTDspSS"])
+        else:
+            # Set initial rotor speed to 5 rpm as a default assumption.
+            elastodyn["RotSpeed"] = 5
+
+        return elastodyn
+
+    def stage_model(
+        self, inflow_file: str, elastodyn: dict, fields: dict = {}
+    ) -> list | None:
+        """Prepare working directory and input files of one case, return command line."""
+        # Prepare temporary working directory.
+        temp_dir = self.temp_dir(Path(inflow_file).stem)
+
+        # Clean up in case previous runs were aborted.
         try:
-            # Load FAST output file.
-            output_file = FASTOutputFile(f"{output_dir}/{Path(inflow_file).stem}.outb")
+            rmtree(temp_dir)
+        except Exception:
+            pass
 
-            # Convert to parquet.
-            output_file.toDataFrame().rename(columns=RENAME).to_parquet(
-                f"{output_dir}/{Path(inflow_file).stem}.parquet"
+        if self.shared_model is None:
+            copytree(self.model_dir, temp_dir)
+            model_source = temp_dir
+        else:
+            link_model(
+                self.shared_model, temp_dir, [self.elastodyn_path, self.servodyn_path]
             )
+            model_source = self.shared_model
+
+        # Prepare FAST input file.
+        fst = {"InflowFile": f'"{inflow_file}"'}
+
+        fst["TMax"] = self.time_span
+        fst["DT"] = self.time_step
+        if self.storage["output_time_step"] is not None:
+            fst["DT_Out"] = self.storage["output_time_step"]
+        fst["OutFileFmt"] = 3 if self.channel_output else 2
+        fst["SumPrint"] = True
+        fst |= fields.get("fst", {})
+
+        # Point unmodified files to the model source, ElastoDyn and ServoDyn to the case.
+        # Swept module files are relative to the model directory as well.
+        for dat_file in DAT_FILES:
+            if dat_file not in self.fst_template.defaults:
+                continue
+            if dat_file in ["EDFile", "ServoFile"]:
+                base_dir = temp_dir
+            else:
+                base_dir = model_source
+            dat_path = fst.get(dat_file, self.fst_template.defaults[dat_file])
+            fst[dat_file] = f'"{base_dir}/{str(dat_path).strip('"')}"'
+
+        # Set output parameters.
+        # ElastoDyn.
+        elastodyn["OutList"] = [""] + DEFAULT_ELASTODYN_OUT + self.elastodyn_out
+        self.elastodyn_template.write(f"{temp_dir}/{self.elastodyn_path}", elastodyn)
+
+        # ServoDyn.
+        self.servodyn_template.write(
+            f"{temp_dir}/{self.servodyn_path}", fields.get("servodyn", {})
+        )
+
+        # Write input file.
+        fst_file_path = f"{self.output_dir}/{Path(inflow_file).stem}.fst"
+        self.fst_template.write(fst_file_path, fst)
+
+        # Use cached result if the same case was simulated before.
+        if self.cache is not None:
+            name = Path(inflow_file).stem
+            key = self.case_key(inflow_file, temp_dir, fst_file_path)
+            self.case_keys[name] = key
+            if self.cache.fetch(key, self.result_files(name)):
+                print(f"found cached result for {name}.")
+                self.cached.add(name)
+                self.add_to_dataset(name)
+                self.remove_temp_dir(name)
+                return None
+
+        return [self.fast_exe, fst_file_path]
+
+    def journal_key(self, inflow_file: str, elastodyn: dict, fields: dict = {}) -> str:
+        """Hash of the inputs of a case, available before staging."""
+        # Wind files are identified by size and modification time, hashing their
+        # content on every restart would take longer than many simulations.
+        wind_stats = []
+        if inflow_file in self.wind_inputs:
+            _, wind_files = self.wind_inputs[inflow_file]
+            for file in wind_files:
+                stat = Path(file).stat()
+                wind_stats.append(f"{file}:{stat.st_size}:{stat.st_mtime_ns}")
+
+        return hash_parts(
+            "simdriver-journal-1",
+            self.model_hash,
+            file_digest(self.fast_exe),
+            json.dumps(self.storage, sort_keys=True),
+            json.dumps(
+                [self.time_span, self.time_step, self.elastodyn_out, self.servodyn_out]
+            ),
+            json.dumps(elastodyn, sort_keys=True, default=float),
+            *([json.dumps(fields, sort_keys=True, default=str)] if fields else []),
+            Path(inflow_file).read_text(),
+            *wind_stats,
+        )
+
+    def case_key(self, inflow_file: str, temp_dir: str, fst_file_path: str) -> str:
+        """Hash of all inputs of a staged case, independent of file names."""
+        fst = Path(fst_file_path).read_text()
+        fst = fst.replace(temp_dir, "<model>").replace(inflow_file, "<inflow>")
+        if self.shared_model is not None:
+            fst = fst.replace(self.shared_model, "<model>")
+
+        inflow = Path(inflow_file).read_text()
+        wind_digests = []
+        if inflow_file in self.wind_inputs:
+            wind_path, wind_files = self.wind_inputs[inflow_file]
+            inflow = inflow.replace(wind_path, "<wind>")
+            wind_digests = [file_digest(file) for file in wind_files]
+
+        return hash_parts(
+            "simdriver-fast-1",
+            json.dumps(self.storage, sort_keys=True),
+            file_digest(self.fast_exe),
+            dir_digest(temp_dir),
+            fst,
+            inflow,
+            *wind_digests,
+        )
+
+    def result_files(self, case: str) -> dict[str, str]:
+        """Paths to the result files of a case, by cache role."""
+        files = {".parquet": f"{self.output_dir}/{case}.parquet"}
+        if self.storage["keep_binary"]:
+            files[".outb"] = f"{self.output_dir}/{case}.outb"
+
+        return files
+
+    def finish(self, job: Job):
+        """Start output conversion and clean up working directory of a finished case."""
+        self.instrumentation.job(job)
+
+        # Keep temporary directory of failed cases for debugging.
+        if job.return_code != 0:
+            with self.lock:
+                self.n_failed += 1
+            if self.journal is not None and job.ran:
+                self.journal.record(
+                    job.name,
+                    FAILED,
+                    self.journal_keys.get(job.name),
+                    job.return_code,
+                    job.error,
+                )
+        else:
+            with self.instrumentation.phase(job.name, "cleanup"):
+                self.remove_temp_dir(job.name)
+
+        # Convert output while the remaining cases are running. Results taken from
+        # the cache or a previous run are analyzed from their parquet output, unless
+        # they are already in the summary.
+        if job.ran:
+            self.submit(job.name, self.convert, job.name, job.return_code == 0)
+        elif (
+            job.name in self.cached
+            and self.analysis is not None
+            and job.name not in self.summarized
+        ):
+            self.submit(job.name, self.analyze_output, job.name)
+        elif self.release_cases:
+            self.release(job.name)
+
+    def submit(self, case: str, function: Callable, *args):
+        """Run output processing of a case in the converter threads."""
+        future = self.converter.submit(function, *args)
+        self.conversions[case] = future
+        future.add_done_callback(lambda future: self.processed(case, future))
+
+    def processed(self, case: str, future):
+        """Record failed output processing of a case, release the case."""
+        error = future.exception()
+        if error is not None:
+            self.conversion_errors[case] = f"{type(error).__name__}: {error}"
+
+        if self.release_cases:
+            self.conversions.pop(case, None)
+            self.release(case)
+
+    def convert(self, case: str, success: bool):
+        """Convert binary output of a case to parquet and add it to the cache."""
+        try:
+            with self.instrumentation.phase(case, "conversion"):
+                data = outb_to_parquet(
+                    f"{self.output_dir}/{case}.outb",
+                    f"{self.output_dir}/{case}.parquet",
+                    rename=RENAME,
+                    dtype=np.dtype(self.storage["dtype"]).type,
+                    compression=self.storage["compression"],
+                    compression_level=self.storage["compression_level"],
+                    row_group_size=self.storage["row_group_size"],
+                    verify=not self.storage["keep_binary"],
+                )
+
+            # Analyze the output while it is in memory, the parquet file is not read
+            # again. A case whose analysis fails is not complete and runs again.
+            if success and self.analysis is not None:
+                self.analyze_case(case, data)
         except Exception:
-            failures.append(Path(inflow_file).stem)
+            if self.journal is not None and success:
+                self.journal.record(case, FAILED, self.journal_keys.get(case), 0)
+            raise
 
-    if len(failures):
-        print(f"processing of {len(inflow_files)} cases failed:")
-        for failure in failures:
-            print(failure)
+        with self.instrumentation.phase(case, "caching"):
+            self.add_to_dataset(case)
 
-    # Print completion message.
-    if error:
-        print("\nOpenFAST terminated, errors occured.\n")
-    else:
-        print("\nOpenFAST simulation completed successfully.\n")
+            # The case is complete once its output is converted and analyzed.
+            if self.journal is not None and success:
+                self.journal.record(case, DONE, self.journal_keys.get(case), 0)
+
+            # Add result to cache.
+            if success and self.cache is not None and case in self.case_keys:
+                self.cache.store(self.case_keys[case], self.result_files(case))
+
+            # Binary output and log of failed cases are kept for debugging.
+            if success and not self.storage["keep_binary"]:
+                Path(f"{self.output_dir}/{case}.outb").unlink(missing_ok=True)
+                Path(f"{self.output_dir}/{case}.out").unlink(missing_ok=True)
+                Path(f"{self.output_dir}/{case}.log").unlink(missing_ok=True)
+
+            # Text output is only written for the health guards.
+            if success and self.channel_output:
+                Path(f"{self.output_dir}/{case}.out").unlink(missing_ok=True)
+
+    def analyze_output(self, case: str):
+        """Compute the summary row of a case from its parquet output."""
+        output = pl.read_parquet(f"{self.output_dir}/{case}.parquet")
+        self.analyze_case(
+            case, {column: output[column].to_numpy() for column in output.columns}
+        )
+
+    def analyze_case(self, case: str, data: dict[str, np.ndarray]):
+        """Compute the summary row of a case from its output channels."""
+        with self.instrumentation.phase(case, "analysis"):
+            self.summary_rows[case] = analyze(
+                data, self.analysis, f"{self.output_dir}/{PSD_DIR}/{case}.parquet"
+            )
+
+    def remove_temp_dir(self, case: str):
+        """Remove temporary working directory of a case."""
+        temp_dir = self.temp_dir(case)
+        # Ugly hack, I don't know why this is necessary.
+        for _ in range(10):
+            try:
+                rmtree(temp_dir, ignore_errors=True)
+                Path(temp_dir).rmdir()
+            except Exception:
+                pass
+
+    def temp_dir(self, case: str) -> str:
+        """Path to temporary working directory of a case."""
+        return f"{os.getcwd()}/{self.output_dir}/temp_{case}"
+
+    def add_to_dataset(self, case: str):
+        """Link parquet output of a case into the hive-partitioned dataset."""
+        partition = partition_dir(self.metadata[case])
+        self.metadata[case]["path"] = partition
+
+        # Remove the case from its old partition if its parameters changed.
+        old = self.dataset_cases.get(case, {}).get("path")
+        if old is not None and old != partition:
+            rmtree(f"{self.output_dir}/{DATASET_DIR}/{old}", ignore_errors=True)
+
+        target = Path(f"{self.output_dir}/{DATASET_DIR}/{partition}")
+        target.mkdir(parents=True, exist_ok=True)
+        link_or_copy(f"{self.output_dir}/{case}.parquet", target / "data.parquet")
+
+    def release(self, case: str):
+        """
+        Queue the metadata and summary rows of a processed case, drop its state.
+
+        The rows are written once `METADATA_BATCH` cases are queued, so the memory of
+        a campaign does not grow with its number of cases.
+        """
+        metadata = self.metadata.pop(case, {})
+        summary = self.summary_rows.pop(case, None)
+        self.journal_keys.pop(case, None)
+        self.case_keys.pop(case, None)
+        self.cached.discard(case)
+        self.wind_inputs.pop(f"{os.getcwd()}/{self.output_dir}/{case}.dat", None)
+
+        with self.lock:
+            if "path" in metadata:
+                self.metadata_rows.append(metadata)
+            if summary is not None:
+                self.summary_batch.append(
+                    {"case": case}
+                    | {key: metadata.get(key) for key in PARTITIONS}
+                    | summary
+                )
+            if len(self.metadata_rows) + len(self.summary_batch) >= METADATA_BATCH:
+                self.write_rows()
+
+    def write_rows(self):
+        """Add the queued rows to the metadata and summary tables."""
+        if self.metadata_rows:
+            update_metadata(Path(self.output_dir) / CASE_METADATA, self.metadata_rows)
+        if self.summary_batch:
+            update_metadata(Path(self.output_dir) / SUMMARY, self.summary_batch)
+        self.metadata_rows = []
+        self.summary_batch = []
+
+    def process_output(self) -> list[str]:
+        """Wait for output processing of all cases, return failed cases."""
+        print("processing output ...")
+        self.converter.shutdown()
+
+        # Record the remaining metadata of the cases in the dataset.
+        with self.lock:
+            self.write_rows()
+
+        failures = list(self.conversion_errors)
+        if len(failures):
+            print(f"processing of {len(failures)} cases failed:")
+            for failure in failures:
+                print(failure)
+
+        return failures
+
+    def close(self):
+        """Close the journal, remove shared model copy unless failed cases link to it."""
+        self.wind_index.save()
+        if self.journal is not None:
+            self.journal.close()
+
+        if self.shared_model is None:
+            return
+
+        if self.n_failed == 0:
+            rmtree(self.shared_model, ignore_errors=True)
+
+    def report(self):
+        """Write run report and print completion message."""
+        self.instrumentation.write_report(self.output_dir)
+
+        if self.n_failed:
+            print("\nOpenFAST terminated, errors occured.\n")
+        else:
+            print("\nOpenFAST simulation completed successfully.\n")
+
+
+def link_model(source: str | Path, target: str | Path, modified: list[str]):
+    """
+    Mirror a model directory through symbolic links, except for modified files.
+
+    Directories that contain modified files are created as real directories, so the
+    modified files can be written without touching the source. Where symbolic links
+    are not supported, files are copied instead.
+
+    Args:
+        source: Path to the model directory.
+        target: Path to the case directory to create.
+        modified: Paths of modified files, relative to the model directory.
+    """
+    modified = [Path(path) for path in modified]
+    Path(target).mkdir(parents=True, exist_ok=True)
+    for entry in Path(source).iterdir():
+        rel = Path(entry.name)
+        if rel in modified:
+            continue
+
+        if entry.is_dir() and any(rel in path.parents for path in modified):
+            link_model(
+                entry,
+                Path(target) / entry.name,
+                [path.relative_to(rel) for path in modified if rel in path.parents],
+            )
+            continue
+
+        try:
+            os.symlink(entry.resolve(), Path(target) / entry.name, entry.is_dir())
+        except OSError:
+            if entry.is_dir():
+                copytree(entry, Path(target) / entry.name)
+            else:
+                copy2(entry, Path(target) / entry.name)
+
+
+def _merge(fields: list[str], extra: list[str]) -> list[str]:
+    """Template field labels with additional labels, without duplicates."""
+    return fields + [label for label in extra if label not in fields]
@@ -1,11 +1,20 @@
-import subprocess
+import os
 import random
-from itertools import product, batched
+import sys
+from collections.abc import Callable, Iterator
+from itertools import product
 from pathlib import Path
-import math
 
 from weio import FASTInputFile
 
+from . import admission, turbulence
+from .cache import FileCache, file_digest, hash_parts
+from .instrumentation import Instrumentation
+from .monitor import progress_monitor
+from .results import METADATA_BATCH, WIND_METADATA, update_metadata
+from .scheduler import Job, run_jobs
+from .work_queue import run_queued
+
 
 def run_turbsim(
     output_dir: str,
@@ -26,8 +35,18 @@ def run_turbsim(
     wind_fields_per_case: int = 1,
     first_wind_field_number: int = 1,
     additional_params: dict = {},
+    seeds: list[int] | None = None,
+    cache_dir: str | None = None,
+    cache_size_limit: float | None = None,
+    custom_turbsim: str | None = None,
+    generator: str = "turbsim",
     max_processes: int = 20,
     verbose: bool = False,
+    progress: bool | str | Callable[[dict], None] = False,
+    hooks: list[Callable[[dict], None]] = [],
+    queue_dir: str | None = None,
+    memory_budget: float | str | None = "auto",
+    cpu_affinity: bool = False,
 ):
     """
     Run TurbSim in parallel to generate turbulent wind fields.
@@ -52,128 +71,349 @@ def run_turbsim(
         wind_fields_per_case: Number of wind fields with different seeds per case.
         first_wind_field_number: Number of first wind field when multiple are generated, default is 1.
         additional_params: Additional input parameters as dictionary.
+        seeds: Explicit random seeds, one per wind field number, overrides `rand_seed`.
+        cache_dir: Relative path to wind field cache, fields with identical inputs are
+                   only generated once. Requires `rand_seed` or `seeds`. Default is no caching.
+        cache_size_limit: Maximum size of the wind field cache in GB, default is unlimited.
+        custom_turbsim: Relative path to custom TurbSim executable.
+        generator: Wind field generator, 'turbsim' or 'builtin'. The built-in generator
+                   is NumPy-based, runs without the TurbSim executable and writes .bts
+                   files with the IEC Kaimal model and normal turbulence, see
+                   `simdriver.turbulence`. It is much faster for small and medium
+                   grids. Its random numbers differ from TurbSim, so a seed gives a
+                   different field than TurbSim with the same seed.
         max_processes: Maximum number of parallel processes.
         verbose: print stdout and stderr of TurbSim.
+        progress: Report live progress. True prints campaign progress, throughput and
+                  ETA periodically, a path additionally appends all progress events to a
+                  JSON lines file, a callable receives all progress events.
+        hooks: Callables receiving a timing and resource record for each phase of each
+               case, see `simdriver.instrumentation.Instrumentation`. All records are
+               also written to 'simdriver_report.json' in the output directory.
+        queue_dir: Relative path to a work queue directory on a shared filesystem. Cases
+                   are run by `simdriver worker` processes serving the queue on any
+                   host, `max_processes` then limits the number of queued cases.
+                   Default is to run all cases locally.
+        memory_budget: Memory budget in GB for all parallel processes. Cases only start
+                       when their estimated peak memory fits into the budget, 'auto'
+                       uses 90 % of the available memory, None disables the budget.
+        cpu_affinity: Pin each process to one physical core, spread over the NUMA
+                      nodes, and run at most one process per core. Linux only.
     """
-    # Path to resource directory.
-    resources = Path(__file__).parent / "resources"
-
-    # Create output directory if it does not exist.
-    if not Path(output_dir).exists():
-        Path(output_dir).mkdir(parents=True)
-
-    # Load template input file.
-    file = FASTInputFile(resources / "turbsim_template.inp")
-
-    # Apply scalar parameters.
-    file["NumGrid_Y"] = grid_points_horizontal
-    file["NumGrid_Z"] = grid_points_vertical
-    file["GridWidth"] = grid_size_horizontal
-    file["GridHeight"] = grid_size_vertical
-    file["HubHt"] = hub_height
-    file["AnalysisTime"] = time_span
-    file["TimeStep"] = time_step
-
-    if output_type == "bts":
-        file["WrADFF"] = True
-        file["WrBLFF"] = False
-    elif output_type == "wnd":
-        file["WrADFF"] = False
-        file["WrBLFF"] = True
-    else:
-        raise ValueError("Unknown output_type. Use 'bts' our 'wnd'.")
+    campaign = TurbSimCampaign(
+        output_dir=output_dir,
+        grid_points_horizontal=grid_points_horizontal,
+        grid_points_vertical=grid_points_vertical,
+        grid_size_horizontal=grid_size_horizontal,
+        grid_size_vertical=grid_size_vertical,
+        hub_height=hub_height,
+        wind_speed=wind_speed,
+        turbulence_intensity=turbulence_intensity,
+        wind_and_ti=wind_and_ti,
+        ref_height=ref_height,
+        time_span=time_span,
+        time_step=time_step,
+        output_type=output_type,
+        rand_seed=rand_seed,
+        power_law_exponent=power_law_exponent,
+        wind_fields_per_case=wind_fields_per_case,
+        first_wind_field_number=first_wind_field_number,
+        additional_params=additional_params,
+        seeds=seeds,
+        cache_dir=cache_dir,
+        cache_size_limit=cache_size_limit,
+        custom_turbsim=custom_turbsim,
+        generator=generator,
+        hooks=hooks,
+    )
 
-    if ref_height is None:
-        file["RefHt"] = hub_height
+    # Run TurbSim in parallel.
+    # Start a new case as soon as a process slot becomes free, its input file is
+    # written just before.
+    name = "TurbSim" if generator == "turbsim" else "built-in wind field generator"
+    print(f"running {name} for {len(campaign)} cases ...\n")
+    monitor = progress_monitor(progress, len(campaign))
+    jobs = (campaign.job(campaign.write_input(case)) for case in campaign.cases())
+    if queue_dir is None:
+        run_jobs(
+            jobs,
+            max_processes,
+            verbose,
+            monitor=monitor,
+            keep_finished=False,
+            **admission.scheduler_options(memory_budget, cpu_affinity),
+        )
     else:
-        file["RefHt"] = ref_height
+        run_queued(
+            jobs,
+            queue_dir,
+            max_processes,
+            verbose,
+            monitor=monitor,
+            keep_finished=False,
+        )
+    if monitor is not None:
+        monitor.close()
 
-    file["PLExp"] = power_law_exponent
+    print("")
 
-    # Apply additional parameters.
-    for key, value in additional_params.items():
-        file[key] = value
+    campaign.write_metadata()
+    campaign.instrumentation.write_report(output_dir)
+
+    # Print completion message.
+    if campaign.failed:
+        print("\nTurbSim simulation terminated, errors occured.\n")
+    else:
+        print("\nTurbSim simulation completed successfully.\n")
 
-    # Apply wind speed and turbulence intensity.
-    # Make sure wind speed and turbulence intensity are lists.
-    if isinstance(wind_speed, int) or isinstance(wind_speed, float):
-        wind_speed = [wind_speed]
 
-    if isinstance(turbulence_intensity, int) or isinstance(turbulence_intensity, float):
-        turbulence_intensity = [turbulence_intensity]
+class TurbSimCampaign:
+    """
+    TurbSim input template and parameter combinations of one run.
 
-    # Generate all possible combinations of input parameters.
-    inp_files = []
-    if wind_and_ti is None:
-        wind_and_ti = list(product(wind_speed, turbulence_intensity))
+    Takes the same arguments as `run_turbsim`, except `max_processes`, `verbose` and
+    `progress`.
+    """
 
-    for i in range(
-        first_wind_field_number, first_wind_field_number + wind_fields_per_case
+    def __init__(
+        self,
+        output_dir: str,
+        grid_points_horizontal: int,
+        grid_points_vertical: int,
+        grid_size_horizontal: float,
+        grid_size_vertical: float,
+        hub_height: float,
+        wind_speed: float | list[float] | None = None,
+        turbulence_intensity: str | float | list[float] = "A",
+        wind_and_ti: list[tuple[float, float]] | None = None,
+        ref_height: float | None = None,
+        time_span: int = 660,
+        time_step: float = 0.05,
+        output_type: str = "bts",
+        rand_seed: int | None = None,
+        power_law_exponent: float = 0.2,
+        wind_fields_per_case: int = 1,
+        first_wind_field_number: int = 1,
+        additional_params: dict = {},
+        seeds: list[int] | None = None,
+        cache_dir: str | None = None,
+        cache_size_limit: float | None = None,
+        custom_turbsim: str | None = None,
+        generator: str = "turbsim",
+        hooks: list[Callable[[dict], None]] = [],
     ):
-        for u, ti in wind_and_ti:
-            # Apply user-defined seed or generate random seed.
-            if rand_seed is None:
-                file["RandSeed1"] = random.randint(-2147483648, 2147483647)
-            else:
-                file["RandSeed1"] = rand_seed
-
-            # Apply wind speed and turbulence intensity.
-            file["URef"] = u
-            file["IECturbc"] = ti
-
-            # Write TurbSim input file.
-            if wind_fields_per_case > 1 or first_wind_field_number != 1:
-                id = f"U_{float(u):05.2f}_TI_{float(ti):05.2f}_C_{i:02d}".replace(
-                    ".", "d"
-                )
-            else:
-                id = f"U_{float(u):05.2f}_TI_{float(ti):05.2f}".replace(".", "d")
-            path = f"{output_dir}/{id}.inp"
+        self.output_dir = output_dir
+        self.output_type = output_type
+        self.generator = generator
+        self.rand_seed = rand_seed
+        self.seeds = seeds
+        self.wind_fields_per_case = wind_fields_per_case
+        self.first_wind_field_number = first_wind_field_number
+        self.instrumentation = Instrumentation(output_dir, hooks)
+
+        # Path to resource directory.
+        resources = Path(__file__).parent / "resources"
+        if custom_turbsim is not None:
+            self.turbsim_exe = f"{os.getcwd()}/{custom_turbsim}"
+        else:
+            self.turbsim_exe = resources / "TurbSim.exe"
+
+        if generator == "builtin":
+            if output_type != "bts":
+                raise ValueError("The built-in generator only writes .bts files.")
+            self.command = [sys.executable, turbulence.__file__]
+        elif generator == "turbsim":
+            self.command = [self.turbsim_exe]
+        else:
+            raise ValueError("Unknown generator. Use 'turbsim' or 'builtin'.")
+
+        # Wind field cache.
+        self.cache = None
+        if cache_dir is not None:
+            if rand_seed is None and seeds is None:
+                print("warning: random seeds used, wind field cache will not be hit.\n")
+            self.cache = FileCache(cache_dir, cache_size_limit)
+        self.cache_keys = {}
+
+        # Case parameters not yet added to the metadata table, and failed cases.
+        self.metadata = []
+        self.failed = []
+
+        # Create output directory if it does not exist.
+        if not Path(output_dir).exists():
+            Path(output_dir).mkdir(parents=True)
+
+        # Load template input file.
+        file = FASTInputFile(resources / "turbsim_template.inp")
+        self.file = file
+
+        # Apply scalar parameters.
+        file["NumGrid_Y"] = grid_points_horizontal
+        file["NumGrid_Z"] = grid_points_vertical
+        file["GridWidth"] = grid_size_horizontal
+        file["GridHeight"] = grid_size_vertical
+        file["HubHt"] = hub_height
+        file["AnalysisTime"] = time_span
+        file["TimeStep"] = time_step
+
+        if seeds is not None and len(seeds) < wind_fields_per_case:
+            raise ValueError("Provide one seed per wind field number.")
+
+        if output_type == "bts":
+            file["WrADFF"] = True
+            file["WrBLFF"] = False
+        elif output_type == "wnd":
+            file["WrADFF"] = False
+            file["WrBLFF"] = True
+        else:
+            raise ValueError("Unknown output_type. Use 'bts' our 'wnd'.")
+
+        if ref_height is None:
+            file["RefHt"] = hub_height
+        else:
+            file["RefHt"] = ref_height
+
+        file["PLExp"] = power_law_exponent
+
+        # Apply additional parameters.
+        for key, value in additional_params.items():
+            file[key] = value
+
+        # Apply wind speed and turbulence intensity.
+        # Make sure wind speed and turbulence intensity are lists.
+        if isinstance(wind_speed, int) or isinstance(wind_speed, float):
+            wind_speed = [wind_speed]
+
+        if isinstance(turbulence_intensity, int) or isinstance(
+            turbulence_intensity, float
+        ):
+            turbulence_intensity = [turbulence_intensity]
+
+        # Generate all possible combinations of input parameters.
+        if wind_and_ti is None:
+            wind_and_ti = list(product(wind_speed, turbulence_intensity))
+        self.wind_and_ti = wind_and_ti
+
+    def cases(self) -> Iterator[dict]:
+        """Yield the parameters of all cases, random seeds are drawn on demand."""
+        for i in range(
+            self.first_wind_field_number,
+            self.first_wind_field_number + self.wind_fields_per_case,
+        ):
+            for u, ti in self.wind_and_ti:
+                # Apply user-defined seed or generate random seed.
+                if self.seeds is not None:
+                    seed = self.seeds[i - self.first_wind_field_number]
+                elif self.rand_seed is None:
+                    seed = random.randint(-2147483648, 2147483647)
+                else:
+                    seed = self.rand_seed
+
+                if self.wind_fields_per_case > 1 or self.first_wind_field_number != 1:
+                    id = f"U_{float(u):05.2f}_TI_{float(ti):05.2f}_C_{i:02d}".replace(
+                        ".", "d"
+                    )
+                else:
+                    id = f"U_{float(u):05.2f}_TI_{float(ti):05.2f}".replace(".", "d")
+
+                yield {
+                    "case": id,
+                    "wind_speed": u,
+                    "turbulence_intensity": ti,
+                    "seed": seed,
+                    "wind_field_number": i,
+                }
+
+    def __len__(self) -> int:
+        """Number of cases."""
+        return self.wind_fields_per_case * len(self.wind_and_ti)
+
+    def write_input(self, case: dict) -> str:
+        """Write the TurbSim input file of a case from `cases`, return its path."""
+        file = self.file
+        file["RandSeed1"] = case["seed"]
+
+        # Apply wind speed and turbulence intensity.
+        file["URef"] = case["wind_speed"]
+        file["IECturbc"] = case["turbulence_intensity"]
+
+        # Write TurbSim input file.
+        path = f"{self.output_dir}/{case['case']}.inp"
+        with self.instrumentation.phase(case["case"], "inputs"):
             file.write(path)
-            inp_files.append(path)
 
-    # Run TurbSim in parallel.
-    counter = 1
-    for batch in batched(inp_files, max_processes):
-        print(
-            f"starting batch {counter}/{math.ceil(len(inp_files) / float(max_processes))} ...\n"
+        # Record case parameters for run_fast.
+        self.metadata.append(case)
+        if len(self.metadata) >= METADATA_BATCH:
+            self.write_metadata()
+
+        return path
+
+    def write_metadata(self):
+        """Add the recorded case parameters to the wind metadata table."""
+        if self.metadata:
+            update_metadata(Path(self.output_dir) / WIND_METADATA, self.metadata)
+        self.metadata = []
+
+    def job(self, inp_file: str, finish=None) -> Job:
+        """Create scheduler job for one TurbSim input file."""
+
+        def finish_case(job: Job):
+            self.instrumentation.job(job)
+            if job.return_code != 0:
+                self.failed.append(Path(inp_file).stem)
+
+            # Add new wind field to cache.
+            key = self.cache_keys.pop(inp_file, None)
+            if self.cache is not None and job.return_code == 0 and not job.skipped:
+                with self.instrumentation.phase(job.name, "caching"):
+                    self.cache.store(key, self.result_files(inp_file))
+
+            if finish is not None:
+                return finish(job)
+
+        return Job(
+            name=Path(inp_file).stem,
+            stdout=Path(inp_file).with_suffix(".out"),
+            prepare=lambda: self.prepare(inp_file),
+            finish=finish_case,
+            memory=admission.turbsim_memory(
+                self.file["NumGrid_Y"],
+                self.file["NumGrid_Z"],
+                self.file["AnalysisTime"],
+                self.file["TimeStep"],
+                self.generator,
+            ),
         )
-        counter += 1
-
-        outfiles = []
-        tasks = []
-        for inp_file in batch:
-            stdout = Path(inp_file).with_suffix(".out")
-            outfiles.append(stdout)
-            tasks.append(
-                (
-                    subprocess.Popen(
-                        [resources / "TurbSim.exe", inp_file],
-                        stdout=open(stdout, "w"),
-                        stderr=subprocess.STDOUT,
-                    ),
-                    Path(inp_file).stem,
-                )
-            )
 
-        # Wait for all tasks to finish.
-        error = False
-        for task, case in tasks:
-            return_code = task.wait()
-            print(f"task {case} finished with return code {return_code}.")
-            if return_code != 0:
-                error = True
+    def prepare(self, inp_file: str) -> list | None:
+        """Return generator command line, or None if the wind field was found in the cache."""
+        with self.instrumentation.phase(Path(inp_file).stem, "staging"):
+            return self.lookup(inp_file)
 
-        print("")
+    def lookup(self, inp_file: str) -> list | None:
+        """Look up the wind field of an input file in the cache."""
+        if self.cache is not None:
+            # The input file does not contain any file names, so its content is the key.
+            key = hash_parts(
+                "simdriver-turbsim-1",
+                file_digest(self.command[-1]),
+                Path(inp_file).read_text(),
+            )
+            self.cache_keys[inp_file] = key
+            if self.cache.fetch(key, self.result_files(inp_file)):
+                print(f"found cached wind field for {Path(inp_file).stem}.")
+                return None
 
-        # Print stdout and stderr.
-        if verbose:
-            for file in outfiles:
-                print(f"########## {Path(file).stem} ##########\n")
-                print(open(file, "r").read())
+        return [*self.command, inp_file]
 
-    # Print completion message.
-    if error:
-        print("\nTurbSim simulation terminated, errors occured.\n")
-    else:
-        print("\nTurbSim simulation completed successfully.\n")
+    def result_files(self, inp_file: str) -> dict[str, str]:
+        """Paths to the files TurbSim writes for an input file, by cache role."""
+        return {
+            f".{self.output_type}": self.wind_file(inp_file),
+            ".sum": str(Path(inp_file).with_suffix(".sum")),
+        }
+
+    def wind_file(self, inp_file: str) -> str:
+        """Path to the wind file TurbSim writes for an input file."""
+        return str(Path(inp_file).with_suffix(f".{self.output_type}"))
@@ -0,0 +1,294 @@
+import asyncio
+import os
+import subprocess
+import sys
+import time
+from collections import deque
+from collections.abc import Callable, Iterable
+from dataclasses import dataclass, field
+from pathlib import Path
+from typing import IO
+
+
+@dataclass(eq=False)
+class Job:
+    """
+    External process managed by the scheduler.
+
+    Args:
+        name: Case name used in progress messages.
+        stdout: Path to the file stdout and stderr of the process are redirected to.
+        prepare: Called right before launch, returns the command line of the process
+                 or None if no process needs to run.
+        finish: Called after the process exited, may return follow-up jobs.
+        memory: Estimated peak memory of the process in MB, used for admission.
+        watch: Called while the process runs, returns the reason to abort it or None.
+               The process is killed and the reason recorded in `error`.
+
+    The process is a `subprocess.Popen`, or an `asyncio.subprocess.Process` for jobs
+    run by a `simdriver.Session`. The scheduler records when a job was queued,
+    started preparing, launched and ended (wall clock) and, where the platform
+    supports `os.wait4`, the CPU time and peak resident set size in MB of the
+    process in `resources`.
+    """
+
+    name: str
+    stdout: Path
+    prepare: Callable[[], list]
+    finish: Callable[["Job"], Iterable["Job"] | None] | None = None
+    memory: float = 0.0
+    watch: Callable[["Job"], str | None] | None = None
+    return_code: int | None = None
+    error: str | None = None
+    skipped: bool = False
+    process: subprocess.Popen | asyncio.subprocess.Process | None = field(
+        default=None, repr=False
+    )
+    log: IO | None = field(default=None, repr=False)
+    queued: float | None = None
+    started: float | None = None
+    launched: float | None = None
+    ended: float | None = None
+    resources: dict | None = None
+    cpus: set[int] | None = None
+
+    @property
+    def ran(self) -> bool:
+        """The process of the job was launched and exited."""
+        return self.return_code is not None and not self.skipped
+
+
+def run_jobs(
+    jobs: Iterable[Job],
+    max_processes: int,
+    verbose: bool = False,
+    poll_interval: float = 0.05,
+    monitor=None,
+    memory_budget: float | None = None,
+    cpu_sets: list[set[int]] | None = None,
+    keep_finished: bool = True,
+) -> list[Job]:
+    """
+    Run jobs in parallel, starting the next job as soon as a process exits.
+
+    Jobs are pulled lazily from `jobs`, so staging of a case only happens once a slot
+    is free. Follow-up jobs returned by `Job.finish` are run before any remaining jobs.
+    With a memory budget, a job only starts when its estimated memory fits next to the
+    running jobs. Jobs start in order, so large jobs are not overtaken by small ones.
+    Processes of jobs whose `Job.watch` reports a reason are killed right away, so
+    their slot goes to the next job.
+
+    Args:
+        jobs: Jobs to run.
+        max_processes: Maximum number of parallel processes.
+        verbose: Print stdout and stderr of each process when it finishes.
+        poll_interval: Time in seconds between checks for finished processes.
+        monitor: Progress monitor notified about started, running and finished jobs.
+        memory_budget: Total estimated memory of running jobs in MB, default is
+                       unlimited. A job larger than the budget runs alone.
+        cpu_sets: CPU sets to pin processes to, one process per set. Limits the number
+                  of parallel processes to the number of sets. Linux only.
+        keep_finished: Keep and return the finished jobs. Without, the memory of a run
+                       does not grow with the number of jobs, the completion handlers
+                       have to record what is needed.
+
+    Returns:
+        List of finished jobs in order of completion, empty if not kept.
+    """
+    if cpu_sets is not None:
+        max_processes = min(max_processes, len(cpu_sets))
+        free_cpus = deque(cpu_sets)
+    start = time.time()
+    pending = iter(jobs)
+    queue = deque()
+    running = []
+    finished = [] if keep_finished else None
+    exhausted = False
+
+    while True:
+        # Fill free slots.
+        while len(running) < max_processes:
+            if queue:
+                job = queue.popleft()
+            elif not exhausted:
+                job = next(pending, None)
+                if job is None:
+                    exhausted = True
+                    break
+                # Jobs are waiting for a slot since the start.
+                if job.queued is None:
+                    job.queued = start
+            else:
+                break
+
+            # Wait until enough memory is released by running jobs.
+            if (
+                memory_budget is not None
+                and running
+                and sum(other.memory for other in running) + job.memory > memory_budget
+            ):
+                queue.appendleft(job)
+                break
+
+            if cpu_sets is not None:
+                job.cpus = free_cpus.popleft()
+
+            if _start(job):
+                running.append(job)
+                if monitor is not None:
+                    monitor.started(job)
+            else:
+                if job.cpus is not None:
+                    free_cpus.append(job.cpus)
+                queue.extendleft(reversed(finish_job(job, finished, verbose, monitor)))
+
+        if not running:
+            if queue or not exhausted:
+                continue
+            break
+
+        # Abort unhealthy processes, they are collected below once they exited.
+        for job in running:
+            reason = watch_job(job)
+            if reason is not None:
+                abort_job(job, reason)
+
+        # Collect finished processes.
+        done = [job for job in running if _poll(job)]
+        if monitor is not None:
+            monitor.poll(running)
+        if not done:
+            time.sleep(poll_interval)
+            continue
+
+        for job in done:
+            running.remove(job)
+            job.ended = time.time()
+            job.return_code = job.process.returncode
+            if job.cpus is not None:
+                free_cpus.append(job.cpus)
+            queue.extendleft(reversed(finish_job(job, finished, verbose, monitor)))
+
+    return finished or []
+
+
+def _start(job: Job) -> bool:
+    """Prepare and launch a job, return False if no process was started."""
+    job.started = time.time()
+    try:
+        command = job.prepare()
+        if command is None:
+            job.skipped = True
+            job.return_code = 0
+            return False
+
+        job.log = open(job.stdout, "w")
+        job.launched = time.time()
+        job.process = subprocess.Popen(
+            command, stdout=job.log, stderr=subprocess.STDOUT
+        )
+    except Exception as e:
+        job.error = f"{type(e).__name__}: {e}"
+        return False
+
+    if job.cpus is not None:
+        _pin(job)
+
+    return True
+
+
+def _pin(job: Job):
+    """Pin the process of a job to its CPUs."""
+    try:
+        os.sched_setaffinity(job.process.pid, job.cpus)
+    except ProcessLookupError:
+        # Exited already.
+        pass
+
+
+def watch_job(job: Job) -> str | None:
+    """Check a running job with its watch, return the reason to abort it or None."""
+    if job.watch is None or job.error is not None:
+        return None
+
+    return job.watch(job)
+
+
+def abort_job(job: Job, reason: str):
+    """
+    Kill the process of a running job and record the reason as its error.
+
+    Must be called from the thread that owns the process, the event loop thread for
+    asyncio processes.
+    """
+    job.error = reason
+    try:
+        job.process.kill()
+    except ProcessLookupError:
+        # Exited already.
+        pass
+
+
+def _poll(job: Job) -> bool:
+    """Check if the process of a job exited, collect its resource usage if possible."""
+    if not hasattr(os, "wait4"):
+        return job.process.poll() is not None
+
+    try:
+        pid, status, usage = os.wait4(job.process.pid, os.WNOHANG)
+    except ChildProcessError:
+        # Already reaped.
+        return job.process.poll() is not None
+
+    if pid == 0:
+        return False
+
+    # Peak resident set size is reported in bytes on macOS, in kB elsewhere.
+    max_rss = usage.ru_maxrss / (1024**2 if sys.platform == "darwin" else 1024)
+
+    job.process.returncode = os.waitstatus_to_exitcode(status)
+    job.resources = {
+        "cpu_time": usage.ru_utime + usage.ru_stime,
+        "max_rss_mb": max_rss,
+    }
+    return True
+
+
+def finish_job(
+    job: Job, finished: list[Job] | None, verbose: bool, monitor=None
+) -> list[Job]:
+    """Report a finished job, add it to `finished` and run its completion handler."""
+    if job.log is not None:
+        job.log.close()
+
+    if monitor is not None:
+        monitor.finished(job)
+
+    if job.error is not None:
+        print(f"task {job.name} failed: {job.error}")
+    elif job.skipped:
+        print(f"task {job.name} skipped.")
+    else:
+        print(f"task {job.name} finished with return code {job.return_code}.")
+
+    # Print stdout and stderr.
+    if verbose and job.ran:
+        print(f"\n########## {job.name} ##########\n")
+        print(open(job.stdout, "r").read())
+
+    if finished is not None:
+        finished.append(job)
+
+    follow_ups = []
+    if job.finish is not None:
+        try:
+            follow_ups = list(job.finish(job) or [])
+        except Exception as e:
+            job.error = f"{type(e).__name__}: {e}"
+            print(f"task {job.name} failed: {job.error}")
+
+    for follow_up in follow_ups:
+        if follow_up.queued is None:
+            follow_up.queued = time.time()
+
+    return follow_ups
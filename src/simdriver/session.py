@@ -0,0 +1,285 @@
+import asyncio
+import subprocess
+import time
+from collections.abc import AsyncIterator, Callable
+from dataclasses import dataclass, field
+from pathlib import Path
+
+import polars as pl
+
+from .monitor import progress_monitor
+from .results import DATASET_DIR
+from .run_fast import FastCampaign
+from .scheduler import Job, abort_job, finish_job, watch_job
+
+# Time in seconds between health checks of running cases, the guards limit their own
+# reads to their interval.
+WATCH_INTERVAL = 0.25
+
+
+@dataclass
+class FastResult:
+    """
+    Result of one OpenFAST case submitted to a `Session`.
+
+    Attributes:
+        case: Name of the case.
+        return_code: Return code of OpenFAST, 0 for cached results, None if the case
+                     could not be started.
+        parquet: Path to the parquet output, None if no output was written.
+        partition: Path to the case partition in the consolidated dataset.
+        cached: The result was taken from the result cache.
+        error: Error message if staging, post-processing or conversion failed.
+        metadata: Case parameters as recorded in the dataset.
+    """
+
+    case: str
+    return_code: int | None
+    parquet: Path | None
+    partition: Path | None = None
+    cached: bool = False
+    error: str | None = None
+    metadata: dict = field(default_factory=dict)
+
+    @property
+    def success(self) -> bool:
+        return self.return_code == 0 and self.error is None
+
+    def read(self) -> pl.DataFrame:
+        """Read the parquet output of the case."""
+        if self.parquet is None:
+            raise FileNotFoundError(f"no output for case {self.case}.")
+
+        return pl.read_parquet(self.parquet)
+
+
+class Session:
+    """
+    Submit OpenFAST cases incrementally and await their results in an asyncio loop.
+
+    Cases run as asyncio subprocesses, at most `max_processes` at a time. Staging,
+    cleanup and output conversion run in worker threads, so the event loop stays free
+    for analysis and case generation while simulations run. Results are written to the
+    output directory exactly like `run_fast` does.
+
+    Example:
+        async with simdriver.Session("output", "model/NREL_5MW.fst") as session:
+            for u in [5, 10, 15]:
+                session.submit_fast(u)
+            async for result in session.as_completed():
+                print(result.case, result.read()["rot_speed"].mean())
+
+    Args:
+        output_dir: Relative path to output directory.
+        input_file: Relative path to OpenFAST input file (.fst).
+        max_processes: Maximum number of parallel processes.
+        verbose: Print stdout and stderr of OpenFAST processes.
+        fast_options: Input parameters of `run_fast`, except `output_dir`, `input_file`,
+                      `wind_files`, `steady_wind_speed`, `max_processes`, `verbose` and
+                      `progress`.
+        progress: Report live progress, see `run_fast`. The total number of cases is
+                  unknown, so no ETA is reported.
+    """
+
+    def __init__(
+        self,
+        output_dir: str,
+        input_file: str,
+        max_processes: int = 20,
+        verbose: bool = False,
+        fast_options: dict = {},
+        progress: bool | str | Callable[[dict], None] = False,
+    ):
+        self.output_dir = output_dir
+        self.input_file = input_file
+        self.max_processes = max_processes
+        self.verbose = verbose
+        self.fast_options = dict(fast_options)
+        self.progress = progress
+        self.campaign = None
+        self.monitor = None
+        self.slots = None
+        self.tasks = set()
+        self.waiting = set()
+        self.running = []
+        self.poller = None
+
+    async def __aenter__(self) -> "Session":
+        await self.start()
+        return self
+
+    async def __aexit__(self, *exc_info):
+        await self.close()
+
+    async def start(self):
+        """Set up the campaign and find the initial turbine state."""
+        fast_options = dict(self.fast_options)
+        custom_initial_state = fast_options.pop("custom_initial_state", None)
+        initialization_options = fast_options.pop("initialization_options", {})
+
+        def setup() -> FastCampaign:
+            campaign = FastCampaign(
+                output_dir=self.output_dir,
+                input_file=self.input_file,
+                verbose=self.verbose,
+                release_cases=False,
+                **fast_options,
+            )
+            campaign.load_initial_state(custom_initial_state, initialization_options)
+            campaign.load_warm_start(self.max_processes)
+            return campaign
+
+        # Finding the initial state may run simulations itself.
+        self.campaign = await asyncio.to_thread(setup)
+        self.slots = asyncio.Semaphore(self.max_processes)
+        self.monitor = progress_monitor(self.progress, None)
+        if self.monitor is not None:
+            self.poller = asyncio.create_task(self.poll())
+
+    def submit_fast(self, case: float | str) -> asyncio.Task:
+        """
+        Submit one OpenFAST case, return a task that resolves to its `FastResult`.
+
+        Args:
+            case: Steady wind speed in m/s, or relative path to a wind input file
+                  (.bts, .wnd or .hh).
+        """
+        if self.campaign is None:
+            raise RuntimeError("session not started, use 'async with Session(...)'.")
+
+        task = asyncio.create_task(self.run_case(case, time.time()))
+        self.tasks.add(task)
+        task.add_done_callback(self.tasks.discard)
+        self.waiting.add(task)
+        return task
+
+    async def as_completed(self) -> AsyncIterator[FastResult]:
+        """Yield results in order of completion, including cases submitted meanwhile."""
+        while self.waiting:
+            done, _ = await asyncio.wait(
+                self.waiting, return_when=asyncio.FIRST_COMPLETED
+            )
+            for task in done:
+                self.waiting.discard(task)
+                yield task.result()
+
+    async def run_case(self, case: float | str, queued: float) -> FastResult:
+        """Stage, run and post-process one case."""
+        campaign = self.campaign
+        async with self.slots:
+            if isinstance(case, str):
+                inflow_file, v0_init = await asyncio.to_thread(campaign.wind_case, case)
+            else:
+                inflow_file, v0_init = await asyncio.to_thread(
+                    campaign.steady_case, case
+                )
+
+            job = campaign.job(inflow_file, v0_init)
+            job.queued = queued
+            await self.run_job(job)
+
+            if self.monitor is not None:
+                self.monitor.finished(job)
+            await asyncio.to_thread(finish_job, job, None, self.verbose)
+
+        # Output conversion runs in the thread pool of the campaign.
+        error = job.error
+        if job.name in campaign.conversions:
+            try:
+                await asyncio.wrap_future(campaign.conversions.pop(job.name))
+            except Exception as e:
+                error = error or f"{type(e).__name__}: {e}"
+
+        metadata = campaign.metadata.get(job.name, {})
+        parquet = Path(f"{self.output_dir}/{job.name}.parquet")
+        result = FastResult(
+            case=job.name,
+            return_code=job.return_code,
+            parquet=parquet if parquet.exists() else None,
+            partition=(
+                Path(f"{self.output_dir}/{DATASET_DIR}/{metadata['path']}")
+                if "path" in metadata
+                else None
+            ),
+            cached=job.name in campaign.cached,
+            error=error,
+            metadata=dict(metadata),
+        )
+
+        # Metadata is written in batches, the case is not held in memory any longer.
+        await asyncio.to_thread(campaign.release, job.name)
+        return result
+
+    async def run_job(self, job: Job):
+        """Prepare and run the process of a job, like the scheduler does."""
+        job.started = time.time()
+        try:
+            command = await asyncio.to_thread(job.prepare)
+            if command is None:
+                job.skipped = True
+                job.return_code = 0
+                return
+
+            job.log = open(job.stdout, "w")
+            job.launched = time.time()
+            job.process = await asyncio.create_subprocess_exec(
+                *command, stdout=job.log, stderr=subprocess.STDOUT
+            )
+        except Exception as e:
+            job.error = f"{type(e).__name__}: {e}"
+            return
+
+        if self.monitor is not None:
+            self.monitor.started(job)
+
+        self.running.append(job)
+        try:
+            job.return_code = await self.wait(job)
+        except asyncio.CancelledError:
+            job.process.kill()
+            raise
+        finally:
+            self.running.remove(job)
+            job.ended = time.time()
+
+    async def wait(self, job: Job) -> int:
+        """Wait for the process of a job, kill it once its watch reports a reason."""
+        exited = asyncio.ensure_future(job.process.wait())
+        if job.watch is not None:
+            while not exited.done():
+                await asyncio.wait({exited}, timeout=WATCH_INTERVAL)
+                if exited.done():
+                    break
+
+                # Reading the output happens off the loop, the kill on the loop thread,
+                # asyncio processes are not thread-safe.
+                reason = await asyncio.to_thread(watch_job, job)
+                if reason is not None and not exited.done():
+                    abort_job(job, reason)
+
+        return await exited
+
+    async def poll(self):
+        """Feed progress of running cases to the monitor."""
+        while True:
+            self.monitor.poll(self.running)
+            await asyncio.sleep(self.monitor.interval / 4)
+
+    async def close(self):
+        """Wait for all submitted cases, then record metadata and write the report."""
+        if self.campaign is None:
+            return
+
+        await asyncio.gather(*self.tasks, return_exceptions=True)
+
+        if self.poller is not None:
+            self.poller.cancel()
+        if self.monitor is not None:
+            self.monitor.close()
+
+        print("")
+
+        await asyncio.to_thread(self.campaign.process_output)
+        self.campaign.report()
+        self.campaign.close()
+        self.campaign = None
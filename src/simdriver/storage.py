@@ -0,0 +1,56 @@
+# Named output storage profiles of `run_fast`.
+#   output_time_step: Output time step of OpenFAST (DT_Out), default keeps the model value.
+#   dtype: Data type of the parquet columns, 'float64' or 'float32'.
+#   compression: Parquet compression codec, e.g. 'zstd', 'lz4' or 'uncompressed'.
+#   compression_level: Level of the compression codec, default is the codec default.
+#   row_group_size: Number of rows per parquet row group, default is one row group.
+#   keep_binary: Keep OpenFAST binary output (.outb) and log (.out) after conversion.
+STORAGE_PROFILES = {
+    "full": {
+        "output_time_step": None,
+        "dtype": "float64",
+        "compression": "zstd",
+        "compression_level": None,
+        "row_group_size": None,
+        "keep_binary": True,
+    },
+    "compact": {
+        "output_time_step": None,
+        "dtype": "float32",
+        "compression": "zstd",
+        "compression_level": 9,
+        "row_group_size": 65536,
+        "keep_binary": False,
+    },
+}
+
+
+def storage_options(storage: str | dict) -> dict:
+    """
+    Resolve a storage profile.
+
+    Args:
+        storage: Name of a profile in `STORAGE_PROFILES` or dictionary of options that
+                 override the profile named by its 'profile' key, default is 'full'.
+
+    Returns:
+        Dictionary with all storage options.
+    """
+    if isinstance(storage, str):
+        storage = {"profile": storage}
+
+    storage = dict(storage)
+    profile = storage.pop("profile", "full")
+    if profile not in STORAGE_PROFILES:
+        raise ValueError(
+            f"Unknown storage profile '{profile}'. Use {list(STORAGE_PROFILES)}."
+        )
+
+    unknown = set(storage) - set(STORAGE_PROFILES[profile])
+    if unknown:
+        raise ValueError(f"Unknown storage options: {sorted(unknown)}.")
+
+    if storage.get("dtype", "float64") not in ["float64", "float32"]:
+        raise ValueError("Unknown dtype. Use 'float64' or 'float32'.")
+
+    return STORAGE_PROFILES[profile] | storage
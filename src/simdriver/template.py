@@ -0,0 +1,59 @@
+import re
+from pathlib import Path
+
+from weio import FASTInputFile
+
+MARKER = "@@simdriver:{}@@"
+
+
+class InputTemplate:
+    """
+    OpenFAST input file parsed once and rendered for each case.
+
+    The file is written once with a marker in place of every variable field. Rendering
+    a case only joins the literal text with the formatted field values, weio does not
+    parse or write the file again. Fields that do not exist in the file are ignored.
+
+    Args:
+        file: Path to the input file or parsed input file. A parsed file is modified.
+        fields: Labels of the fields that vary between cases.
+    """
+
+    def __init__(self, file, fields: list[str]):
+        if isinstance(file, (str, Path)):
+            file = FASTInputFile(str(file))
+
+        self.defaults = {}
+        for label in fields:
+            try:
+                self.defaults[label] = file[label]
+            except Exception:
+                continue
+
+            # The first OutList entry is written on the label line.
+            if label == "OutList":
+                file[label] = ["", MARKER.format(label)]
+            else:
+                file[label] = MARKER.format(label)
+
+        parts = re.split(MARKER.format("([^@]+)"), file.toString())
+        self.literals = parts[0::2]
+        self.fields = parts[1::2]
+
+    def render(self, values: dict = {}) -> str:
+        """Render input file text, fields missing in `values` keep their template value."""
+        text = [self.literals[0]]
+        for label, literal in zip(self.fields, self.literals[1:]):
+            value = values.get(label, self.defaults[label])
+            if label == "OutList":
+                text.append("\n".join(str(channel) for channel in value[1:]))
+            else:
+                # Pad values like weio does to keep columns aligned.
+                text.append(f"{value}".ljust(13))
+            text.append(literal)
+
+        return "".join(text)
+
+    def write(self, path: str | Path, values: dict = {}):
+        """Render input file and write it to `path`."""
+        Path(path).write_text(self.render(values))
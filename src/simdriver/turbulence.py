@@ -0,0 +1,284 @@
+"""
+Turbulent full-field wind generator for the IEC Kaimal model (Veers method).
+
+Generates the same kind of wind fields as TurbSim with TurbModel 'IECKAI' and writes
+them as TurbSim binary files (.bts). The module only depends on NumPy, so it can be
+run as a script with a TurbSim input file, which is how `run_turbsim` uses it:
+
+    python turbulence.py case.inp
+"""
+
+import struct
+import sys
+from pathlib import Path
+
+import numpy as np
+
+# Turbulence intensity reference values of the IEC turbulence categories.
+IEC_IREF = {"A": 0.16, "B": 0.14, "C": 0.12}
+
+# Frequencies processed at once, limited by the size of the coherence matrices.
+BATCH_ELEMENTS = 1 << 24
+
+# Coherence below which points are treated as uncorrelated. Above the frequency where
+# the closest points fall below it, the coherence matrices are the identity and are
+# not factorized.
+COHERENCE_TOLERANCE = 1e-6
+
+
+def read_inp(path: str) -> dict:
+    """Scalar fields of a TurbSim input file, as strings."""
+    fields = {}
+    for line in Path(path).read_text(errors="replace").splitlines():
+        parts = line.split()
+        if len(parts) >= 2:
+            fields.setdefault(parts[1], parts[0].strip('"'))
+
+    return fields
+
+
+def kaimal_field(
+    grid_points_horizontal: int,
+    grid_points_vertical: int,
+    grid_size_horizontal: float,
+    grid_size_vertical: float,
+    hub_height: float,
+    ref_wind_speed: float,
+    ref_height: float,
+    turbulence_intensity: str | float,
+    power_law_exponent: float = 0.2,
+    time_span: float = 660,
+    time_step: float = 0.05,
+    seed: int | None = None,
+    scale: int = 1,
+) -> np.ndarray:
+    """
+    Generate a turbulent wind field with the IEC Kaimal spectra and IEC coherence.
+
+    The u component is coherent between grid points following IEC 61400-1 Ed. 3, the
+    v and w components are uncorrelated, like the TurbSim defaults for 'IECKAI'. The
+    cross-spectral matrices of all frequencies are factorized in batches with NumPy.
+
+    Args:
+        grid_points_horizontal: Number of grid points in horizontal direction.
+        grid_points_vertical: Number of grid points in vertical direction.
+        grid_size_horizontal: Grid size in meters in horizontal direction.
+        grid_size_vertical: Grid size in meters in vertical direction.
+        hub_height: Hub height in meters, the grid is centered on the hub.
+        ref_wind_speed: Mean wind speed at the reference height in m/s.
+        ref_height: Reference height in meters.
+        turbulence_intensity: IEC turbulence category 'A', 'B' or 'C', or turbulence
+                              intensity in percent.
+        power_law_exponent: Power law exponent of the mean wind profile.
+        time_span: Length of the time series in seconds.
+        time_step: Time step in seconds.
+        seed: Random seed.
+        scale: Scaling to the target standard deviations like TurbSim's ScaleIEC,
+               0 for none, 1 for uniform scaling by the hub point, 2 for each point.
+
+    Returns:
+        Velocities of shape (time steps, vertical points, horizontal points, 3).
+    """
+    n_y, n_z = grid_points_horizontal, grid_points_vertical
+    n_t = round(time_span / time_step)
+    n_t += n_t % 2
+
+    # Grid, the y axis points to the left looking downwind.
+    y = np.linspace(-grid_size_horizontal / 2, grid_size_horizontal / 2, n_y)
+    z = hub_height - grid_size_vertical / 2 + np.linspace(0, grid_size_vertical, n_z)
+    zz, yy = np.meshgrid(z, y, indexing="ij")
+    points = np.stack([yy.ravel(), zz.ravel()], axis=1)
+    n_p = len(points)
+
+    # Mean wind profile and turbulence parameters at hub height.
+    u_hub = ref_wind_speed * (hub_height / ref_height) ** power_law_exponent
+    if isinstance(turbulence_intensity, str) and turbulence_intensity in IEC_IREF:
+        sigma_u = IEC_IREF[turbulence_intensity] * (0.75 * u_hub + 5.6)
+    else:
+        sigma_u = float(turbulence_intensity) / 100 * u_hub
+    sigma = np.array([sigma_u, 0.8 * sigma_u, 0.5 * sigma_u])
+    scale_parameter = 0.7 * min(hub_height, 60)
+    length_scales = np.array([8.1, 2.7, 0.66]) * scale_parameter
+    coherence_scale = 8.1 * scale_parameter
+
+    # One-sided Kaimal spectra of all components.
+    df = 1 / (n_t * time_step)
+    f = np.arange(1, n_t // 2) * df
+    spectra = (
+        4
+        * sigma[:, None] ** 2
+        * length_scales[:, None]
+        / u_hub
+        / (1 + 6 * f[None, :] * length_scales[:, None] / u_hub) ** (5 / 3)
+    )
+
+    # Fourier amplitude of a unit spectrum, irfft scales by 1 / n_t.
+    amplitude = n_t * np.sqrt(df / 2)
+    rng = np.random.default_rng(seed)
+    coefficients = np.zeros((3, n_t // 2 + 1, n_p), dtype=complex)
+    phases = np.exp(2j * np.pi * rng.random((3, len(f), n_p)))
+
+    # u: coherent, factorize the coherence matrices of a batch of frequencies at once.
+    # On a regular grid most distances repeat, the coherence is evaluated once for each
+    # distinct distance.
+    distance = np.linalg.norm(points[:, None, :] - points[None, :, :], axis=-1)
+    distances, index = np.unique(np.round(distance, 9), return_inverse=True)
+    index = index.reshape(n_p, n_p)
+    f_coherent = -np.log(COHERENCE_TOLERANCE) * u_hub / (12 * distances[1:].min())
+    n_coherent = np.searchsorted(f, f_coherent)
+    batch = max(1, BATCH_ELEMENTS // n_p**2)
+    for start in range(0, n_coherent, batch):
+        f_batch = f[start : min(start + batch, n_coherent)]
+        coherence = np.exp(
+            -12
+            * np.sqrt(
+                (f_batch[:, None] * distances / u_hub) ** 2
+                + (0.12 * distances / coherence_scale) ** 2
+            )
+        )
+        factor = np.linalg.cholesky(coherence[:, index])
+        coefficients[0, 1 + start : 1 + start + len(f_batch)] = np.einsum(
+            "fij,fj->fi", factor, phases[0, start : start + len(f_batch)]
+        )
+    coefficients[0, 1 + n_coherent : -1] = phases[0, n_coherent:]
+    coefficients[0, 1:-1] *= np.sqrt(spectra[0])[:, None]
+
+    # v and w: uncorrelated between points.
+    coefficients[1:, 1:-1] = np.sqrt(spectra[1:])[:, :, None] * phases[1:]
+
+    fluctuations = np.fft.irfft(amplitude * coefficients, n=n_t, axis=1)
+
+    # Scale to the target standard deviations.
+    if scale == 1:
+        hub = (n_z // 2) * n_y + n_y // 2
+        fluctuations *= (sigma / fluctuations[:, :, hub].std(axis=1))[:, None, None]
+    elif scale == 2:
+        fluctuations *= (sigma[:, None] / fluctuations.std(axis=1))[:, None, :]
+
+    velocity = fluctuations.transpose(1, 2, 0).reshape(n_t, n_z, n_y, 3)
+    velocity[..., 0] += (ref_wind_speed * (z / ref_height) ** power_law_exponent)[
+        None, :, None
+    ]
+    return velocity
+
+
+def write_bts(
+    path: str,
+    velocity: np.ndarray,
+    grid_size_horizontal: float,
+    grid_size_vertical: float,
+    hub_height: float,
+    time_step: float,
+    description: str = "generated by simdriver",
+):
+    """
+    Write a wind field as TurbSim binary file (.bts), periodic and without tower points.
+
+    Args:
+        path: Path to the output file.
+        velocity: Velocities of shape (time steps, vertical points, horizontal points,
+                  3), as returned by `kaimal_field`.
+        grid_size_horizontal: Grid size in meters in horizontal direction.
+        grid_size_vertical: Grid size in meters in vertical direction.
+        hub_height: Hub height in meters.
+        time_step: Time step in seconds.
+        description: Description stored in the file header.
+    """
+    n_t, n_z, n_y, _ = velocity.shape
+    dz = grid_size_vertical / (n_z - 1)
+    dy = grid_size_horizontal / (n_y - 1)
+    u_hub = velocity[:, n_z // 2, n_y // 2, 0].mean()
+    z_bottom = hub_height - grid_size_vertical / 2
+
+    # Scale every component to the full 16 bit integer range.
+    int_min, int_max = -32768, 32767
+    v_min = velocity.min(axis=(0, 1, 2))
+    v_max = velocity.max(axis=(0, 1, 2))
+    slope = (int_max - int_min) / np.maximum(v_max - v_min, 1e-6)
+    offset = int_min - slope * v_min
+    data = np.clip(np.round(velocity * slope + offset), int_min, int_max)
+
+    # File ID 8 marks the field as periodic, InflowWind wraps it around in time.
+    header = struct.pack("<h4i", 8, n_z, n_y, 0, n_t)
+    header += struct.pack("<6f", dz, dy, time_step, u_hub, hub_height, z_bottom)
+    header += struct.pack("<6f", *np.stack([slope, offset], axis=1).ravel())
+    header += struct.pack("<i", len(description)) + description.encode()
+
+    with open(path, "wb") as file:
+        file.write(header)
+        file.write(data.astype("<i2").tobytes())
+
+
+def write_summary(path: str, velocity: np.ndarray, inp: dict):
+    """Write a summary file with the case parameters in the format of TurbSim."""
+    n_t, n_z, n_y, _ = velocity.shape
+    hub = velocity[:, n_z // 2, n_y // 2, :]
+    lines = ["Summary of wind field generated by simdriver (IEC Kaimal, Veers method)"]
+    lines.append("")
+    for value, description in [
+        (inp["RandSeed1"], "Random seed #1"),
+        (n_z, "Vertical grid-point matrix dimension"),
+        (n_y, "Horizontal grid-point matrix dimension"),
+        (inp["TimeStep"], "Time step [seconds]"),
+        (inp["AnalysisTime"], "Length of analysis time series [seconds]"),
+        (inp["HubHt"], "Hub height [m]"),
+        (inp["GridHeight"], "Grid height [m]"),
+        (inp["GridWidth"], "Grid width [m]"),
+        (inp["TurbModel"], "Turbulence model used"),
+        (inp["IECturbc"], "IEC turbulence characteristic"),
+        (inp["RefHt"], "Reference height [m]"),
+        (inp["URef"], "Reference wind speed [m/s]"),
+    ]:
+        lines.append(f"{value:>14} {description}")
+    lines.append("")
+    lines.append("Hub point statistics     u          v          w")
+    lines.append(f"Mean [m/s]       {' '.join(f'{x:10.3f}' for x in hub.mean(axis=0))}")
+    lines.append(f"Std [m/s]        {' '.join(f'{x:10.3f}' for x in hub.std(axis=0))}")
+    Path(path).write_text("\n".join(lines) + "\n")
+
+
+def generate(inp_path: str):
+    """Generate the wind field of a TurbSim input file, write .bts and .sum files."""
+    inp = read_inp(inp_path)
+    if inp["TurbModel"] != "IECKAI":
+        raise ValueError("Only the IEC Kaimal model (IECKAI) is supported.")
+    if inp["IEC_WindType"] != "NTM":
+        raise ValueError("Only the normal turbulence model (NTM) is supported.")
+    if inp["WrBLFF"].lower() == "true":
+        raise ValueError("Only .bts output is supported.")
+
+    grid_size_horizontal = float(inp["GridWidth"])
+    grid_size_vertical = float(inp["GridHeight"])
+    hub_height = float(inp["HubHt"])
+    time_step = float(inp["TimeStep"])
+    ref_wind_speed = float(inp["URef"])
+    ti = inp["IECturbc"]
+    velocity = kaimal_field(
+        grid_points_horizontal=int(inp["NumGrid_Y"]),
+        grid_points_vertical=int(inp["NumGrid_Z"]),
+        grid_size_horizontal=grid_size_horizontal,
+        grid_size_vertical=grid_size_vertical,
+        hub_height=hub_height,
+        ref_wind_speed=ref_wind_speed,
+        ref_height=float(inp["RefHt"]),
+        turbulence_intensity=ti if ti in IEC_IREF else float(ti),
+        power_law_exponent=0.2 if inp["PLExp"] == "default" else float(inp["PLExp"]),
+        time_span=float(inp["AnalysisTime"]),
+        time_step=time_step,
+        seed=int(inp["RandSeed1"]) % 2**32,
+        scale=int(inp["ScaleIEC"]),
+    )
+    write_bts(
+        str(Path(inp_path).with_suffix(".bts")),
+        velocity,
+        grid_size_horizontal,
+        grid_size_vertical,
+        hub_height,
+        time_step,
+    )
+    write_summary(str(Path(inp_path).with_suffix(".sum")), velocity, inp)
+
+
+if __name__ == "__main__":
+    generate(sys.argv[1])
+    print("wind field generated normally.")
@@ -0,0 +1,138 @@
+from collections.abc import Callable
+from pathlib import Path
+from shutil import rmtree
+
+import numpy as np
+import polars as pl
+
+from . import run_fast
+from .cache import FileCache, hash_parts
+
+# ElastoDyn initial conditions and the output channels they are taken from.
+SPIN_UP_CHANNELS = {
+    "OoPDefl": "OoPDefl1_[m]",
+    "IPDefl": "IPDefl1_[m]",
+    "BlPitch(1)": "pitch",
+    "BlPitch(2)": "BldPitch2_[deg]",
+    "BlPitch(3)": "BldPitch3_[deg]",
+    "Azimuth": "Azimuth_[deg]",
+    "RotSpeed": "rot_speed",
+    "TTDspFA": "TTDspFA_[m]",
+    "TTDspSS": "TTDspSS_[m]",
+}
+
+
+def spin_up_states(
+    warm_start_dir: str,
+    output_dir: str,
+    input_file: str,
+    wind_bins: list[float],
+    spin_up_key: str,
+    time_span: float,
+    time_step: float,
+    steady_power_law_exponent: float,
+    initial_state: pl.DataFrame,
+    custom_fast: str | None,
+    fast_version: str,
+    max_processes: int,
+    verbose: bool,
+    hooks: list[Callable[[dict], None]] = [],
+) -> dict[float, dict]:
+    """
+    Run steady spin-ups and return the turbine state at their end.
+
+    Each wind speed bin is simulated once per model and setup, the end state is kept
+    in `warm_start_dir` and reused by later campaigns.
+
+    Args:
+        warm_start_dir: Relative path to the spin-up state store.
+        output_dir: Relative path to output directory of the campaign.
+        input_file: Relative path to OpenFAST input file (.fst).
+        wind_bins: Wind speeds of the spin-ups.
+        spin_up_key: Hash of the model and setup the spin-ups depend on.
+        time_span: Simulation time span of a spin-up.
+        time_step: Simulation time step.
+        steady_power_law_exponent: Power law exponent for steady wind input.
+        initial_state: Initial turbine state the spin-ups start from.
+        custom_fast: Relative path to custom OpenFAST executable.
+        fast_version: Version of custom OpenFAST executable.
+        max_processes: Maximum number of parallel processes.
+        verbose: Print stdout and stderr of OpenFAST processes.
+        hooks: Callables receiving the timing and resource records of the spin-ups.
+
+    Returns:
+        Dictionary of wind bin to ElastoDyn initial conditions.
+    """
+    store = FileCache(warm_start_dir)
+    temp_dir = f"{output_dir}/simdriver_spin_up"
+
+    initial_state_csv = initial_state.write_csv()
+
+    def key(wind_bin: float) -> str:
+        return hash_parts(
+            "simdriver-spin-up-1", spin_up_key, initial_state_csv, f"{wind_bin:.6g}"
+        )
+
+    def path(wind_bin: float) -> str:
+        return f"{temp_dir}/spin_up_{wind_bin:.6g}.csv"
+
+    Path(temp_dir).mkdir(parents=True, exist_ok=True)
+    missing = [
+        wind_bin
+        for wind_bin in wind_bins
+        if not store.fetch(key(wind_bin), {".csv": path(wind_bin)})
+    ]
+
+    if missing:
+        print(f"running spin-up for {len(missing)} wind speeds ...\n")
+        Path(f"{temp_dir}/initial_state.csv").write_text(initial_state_csv)
+        run_fast.run_fast(
+            output_dir=temp_dir,
+            input_file=input_file,
+            steady_wind_speed=missing,
+            steady_power_law_exponent=steady_power_law_exponent,
+            time_span=time_span,
+            time_step=time_step,
+            elastodyn_out=[
+                "OoPDefl1",
+                "IPDefl1",
+                "BldPitch2",
+                "BldPitch3",
+                "Azimuth",
+                "TTDspFA",
+                "TTDspSS",
+            ],
+            custom_fast=custom_fast,
+            fast_version=fast_version,
+            max_processes=max_processes,
+            verbose=verbose,
+            custom_initial_state=f"{temp_dir}/initial_state.csv",
+            hooks=hooks,
+        )
+
+        # Keep the last time step of each spin-up.
+        for wind_bin in missing:
+            id = f"U_{float(wind_bin):05.2f}".replace(".", "d")
+            end = pl.read_parquet(f"{temp_dir}/{id}.parquet").tail(1)
+            pl.DataFrame(
+                {label: end[channel] for label, channel in SPIN_UP_CHANNELS.items()}
+            ).write_csv(path(wind_bin))
+            store.store(key(wind_bin), {".csv": path(wind_bin)})
+
+        print("finished spin-up.\n")
+
+    states = {
+        wind_bin: pl.read_csv(path(wind_bin)).row(0, named=True)
+        for wind_bin in wind_bins
+    }
+
+    rmtree(temp_dir, ignore_errors=True)
+
+    return states
+
+
+def wind_bins(v0: np.ndarray, bin_width: float) -> list[float]:
+    """Wind speed bins of width `bin_width` covering the range of `v0`."""
+    first = np.floor(v0.min() / bin_width)
+    last = np.ceil(v0.max() / bin_width)
+    return [float(i * bin_width) for i in np.arange(first, last + 1)]
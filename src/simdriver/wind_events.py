@@ -0,0 +1,388 @@
+"""
+Deterministic uniform wind events of IEC 61400-1 Ed. 3 for OpenFAST (.hh files).
+
+Every generator takes parameter lists, simulates the full combination of all
+parameters at once with NumPy array expressions and returns `WindEvents`, which
+writes one uniform wind file per case. The files are ready for `run_fast`:
+
+    events = wind_events.eog([10, 12, 25], hub_height=90, rotor_diameter=126)
+    run_fast("output", "model/NREL_5MW.fst", wind_files=events.write("wind"))
+
+The linear and horizontal shear of the events refer to the rotor diameter, which
+`run_fast` uses as reference length of the uniform wind input.
+"""
+
+from dataclasses import dataclass
+from itertools import product
+from pathlib import Path
+
+import numpy as np
+
+# Reference wind speeds of the IEC wind turbine classes in m/s.
+IEC_VREF = {"I": 50, "II": 42.5, "III": 37.5}
+
+# Turbulence intensity reference values of the IEC turbulence categories.
+IEC_IREF = {"A+": 0.18, "A": 0.16, "B": 0.14, "C": 0.12}
+
+# Columns of uniform wind files.
+HH_COLUMNS = [
+    ("Time", "s"),
+    ("WindSpeed", "m/s"),
+    ("WindDir", "deg"),
+    ("VertSpeed", "m/s"),
+    ("HorizShear", "-"),
+    ("VertShear", "-"),
+    ("LinVShear", "-"),
+    ("GustSpeed", "m/s"),
+]
+HH_HEADER = (
+    "! Uniform wind file written by simdriver\n! "
+    + " ".join(f"{name:>12}" for name, _ in HH_COLUMNS)
+    + "\n! "
+    + " ".join(f"{f'({unit})':>12}" for _, unit in HH_COLUMNS)
+    + "\n"
+)
+
+
+@dataclass
+class WindEvents:
+    """
+    Uniform wind time series of a set of cases.
+
+    Attributes:
+        names: Case names, used as file names.
+        data: Wind data of shape (cases, time steps, 8), columns as in `HH_COLUMNS`.
+    """
+
+    names: list[str]
+    data: np.ndarray
+
+    def __add__(self, other: "WindEvents") -> "WindEvents":
+        return WindEvents(
+            self.names + other.names, np.concatenate([self.data, other.data])
+        )
+
+    def write(self, output_dir: str, precision: int = 4) -> list[str]:
+        """
+        Write one uniform wind file (.hh) per case, return their paths.
+
+        Args:
+            output_dir: Relative path to output directory.
+            precision: Number of decimals written.
+        """
+        Path(output_dir).mkdir(parents=True, exist_ok=True)
+        paths = []
+        for name, data in zip(self.names, self.data):
+            path = f"{output_dir}/{name}.hh"
+            write_hh(path, data, precision)
+            paths.append(path)
+
+        return paths
+
+
+def write_hh(path: str, data: np.ndarray, precision: int = 4):
+    """
+    Write a uniform wind file (.hh) from an array of shape (time steps, 8).
+
+    All rows are formatted with a single string operation, which is much faster
+    than writing row by row.
+    """
+    row = " ".join([f"%{precision + 9}.{precision}f"] * data.shape[1]) + "\n"
+    with open(path, "w") as file:
+        file.write(HH_HEADER)
+        file.write((row * len(data)) % tuple(data.ravel()))
+
+
+def time_series(time_span: float, time_step: float) -> np.ndarray:
+    """Time vector from 0 to `time_span` in seconds."""
+    return np.arange(round(time_span / time_step) + 1) * time_step
+
+
+def eog(
+    wind_speed: float | list[float],
+    hub_height: float,
+    rotor_diameter: float,
+    turbine_class: str = "I",
+    turbulence_class: str = "B",
+    shear: float = 0.2,
+    event_time: float = 30,
+    time_span: float = 90,
+    time_step: float = 0.1,
+) -> WindEvents:
+    """
+    Extreme operating gust (EOG), IEC 61400-1 Ed. 3, 6.3.2.2.
+
+    Args:
+        wind_speed: Hub height wind speeds in m/s.
+        hub_height: Hub height in meters.
+        rotor_diameter: Rotor diameter in meters.
+        turbine_class: IEC wind turbine class 'I', 'II' or 'III'.
+        turbulence_class: IEC turbulence category 'A+', 'A', 'B' or 'C'.
+        shear: Power law exponent of the wind profile.
+        event_time: Start time of the event in seconds.
+        time_span: Length of the time series in seconds.
+        time_step: Time step in seconds.
+    """
+    (u,) = _grid(wind_speed)
+    t, tau = _event_time(time_span, time_step, event_time, 10.5)
+    sigma = _sigma(u, turbulence_class)
+    v_e1 = 0.8 * 1.4 * IEC_VREF[turbine_class]
+    v_gust = np.minimum(
+        1.35 * (v_e1 - u),
+        3.3 * sigma / (1 + 0.1 * rotor_diameter / _scale_parameter(hub_height)),
+    )
+    speed = u[:, None] - 0.37 * v_gust[:, None] * np.sin(3 * np.pi * tau / 10.5) * (
+        1 - np.cos(2 * np.pi * tau / 10.5)
+    )
+
+    return WindEvents(
+        [_name("EOG", v) for v in u], _columns(t, speed, vertical_shear=shear)
+    )
+
+
+def edc(
+    wind_speed: float | list[float],
+    hub_height: float,
+    rotor_diameter: float,
+    turbulence_class: str = "B",
+    sign: int | tuple[int, ...] = (1, -1),
+    shear: float = 0.2,
+    event_time: float = 30,
+    time_span: float = 90,
+    time_step: float = 0.1,
+) -> WindEvents:
+    """
+    Extreme direction change (EDC), IEC 61400-1 Ed. 3, 6.3.2.4.
+
+    Args:
+        wind_speed: Hub height wind speeds in m/s.
+        hub_height: Hub height in meters.
+        rotor_diameter: Rotor diameter in meters.
+        turbulence_class: IEC turbulence category 'A+', 'A', 'B' or 'C'.
+        sign: Directions of the change, 1 and/or -1.
+        shear: Power law exponent of the wind profile.
+        event_time: Start time of the event in seconds.
+        time_span: Length of the time series in seconds.
+        time_step: Time step in seconds.
+    """
+    u, s = _grid(wind_speed, sign)
+    t, tau = _event_time(time_span, time_step, event_time, 6)
+    sigma = _sigma(u, turbulence_class)
+    theta_e = np.degrees(
+        4
+        * np.arctan(
+            sigma / (u * (1 + 0.1 * rotor_diameter / _scale_parameter(hub_height)))
+        )
+    )
+    theta_e = s * np.minimum(theta_e, 180)
+    direction = 0.5 * theta_e[:, None] * (1 - np.cos(np.pi * tau / 6))
+
+    return WindEvents(
+        [_name("EDC", v, d) for v, d in zip(u, s)],
+        _columns(t, u[:, None], direction=direction, vertical_shear=shear),
+    )
+
+
+def ecd(
+    wind_speed: float | list[float],
+    sign: int | tuple[int, ...] = (1, -1),
+    shear: float = 0.2,
+    event_time: float = 30,
+    time_span: float = 90,
+    time_step: float = 0.1,
+) -> WindEvents:
+    """
+    Extreme coherent gust with direction change (ECD), IEC 61400-1 Ed. 3, 6.3.2.5.
+
+    Args:
+        wind_speed: Hub height wind speeds in m/s.
+        sign: Directions of the change, 1 and/or -1.
+        shear: Power law exponent of the wind profile.
+        event_time: Start time of the event in seconds.
+        time_span: Length of the time series in seconds.
+        time_step: Time step in seconds.
+    """
+    u, s = _grid(wind_speed, sign)
+    t, tau = _event_time(time_span, time_step, event_time, 10)
+    rise = 0.5 * (1 - np.cos(np.pi * tau / 10))
+    theta_cg = np.where(u < 4, 180, 720 / np.maximum(u, 4))
+    speed = u[:, None] + 15 * rise
+    direction = s[:, None] * theta_cg[:, None] * rise
+
+    return WindEvents(
+        [_name("ECD", v, d) for v, d in zip(u, s)],
+        _columns(t, speed, direction=direction, vertical_shear=shear),
+    )
+
+
+def ews(
+    wind_speed: float | list[float],
+    hub_height: float,
+    rotor_diameter: float,
+    turbulence_class: str = "B",
+    orientation: str | tuple[str, ...] = ("vertical", "horizontal"),
+    sign: int | tuple[int, ...] = (1, -1),
+    shear: float = 0.2,
+    event_time: float = 30,
+    time_span: float = 90,
+    time_step: float = 0.1,
+) -> WindEvents:
+    """
+    Extreme wind shear (EWS), IEC 61400-1 Ed. 3, 6.3.2.6.
+
+    Args:
+        wind_speed: Hub height wind speeds in m/s.
+        hub_height: Hub height in meters.
+        rotor_diameter: Rotor diameter in meters.
+        turbulence_class: IEC turbulence category 'A+', 'A', 'B' or 'C'.
+        orientation: Shear orientations, 'vertical' and/or 'horizontal'.
+        sign: Signs of the shear, 1 and/or -1.
+        shear: Power law exponent of the wind profile.
+        event_time: Start time of the event in seconds.
+        time_span: Length of the time series in seconds.
+        time_step: Time step in seconds.
+    """
+    u, o, s = _grid(wind_speed, orientation, sign)
+    if not np.isin(o, ["vertical", "horizontal"]).all():
+        raise ValueError("Unknown orientation. Use 'vertical' or 'horizontal'.")
+    t, tau = _event_time(time_span, time_step, event_time, 12)
+    sigma = _sigma(u, turbulence_class)
+    amplitude = 2.5 + 0.2 * 6.4 * sigma * (
+        rotor_diameter / _scale_parameter(hub_height)
+    ) ** (1 / 4)
+
+    # Speed difference across the rotor diameter, relative to the hub speed.
+    relative_shear = (s * amplitude / u)[:, None] * (1 - np.cos(2 * np.pi * tau / 12))
+    vertical = (o == "vertical")[:, None]
+
+    return WindEvents(
+        [_name(f"EWS{d[0].upper()}", v, g) for v, d, g in zip(u, o, s)],
+        _columns(
+            t,
+            u[:, None],
+            horizontal_shear=np.where(vertical, 0, relative_shear),
+            vertical_shear=shear,
+            linear_shear=np.where(vertical, relative_shear, 0),
+        ),
+    )
+
+
+def ramp(
+    start_speed: float | list[float],
+    end_speed: float | list[float],
+    ramp_time: float | list[float] = 10,
+    shear: float = 0.2,
+    event_time: float = 30,
+    time_span: float = 90,
+    time_step: float = 0.1,
+) -> WindEvents:
+    """
+    Linear wind speed ramps, for all combinations of the parameters.
+
+    Args:
+        start_speed: Wind speeds before the ramp in m/s.
+        end_speed: Wind speeds after the ramp in m/s.
+        ramp_time: Durations of the ramp in seconds.
+        shear: Power law exponent of the wind profile.
+        event_time: Start time of the ramp in seconds.
+        time_span: Length of the time series in seconds.
+        time_step: Time step in seconds.
+    """
+    u_0, u_1, duration = _grid(start_speed, end_speed, ramp_time)
+    t = time_series(time_span, time_step)
+    rise = np.clip((t[None, :] - event_time) / duration[:, None], 0, 1)
+    speed = u_0[:, None] + (u_1 - u_0)[:, None] * rise
+
+    return WindEvents(
+        [
+            f"RAMP_U_{a:05.2f}_{b:05.2f}_T_{d:05.1f}".replace(".", "d")
+            for a, b, d in zip(u_0, u_1, duration)
+        ],
+        _columns(t, speed, vertical_shear=shear),
+    )
+
+
+def step(
+    start_speed: float | list[float],
+    end_speed: float | list[float],
+    shear: float = 0.2,
+    event_time: float = 30,
+    time_span: float = 90,
+    time_step: float = 0.1,
+) -> WindEvents:
+    """
+    Wind speed steps within one time step, for all combinations of the parameters.
+
+    Args:
+        start_speed: Wind speeds before the step in m/s.
+        end_speed: Wind speeds after the step in m/s.
+        shear: Power law exponent of the wind profile.
+        event_time: Time of the step in seconds.
+        time_span: Length of the time series in seconds.
+        time_step: Time step in seconds.
+    """
+    u_0, u_1 = _grid(start_speed, end_speed)
+    t = time_series(time_span, time_step)
+    speed = np.where(t[None, :] < event_time, u_0[:, None], u_1[:, None])
+
+    return WindEvents(
+        [f"STEP_U_{a:05.2f}_{b:05.2f}".replace(".", "d") for a, b in zip(u_0, u_1)],
+        _columns(t, speed, vertical_shear=shear),
+    )
+
+
+def _grid(*parameters) -> list[np.ndarray]:
+    """All combinations of the parameters, one flat array per parameter."""
+    values = [np.atleast_1d(parameter) for parameter in parameters]
+    combinations = list(product(*values))
+    return [np.array([c[i] for c in combinations]) for i in range(len(values))]
+
+
+def _event_time(
+    time_span: float, time_step: float, event_time: float, duration: float
+) -> tuple[np.ndarray, np.ndarray]:
+    """Time vector and time since the event start, clipped to the event duration."""
+    t = time_series(time_span, time_step)
+    return t, np.clip(t - event_time, 0, duration)[None, :]
+
+
+def _sigma(wind_speed: np.ndarray, turbulence_class: str) -> np.ndarray:
+    """Standard deviation of the normal turbulence model (NTM)."""
+    return IEC_IREF[turbulence_class] * (0.75 * wind_speed + 5.6)
+
+
+def _scale_parameter(hub_height: float) -> float:
+    """Turbulence scale parameter of IEC 61400-1 Ed. 3."""
+    return 0.7 * min(hub_height, 60)
+
+
+def _name(event: str, wind_speed: float, sign: int | None = None) -> str:
+    """Case name of an event, e.g. 'ECD_U_12d00_P'."""
+    name = f"{event}_U_{wind_speed:05.2f}".replace(".", "d")
+    if sign is not None:
+        name += "_P" if sign > 0 else "_N"
+    return name
+
+
+def _columns(
+    time: np.ndarray,
+    speed: np.ndarray,
+    direction: np.ndarray | float = 0,
+    vertical_speed: np.ndarray | float = 0,
+    horizontal_shear: np.ndarray | float = 0,
+    vertical_shear: np.ndarray | float = 0,
+    linear_shear: np.ndarray | float = 0,
+    gust_speed: np.ndarray | float = 0,
+) -> np.ndarray:
+    """Stack the columns of uniform wind files to shape (cases, time steps, 8)."""
+    columns = np.broadcast_arrays(
+        time[None, :],
+        speed,
+        direction,
+        vertical_speed,
+        horizontal_shear,
+        vertical_shear,
+        linear_shear,
+        gust_speed,
+    )
+    return np.stack(columns, axis=-1).astype(float)
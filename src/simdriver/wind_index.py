@@ -0,0 +1,274 @@
+import json
+import os
+import struct
+import threading
+import uuid
+from pathlib import Path
+
+import numpy as np
+
+# Index file in each wind file directory.
+INDEX = "simdriver_wind_index.json"
+INDEX_VERSION = 1
+
+# Summary file lines of the form '<value> <description>', by description prefix.
+SUMMARY_FIELDS = {
+    "random seed #1": "seed",
+    "vertical grid-point matrix dimension": "grid_points_vertical",
+    "horizontal grid-point matrix dimension": "grid_points_horizontal",
+    "time step [seconds]": "time_step",
+    "length of analysis time series [seconds]": "duration",
+    "length of time series [seconds]": "duration",
+    "hub height [m]": "hub_height",
+    "grid height [m]": "grid_size_vertical",
+    "grid width [m]": "grid_size_horizontal",
+    "turbulence model used": "turbulence_model",
+    "iec turbulence characteristic": "turbulence_intensity",
+    "reference height [m]": "ref_height",
+    "reference wind speed [m/s]": "wind_speed",
+}
+
+
+def bts_header(path: str | Path) -> dict:
+    """Read the header of a TurbSim binary file (.bts) without its wind field."""
+    with open(path, "rb") as file:
+        _, n_z, n_y, n_tower, n_t = struct.unpack("<h4i", file.read(18))
+        dz, dy, dt, u_hub, hub_height, z_bottom = struct.unpack("<6f", file.read(24))
+        scaling = struct.unpack("<6f", file.read(24))
+        (n_chars,) = struct.unpack("<i", file.read(4))
+        description = file.read(n_chars).decode(errors="replace")
+
+    # Single precision values, rounded to their significant digits.
+    dz, dy, dt, u_hub, hub_height, z_bottom = (
+        float(f"{value:.7g}") for value in (dz, dy, dt, u_hub, hub_height, z_bottom)
+    )
+
+    return {
+        "grid_points_vertical": n_z,
+        "grid_points_horizontal": n_y,
+        "tower_points": n_tower,
+        "time_steps": n_t,
+        "grid_spacing_vertical": dz,
+        "grid_spacing_horizontal": dy,
+        "time_step": dt,
+        "wind_speed": u_hub,
+        "hub_height": hub_height,
+        "z_bottom": z_bottom,
+        "slope": list(scaling[0::2]),
+        "offset": list(scaling[1::2]),
+        "data_offset": 70 + n_chars,
+        "description": description,
+    }
+
+
+def bts_hub_series(path: str | Path, header: dict | None = None) -> np.ndarray:
+    """
+    Velocities of the grid point closest to the hub of a .bts file, of shape
+    (time steps, 3).
+
+    The file is memory-mapped, only the pages holding the hub point are read.
+    """
+    if header is None:
+        header = bts_header(path)
+    n_y = header["grid_points_horizontal"]
+    n_z = header["grid_points_vertical"]
+    z = header["z_bottom"] + header["grid_spacing_vertical"] * np.arange(n_z)
+    i_z = int(np.argmin(np.abs(z - header["hub_height"])))
+    i_y = n_y // 2
+
+    # Each time step holds 3 components of all grid points, then of the tower points.
+    data = np.memmap(
+        path,
+        dtype="<i2",
+        mode="r",
+        offset=header["data_offset"],
+        shape=(header["time_steps"], 3 * (n_y * n_z + header["tower_points"])),
+    )
+    point = 3 * (i_z * n_y + i_y)
+    values = np.array(data[:, point : point + 3], dtype=float)
+    del data
+
+    return (values - header["offset"]) / header["slope"]
+
+
+def read_summary(path: str | Path) -> dict:
+    """Read the case parameters of a TurbSim summary file (.sum)."""
+    fields = {}
+    for line in Path(path).read_text(errors="replace").splitlines():
+        parts = line.split(maxsplit=1)
+        if len(parts) < 2:
+            continue
+        description = parts[1].strip().lower()
+        for prefix, key in SUMMARY_FIELDS.items():
+            if description.startswith(prefix) and key not in fields:
+                fields[key] = _value(parts[0])
+                break
+
+    return fields
+
+
+def read_hh(path: str | Path) -> dict:
+    """Read duration and wind speeds of a uniform wind file (.hh)."""
+    rows = []
+    for line in Path(path).read_text(errors="replace").splitlines():
+        parts = line.split()
+        try:
+            rows.append([float(part) for part in parts[:2]])
+        except ValueError:
+            # Comment or header line.
+            continue
+    rows = [row for row in rows if len(row) == 2]
+    if not rows:
+        raise ValueError(f"no wind data in {path}.")
+
+    time, speed = np.array(rows).T
+    return {
+        "initial_wind_speed": speed[0],
+        "wind_speed": speed.mean(),
+        "duration": time[-1] - time[0],
+    }
+
+
+def _value(token: str) -> int | float | str:
+    """Number or string value of a summary file token."""
+    token = token.strip("\"'")
+    for convert in (int, float):
+        try:
+            return convert(token)
+        except ValueError:
+            pass
+
+    return token
+
+
+class WindIndex:
+    """
+    Metadata of wind input files, cached in an index file next to them.
+
+    Reads only what is needed for each format: the header of .bts files and the
+    neighbouring summary file for the seed, the summary file of .wnd files and the
+    data of .hh files, which are small. The result of each file is stored in
+    'simdriver_wind_index.json' in its directory, keyed by file name and valid while
+    the file's size and modification time are unchanged. Safe to use from several
+    threads.
+    """
+
+    def __init__(self):
+        self.lock = threading.Lock()
+        self.indexes = {}
+        self.modified = set()
+
+    def info(self, wind_file_path: str | Path, statistics: bool = False) -> dict:
+        """
+        Metadata of a wind file.
+
+        Contains 'format', 'wind_speed' (mean hub or reference wind speed) and
+        'initial_wind_speed', and where available grid size, grid points, hub height,
+        time step, duration, seed and turbulence intensity.
+
+        Args:
+            wind_file_path: Path to a .bts, .wnd or .hh file.
+            statistics: For .bts files, also compute mean, standard deviation and
+                        turbulence intensity in % of the hub point time series
+                        ('hub_mean', 'hub_std', 'hub_turbulence_intensity').
+        """
+        path = Path(wind_file_path)
+        stat = path.stat()
+        with self.lock:
+            index = self.load(path.parent)
+            entry = index.get(path.name)
+            valid = (
+                entry is not None
+                and entry["size"] == stat.st_size
+                and entry["mtime_ns"] == stat.st_mtime_ns
+            )
+            if valid and (not statistics or "hub_std" in entry["info"]):
+                return dict(entry["info"])
+
+        info = self.read(path, statistics)
+        with self.lock:
+            self.load(path.parent)[path.name] = {
+                "size": stat.st_size,
+                "mtime_ns": stat.st_mtime_ns,
+                "info": info,
+            }
+            self.modified.add(path.parent)
+
+        return dict(info)
+
+    def read(self, path: Path, statistics: bool) -> dict:
+        """Read the metadata of a wind file."""
+        suffix = path.suffix.lower()
+        summary_path = path.with_suffix(".sum")
+
+        if suffix == ".bts":
+            header = bts_header(path)
+            info = read_summary(summary_path) if summary_path.exists() else {}
+            info |= {
+                "format": "bts",
+                "wind_speed": header["wind_speed"],
+                "initial_wind_speed": header["wind_speed"],
+                "grid_points_horizontal": header["grid_points_horizontal"],
+                "grid_points_vertical": header["grid_points_vertical"],
+                "grid_size_horizontal": header["grid_spacing_horizontal"]
+                * (header["grid_points_horizontal"] - 1),
+                "grid_size_vertical": header["grid_spacing_vertical"]
+                * (header["grid_points_vertical"] - 1),
+                "hub_height": header["hub_height"],
+                "time_step": header["time_step"],
+                "duration": round(header["time_step"] * header["time_steps"], 6),
+            }
+            if statistics:
+                u = bts_hub_series(path, header)[:, 0]
+                info["hub_mean"] = float(u.mean())
+                info["hub_std"] = float(u.std())
+                info["hub_turbulence_intensity"] = 100 * info["hub_std"] / u.mean()
+
+        elif suffix == ".wnd":
+            info = read_summary(summary_path)
+            if "wind_speed" not in info:
+                raise ValueError(f"no reference wind speed in {summary_path}.")
+            info["format"] = "wnd"
+            info["initial_wind_speed"] = info["wind_speed"]
+
+        elif suffix == ".hh":
+            info = read_hh(path)
+            info["format"] = "hh"
+
+        else:
+            raise ValueError("Unknown wind file. Use '.bts', '.wnd' or '.hh'.")
+
+        # Plain types for the JSON index.
+        return {
+            key: value.item() if isinstance(value, np.generic) else value
+            for key, value in info.items()
+        }
+
+    def load(self, wind_dir: Path) -> dict:
+        """Index of a directory, read from its index file on first use."""
+        if wind_dir not in self.indexes:
+            index = {}
+            try:
+                content = json.loads((wind_dir / INDEX).read_text())
+                if content.get("version") == INDEX_VERSION:
+                    index = content["files"]
+            except (OSError, ValueError, KeyError):
+                pass
+            self.indexes[wind_dir] = index
+
+        return self.indexes[wind_dir]
+
+    def save(self):
+        """Write the index files of all directories with new entries."""
+        with self.lock:
+            for wind_dir in self.modified:
+                path = wind_dir / INDEX
+                temp = path.with_name(f".{path.name}.{uuid.uuid4().hex[:8]}")
+                content = {"version": INDEX_VERSION, "files": self.indexes[wind_dir]}
+                try:
+                    temp.write_text(json.dumps(content))
+                    os.replace(temp, path)
+                except OSError:
+                    # Read-only wind directory, the index is only a cache.
+                    temp.unlink(missing_ok=True)
+            self.modified.clear()
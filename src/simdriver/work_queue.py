@@ -0,0 +1,426 @@
+import json
+import os
+import socket
+import subprocess
+import time
+import uuid
+from collections import deque
+from collections.abc import Iterable
+from pathlib import Path
+
+from .scheduler import Job, _poll, finish_job
+
+# Subdirectories of a queue directory, a task file moves from one to the next.
+PENDING = "pending"
+CLAIMED = "claimed"
+DONE = "done"
+
+
+class WorkQueue:
+    """
+    Directory-based work queue on a shared filesystem.
+
+    Each task is a JSON file with the command line, working directory and stdout path
+    of one process. Workers claim a task by renaming it from 'pending' to 'claimed',
+    which is atomic, so every task is claimed by exactly one worker at a time. The
+    worker then writes its claim token into the claimed file and holds a lease on the
+    task by touching the file while the process runs. Tasks whose lease was not
+    renewed within `lease_timeout` are moved back to 'pending', so cases of crashed
+    workers or hosts are picked up by other workers. A worker that was only stalled
+    finds another token in the file once the task was claimed again, its lease is
+    lost. A finished task is reported by a record in 'done'.
+
+    Args:
+        queue_dir: Path to the queue directory, shared by all hosts.
+        lease_timeout: Time in seconds after which a claimed task without heartbeat
+                       is returned to the queue.
+    """
+
+    def __init__(self, queue_dir: str, lease_timeout: float = 120):
+        self.queue_dir = Path(queue_dir)
+        self.lease_timeout = lease_timeout
+        for subdir in [PENDING, CLAIMED, DONE]:
+            (self.queue_dir / subdir).mkdir(parents=True, exist_ok=True)
+
+    def path(self, subdir: str, task_id: str) -> Path:
+        return self.queue_dir / subdir / f"{task_id}.json"
+
+    def put(self, task: dict, priority: int = 1) -> str:
+        """Add a task, return its ID. Tasks are claimed by priority, then in order."""
+        task_id = f"{priority}-{time.time_ns():020d}-{uuid.uuid4().hex[:8]}"
+        self.write(self.path(PENDING, task_id), task)
+        return task_id
+
+    def claim(self, worker: str = "") -> tuple[str, dict] | None:
+        """
+        Claim the next pending task, return its ID and content or None.
+
+        The content holds the claim token under 'claim', it identifies the lease in
+        `renew` and `complete`.
+        """
+        for entry in sorted(os.listdir(self.queue_dir / PENDING)):
+            if not entry.endswith(".json"):
+                continue
+            task_id = entry.removesuffix(".json")
+            try:
+                # Start the lease before the task appears in 'claimed', rename keeps
+                # the modification time and tasks wait longer than a lease.
+                os.utime(self.path(PENDING, task_id))
+                os.rename(self.path(PENDING, task_id), self.path(CLAIMED, task_id))
+                task = json.loads(self.path(CLAIMED, task_id).read_text())
+            except (OSError, ValueError):
+                # Claimed by another worker.
+                continue
+
+            task["claim"] = f"{worker}/{uuid.uuid4().hex}"
+            self.write(self.path(CLAIMED, task_id), task)
+            return task_id, task
+
+        return None
+
+    def holds(self, task_id: str, claim: str) -> bool:
+        """Check if a claimed task still carries the claim token."""
+        try:
+            task = json.loads(self.path(CLAIMED, task_id).read_text())
+        except (OSError, ValueError):
+            return False
+
+        return task.get("claim") == claim
+
+    def renew(self, task_id: str, claim: str) -> bool:
+        """Renew the lease on a claimed task, return False if the lease was lost."""
+        if not self.holds(task_id, claim):
+            return False
+
+        try:
+            os.utime(self.path(CLAIMED, task_id))
+        except FileNotFoundError:
+            return False
+
+        return True
+
+    def complete(self, task_id: str, claim: str, record: dict) -> bool:
+        """
+        Report a claimed task as finished, return False if the lease was lost.
+
+        The record of a lost lease is discarded, the task belongs to another worker.
+        """
+        if not self.holds(task_id, claim):
+            return False
+
+        self.write(self.path(DONE, task_id), record)
+        self.path(CLAIMED, task_id).unlink(missing_ok=True)
+        return True
+
+    def result(self, task_id: str) -> dict | None:
+        """Take the record of a finished task, None if it is not finished."""
+        path = self.path(DONE, task_id)
+        try:
+            record = json.loads(path.read_text())
+        except FileNotFoundError:
+            return None
+
+        path.unlink()
+        return record
+
+    def is_pending(self, task_id: str) -> bool:
+        return self.path(PENDING, task_id).exists()
+
+    def requeue_expired(self) -> list[str]:
+        """Return claimed tasks with expired leases to the queue, return their IDs."""
+        requeued = []
+        now = time.time()
+        for entry in os.listdir(self.queue_dir / CLAIMED):
+            if not entry.endswith(".json"):
+                continue
+            task_id = entry.removesuffix(".json")
+            try:
+                expired = (
+                    now - self.path(CLAIMED, task_id).stat().st_mtime
+                    > self.lease_timeout
+                )
+                if expired:
+                    os.rename(self.path(CLAIMED, task_id), self.path(PENDING, task_id))
+                    requeued.append(task_id)
+            except OSError:
+                # Finished or requeued by someone else.
+                continue
+
+        return requeued
+
+    @staticmethod
+    def write(path: Path, content: dict):
+        """Write a JSON file atomically, readers never see a partial file."""
+        temp = path.with_name(f".{path.name}.{uuid.uuid4().hex[:8]}")
+        temp.write_text(json.dumps(content))
+        os.replace(temp, path)
+
+
+def run_queued(
+    jobs: Iterable[Job],
+    queue_dir: str,
+    max_queued: int,
+    verbose: bool = False,
+    poll_interval: float = 1,
+    monitor=None,
+    keep_finished: bool = True,
+) -> list[Job]:
+    """
+    Run jobs through a work queue, processes are run by `simdriver worker`.
+
+    Behaves like `run_jobs`: jobs are prepared lazily on this host, at most
+    `max_queued` at a time, and finished through their completion handlers here, so
+    output processing is unchanged. Only the processes run on the workers, which also
+    return tasks of crashed workers to the queue. The queue directory and the working
+    directory must be on a filesystem shared by all hosts, under the same path.
+
+    Args:
+        jobs: Jobs to run.
+        queue_dir: Path to the queue directory the workers listen to.
+        max_queued: Maximum number of jobs in the queue or running, usually the total
+                    number of worker slots.
+        verbose: Print stdout and stderr of each process when it finishes.
+        poll_interval: Time in seconds between checks for finished tasks.
+        monitor: Progress monitor notified about started, running and finished jobs.
+        keep_finished: Keep and return the finished jobs, see `run_jobs`.
+
+    Returns:
+        List of finished jobs in order of completion, empty if not kept.
+    """
+    work_queue = WorkQueue(queue_dir)
+    start = time.time()
+    pending = iter(jobs)
+    follow_ups = deque()
+    queued = {}
+    running = {}
+    finished = [] if keep_finished else None
+    exhausted = False
+
+    while True:
+        # Queue jobs until the queue is full, follow-up jobs first.
+        while len(queued) + len(running) < max_queued:
+            if follow_ups:
+                job = follow_ups.popleft()
+                priority = 0
+            elif not exhausted:
+                job = next(pending, None)
+                if job is None:
+                    exhausted = True
+                    break
+                if job.queued is None:
+                    job.queued = start
+                priority = 1
+            else:
+                break
+
+            task_id = _put(work_queue, job, priority)
+            if task_id is None:
+                follow_ups.extendleft(
+                    reversed(finish_job(job, finished, verbose, monitor))
+                )
+            else:
+                queued[task_id] = job
+
+        if not queued and not running and not follow_ups and exhausted:
+            break
+
+        # Jobs leave the queue when a worker claims them.
+        for task_id in [
+            task_id for task_id in queued if not work_queue.is_pending(task_id)
+        ]:
+            job = queued.pop(task_id)
+            running[task_id] = job
+            if monitor is not None:
+                monitor.started(job)
+
+        if monitor is not None:
+            monitor.poll(list(running.values()))
+
+        done = False
+        for task_id in list(running):
+            record = work_queue.result(task_id)
+            if record is None:
+                continue
+
+            done = True
+            job = running.pop(task_id)
+            job.launched = record["launched"]
+            job.ended = record["ended"]
+            job.return_code = record["return_code"]
+            job.resources = record["resources"]
+            job.error = record["error"]
+            follow_ups.extendleft(reversed(finish_job(job, finished, verbose, monitor)))
+
+        if not done:
+            time.sleep(poll_interval)
+
+    return finished or []
+
+
+def _put(work_queue: WorkQueue, job: Job, priority: int) -> str | None:
+    """Prepare a job and add its process to the queue, return None if not queued."""
+    job.started = time.time()
+    try:
+        command = job.prepare()
+        if command is None:
+            job.skipped = True
+            job.return_code = 0
+            return None
+
+        return work_queue.put(
+            {
+                "name": job.name,
+                "command": [str(part) for part in command],
+                "cwd": os.getcwd(),
+                "stdout": str(Path(job.stdout).absolute()),
+            },
+            priority,
+        )
+    except Exception as e:
+        job.error = f"{type(e).__name__}: {e}"
+        return None
+
+
+def run_worker(
+    queue_dir: str,
+    max_processes: int | None = None,
+    lease_timeout: float = 120,
+    poll_interval: float = 1,
+    idle_timeout: float | None = None,
+    verbose: bool = False,
+):
+    """
+    Claim and run tasks from a work queue until it stays empty for `idle_timeout`.
+
+    Any number of workers on any number of hosts can serve the same queue. A worker
+    renews the leases of its running tasks every `lease_timeout / 4` seconds and kills
+    processes whose lease was taken over after a timeout.
+
+    Args:
+        queue_dir: Path to the queue directory on the shared filesystem.
+        max_processes: Maximum number of parallel processes, default is the number of
+                       CPUs.
+        lease_timeout: Time in seconds after which a task of an unresponsive worker is
+                       returned to the queue. Must be the same for all workers.
+        poll_interval: Time in seconds between checks for new and finished tasks.
+        idle_timeout: Exit after the queue was empty for this time in seconds, default
+                      is to run until interrupted.
+        verbose: Print stdout and stderr of each process when it finishes.
+    """
+    if max_processes is None:
+        max_processes = os.cpu_count()
+    work_queue = WorkQueue(queue_dir, lease_timeout)
+    worker = f"{socket.gethostname()}:{os.getpid()}"
+    running = {}
+    claims = {}
+    idle_since = time.time()
+    last_renewal = 0.0
+
+    print(f"worker {worker} serving {queue_dir} with {max_processes} processes.")
+    try:
+        while True:
+            work_queue.requeue_expired()
+
+            # Fill free slots.
+            while len(running) < max_processes:
+                claimed = work_queue.claim(worker)
+                if claimed is None:
+                    break
+                task_id, task = claimed
+
+                # Claimed again after this worker's own lease expired.
+                if task_id in running:
+                    _stop(running.pop(task_id))
+                claims[task_id] = task["claim"]
+                running[task_id] = _launch(task)
+                print(f"task {task['name']} started.")
+
+            # Renew leases, stop processes of lost leases.
+            now = time.time()
+            if now - last_renewal > lease_timeout / 4:
+                last_renewal = now
+                for task_id, job in list(running.items()):
+                    if not work_queue.renew(task_id, claims[task_id]):
+                        print(f"lease of task {job.name} lost, stopping it.")
+                        _stop(job)
+                        del running[task_id]
+                        del claims[task_id]
+
+            done = [task_id for task_id, job in running.items() if _exited(job)]
+            for task_id in done:
+                job = running.pop(task_id)
+                job.ended = time.time()
+                if job.process is not None:
+                    job.return_code = job.process.returncode
+                    job.log.close()
+                    print(
+                        f"task {job.name} finished with return code {job.return_code}."
+                    )
+                    if verbose:
+                        print(f"\n########## {job.name} ##########\n")
+                        print(open(job.stdout, "r").read())
+                else:
+                    print(f"task {job.name} failed: {job.error}")
+
+                completed = work_queue.complete(
+                    task_id,
+                    claims.pop(task_id),
+                    {
+                        "worker": worker,
+                        "launched": job.launched,
+                        "ended": job.ended,
+                        "return_code": job.return_code,
+                        "resources": job.resources,
+                        "error": job.error,
+                    },
+                )
+                if not completed:
+                    print(f"lease of task {job.name} lost, result discarded.")
+
+            if running:
+                idle_since = time.time()
+            elif idle_timeout is not None and time.time() - idle_since > idle_timeout:
+                break
+
+            if not done:
+                time.sleep(poll_interval)
+    finally:
+        # Leave interrupted tasks to the lease timeout of other workers.
+        for job in running.values():
+            if job.process is not None:
+                job.process.kill()
+
+    print(f"worker {worker} stopped, queue idle.")
+
+
+def _launch(task: dict) -> Job:
+    """Launch the process of a task."""
+    job = Job(
+        name=task["name"], stdout=Path(task["stdout"]), prepare=lambda: task["command"]
+    )
+    job.launched = time.time()
+    try:
+        job.log = open(job.stdout, "w")
+        job.process = subprocess.Popen(
+            task["command"],
+            cwd=task["cwd"],
+            stdout=job.log,
+            stderr=subprocess.STDOUT,
+        )
+    except Exception as e:
+        job.error = f"{type(e).__name__}: {e}"
+
+    return job
+
+
+def _stop(job: Job):
+    """Kill the process of a task whose lease was lost."""
+    if job.process is not None:
+        job.process.kill()
+        job.process.wait()
+        job.log.close()
+
+
+def _exited(job: Job) -> bool:
+    """Check if the process of a task exited, or could not be started."""
+    return job.process is None or _poll(job)
@@ -0,0 +1,85 @@
+import json
+import os
+import time
+from pathlib import Path
+from shutil import copytree
+
+import polars as pl
+import pytest
+
+from simdriver import run_fast
+from simdriver.cache import dir_digest
+from simdriver.journal import DONE, JOURNAL
+from simdriver.results import CASE_METADATA
+
+ROOT = Path(__file__).parent.parent
+STAND_IN = ROOT / "benchmarks" / "stand_ins" / "openfast.py"
+CASES = ["U_08d00", "U_12d00"]
+
+
+class Interrupt(Exception):
+    """Stops a run from the progress callback, like Ctrl+C."""
+
+
+def simulate(progress=False) -> set[str]:
+    """Run both cases with the stand-in, return the names of the simulated cases."""
+    simulated = set()
+
+    def hook(record: dict):
+        if record["phase"] == "runtime" and record["case"] in CASES:
+            simulated.add(record["case"])
+
+    run_fast(
+        output_dir="output",
+        input_file="model/NREL_5MW.fst",
+        steady_wind_speed=[8, 12],
+        time_span=10,
+        custom_fast=os.path.relpath(STAND_IN),
+        max_processes=1,
+        initialization_options={"mode": "parallel"},
+        progress=progress,
+        hooks=[hook],
+    )
+
+    return simulated
+
+
+def done_cases() -> set[str]:
+    """Cases whose latest journal entry is 'done'."""
+    states = {}
+    for line in Path("output", JOURNAL).read_text().splitlines():
+        entry = json.loads(line)
+        states[entry["case"]] = entry["state"]
+
+    return {case for case, state in states.items() if state == DONE}
+
+
+def test_resume_after_interrupt(tmp_path, monkeypatch):
+    # The initial state is written into the model directory, so use a copy.
+    copytree(ROOT / "extern" / "NREL_5MW", tmp_path / "model")
+    monkeypatch.chdir(tmp_path)
+
+    # Interrupt the first run of a new model once the second case has exited,
+    # before its output is converted.
+    def interrupt(event: dict):
+        if event["event"] == "finish" and event["case"] == CASES[1]:
+            raise Interrupt()
+
+    with pytest.raises(Interrupt):
+        simulate(progress=interrupt)
+
+    # The first case is still converted in the background.
+    deadline = time.time() + 60
+    while CASES[0] not in done_cases() and time.time() < deadline:
+        time.sleep(0.1)
+    assert done_cases() == {CASES[0]}
+
+    # Only the interrupted case runs again, then nothing does.
+    assert simulate() == {CASES[1]}
+    assert done_cases() == set(CASES)
+    assert simulate() == set()
+
+    # Finding the initial state does not change the hash of the model.
+    metadata = pl.read_parquet(Path("output", CASE_METADATA))
+    model_hash = dir_digest(ROOT / "extern" / "NREL_5MW")[:16]
+    assert metadata["model_hash"].to_list() == [model_hash] * len(CASES)